@@ -12,6 +12,7 @@ from flathunter.core.logging import logger, configure_logging
 from flathunter.persistence.idmaintainer import IdMaintainer
 from flathunter.app.hunter import Hunter
 from flathunter.core.config import Config
+from flathunter.app.runtime import configure_runtime
 from flathunter.utils.heartbeat import Heartbeat
 from flathunter.utils.time_utils import get_random_time_jitter, wait_during_period
 
@@ -24,7 +25,9 @@ __status__ = "Production"
 
 def launch_flat_hunt(config, heartbeat: Heartbeat):
     """Starts the crawler / notification loop"""
-    id_watch = IdMaintainer(f'{config.database_location()}/processed_ids.db')
+    id_watch = IdMaintainer(f'{config.database_location()}/processed_ids.db',
+                            seen_index=config.seen_index_mode(),
+                            error_rate=config.seen_index_error_rate())
 
     time_from = dtime.fromisoformat(config.loop_pause_from())
     time_till = dtime.fromisoformat(config.loop_pause_till())
@@ -61,8 +64,8 @@ def main():
     # setup logging
     configure_logging(config)
 
-    # initialize search plugins for config
-    config.init_searchers()
+    # set up the crawlers and the state they share
+    configure_runtime(config)
 
     # check config
     notifiers = config.notifiers()
@@ -1,61 +1,193 @@
 """Default Flathunter implementation for the command line"""
+import threading
 import traceback
 from itertools import chain
+from typing import Dict, List
 import requests
 
 from flathunter.core.logging import logger
 from flathunter.core.config import YamlConfig
 from flathunter.processing.filter import Filter
+from flathunter.processing.dedup import duplicate_index_for
+from flathunter.processing.duration_cache import get_duration_cache, hit_rate
+from flathunter.processing.image_dedup import image_index_for
 from flathunter.processing.processor import ProcessorChain
+from flathunter.processing.run_report import RunReport
 from flathunter.captcha.captcha_solver import CaptchaUnsolvableError
-from flathunter.core.exceptions import ConfigException
+from flathunter.core.exceptions import ConfigException, FixtureMissingException, \
+    ProxyException
+from flathunter.crawling.http_session import get_session_pool
+from flathunter.crawling.page_cache import get_page_cache
+from flathunter.crawling.async_engine import AsyncCrawlEngine
 
 class Hunter:
     """Basic methods for crawling and processing / filtering exposes"""
 
+    # Number of IDs kept per search URL to recognise already crawled listings
+    WATERMARK_SIZE = 500
+
     def __init__(self, config: YamlConfig, id_watch):
         self.config = config
         if not isinstance(self.config, YamlConfig):
             raise ConfigException(
                 "Invalid config for hunter - should be a 'Config' object")
         self.id_watch = id_watch
+        # Kept from one hunt to the next, so that it is loaded only once
+        self.duplicates = duplicate_index_for(config, id_watch)
+        self.image_duplicates = image_index_for(config)
+        # Watermarks of the current crawl, saved once its exposes were processed
+        self._watermarks: Dict[str, List] = {}
+        self._watermarks_lock = threading.Lock()
+
+    def crawl_for_exposes(self, max_pages=None, stats=None):
+        """Trigger a new crawl of the configured URLs. Failed crawls are counted
+           as errors in the stage stats, if given"""
+        incremental = self.config.incremental_crawl_enabled()
 
-    def crawl_for_exposes(self, max_pages=None):
-        """Trigger a new crawl of the configured URLs"""
         def try_crawl(searcher, url, max_pages):
             try:
+                if incremental:
+                    return self.crawl_incremental(searcher, url, max_pages)
                 return searcher.crawl(url, max_pages)
             except CaptchaUnsolvableError:
                 logger.info("Error while scraping url %s: the captcha was unsolvable", url)
-                return []
             except requests.exceptions.RequestException:
                 logger.info("Error while scraping url %s:\n%s", url, traceback.format_exc())
-                return []
+            except (ProxyException, FixtureMissingException) as error:
+                logger.info("Error while scraping url %s: %s", url, error)
+            if stats is not None:
+                stats.record_error()
+            return []
+
+        jobs = []
+        for url in self.config.target_urls():
+            searcher = self.config.crawler_for_url(url)
+            if searcher is None:
+                logger.warning("No crawler configured for url %s", url)
+                continue
+            jobs.append((searcher, url))
+
+        if self.config.async_crawl_enabled():
+            engine = AsyncCrawlEngine(self.config.crawl_max_concurrency(),
+                                      self.config.crawl_per_domain_concurrency())
+            return engine.stream(jobs, lambda searcher, url: try_crawl(searcher, url, max_pages))
+
+        return chain(*[try_crawl(searcher, url, max_pages) for searcher, url in jobs])
+
+    def crawl_incremental(self, searcher, url, max_pages=None):
+        """Crawl a URL, loading only as many pages as needed to reach the
+           listings seen at the last crawl. The watermark moves forward when
+           the crawl is committed"""
+        known_ids = self.id_watch.get_watermark(url)
+        exposes = searcher.crawl(url, max_pages, known_ids=set(known_ids))
+        seen = list(dict.fromkeys([expose['id'] for expose in exposes] + known_ids))
+        with self._watermarks_lock:
+            self._watermarks[url] = seen[:self.WATERMARK_SIZE]
+        return exposes
 
-        return chain(*[try_crawl(searcher, url, max_pages)
-                       for searcher in self.config.searchers()
-                       for url in self.config.target_urls()])
+    def commit_crawl(self):
+        """Record the state of a crawl whose exposes were all processed, so
+           that the next crawl can skip what did not change since"""
+        cache = get_page_cache()
+        if cache is not None:
+            cache.commit_digests()
+        with self._watermarks_lock:
+            watermarks, self._watermarks = self._watermarks, {}
+        for url, expose_ids in watermarks.items():
+            self.id_watch.save_watermark(url, expose_ids)
+
+    def discard_crawl(self):
+        """Forget the state of a crawl whose hunt failed, so that the next
+           crawl loads its exposes again"""
+        cache = get_page_cache()
+        if cache is not None:
+            cache.discard_digests()
+        with self._watermarks_lock:
+            self._watermarks = {}
+
+    def start_report(self):
+        """A run report for the next hunt, or None if reports are disabled"""
+        cache = get_duration_cache()
+        if cache is not None:
+            # Count the lookups of this hunt only
+            cache.take_counts()
+        if not self.config.run_report_enabled():
+            return None
+        return RunReport()
+
+    def warm_up(self):
+        """Open connections to the hosts of the target URLs before the crawl, if
+           configured"""
+        if self.config.http_warm_up():
+            get_session_pool().warm_up(self.config.target_urls())
+
+    def crawl_measured(self, max_pages, report):
+        """Crawl for exposes, measuring the crawl as the first stage of the report"""
+        if report is None:
+            return self.crawl_for_exposes(max_pages)
+        stats = report.stage('crawl')
+        return stats.meter(lambda _: self.crawl_for_exposes(max_pages, stats))
+
+    def finish_report(self, report, new_exposes):
+        """Log the run report and store it alongside the executions"""
+        if report is None:
+            return
+        report.finish()
+        slowest = max(report.stages, key=lambda stats: stats.wall_seconds, default=None)
+        logger.info("Hunt took %.2fs (%.2fs CPU), %d new exposes%s", report.wall_seconds,
+                    report.cpu_seconds, new_exposes,
+                    f", slowest stage {slowest.name}" if slowest is not None else "")
+        for line in report.summary():
+            logger.debug('Stage %s', line)
+        cache = get_duration_cache()
+        if cache is not None:
+            counts = cache.take_counts()
+            report.record_cache('durations', counts)
+            rate = hit_rate(counts)
+            if rate is not None:
+                logger.info("Travel durations: %.0f%% from the cache (%d from memory, "
+                            "%d from the database, %d requested)", 100 * rate,
+                            counts['memory'], counts['database'], counts['misses'])
+        if hasattr(self.id_watch, 'save_run_report'):
+            self.id_watch.save_run_report(report.to_dict())
 
     def hunt_flats(self, max_pages: None|int = None):
         """Crawl, process and filter exposes"""
+        report = self.start_report()
+        self.warm_up()
+
         filter_set = Filter.builder() \
                            .read_config(self.config) \
                            .filter_already_seen(self.id_watch) \
                            .build()
 
         processor_chain = ProcessorChain.builder(self.config) \
+                                        .normalize() \
                                         .save_all_exposes(self.id_watch) \
                                         .apply_filter(filter_set) \
                                         .resolve_addresses() \
+                                        .deduplicate(self.duplicates) \
+                                        .deduplicate_images(self.image_duplicates) \
                                         .calculate_durations() \
                                         .score_properties() \
                                         .send_messages() \
+                                        .instrument(report) \
                                         .build()
 
         result = []
-        # We need to iterate over this list to force the evaluation of the pipeline
-        for expose in processor_chain.process(self.crawl_for_exposes(max_pages)):
-            logger.info('New offer: %s', expose['title'])
-            result.append(expose)
+        try:
+            # We need to iterate over this list to force the evaluation of the pipeline
+            for expose in processor_chain.process(self.crawl_measured(max_pages, report)):
+                logger.info('New offer: %s', expose['title'])
+                result.append(expose)
+        except BaseException:
+            self.discard_crawl()
+            raise
+        else:
+            self.commit_crawl()
+        finally:
+            self.finish_report(report, len(result))
 
+        for line in filter_set.summary():
+            logger.debug('Filter %s', line)
         return result
@@ -1,10 +1,15 @@
 # pylint: disable=missing-docstring
 import os
+import tempfile
 import unittest
 import re
+from unittest import mock
 from typing import Optional, Dict, List
 from flathunter.crawler.germany.immowelt import Immowelt
 from flathunter.app.hunter import Hunter
+from flathunter.app.web_hunter import WebHunter
+from flathunter.crawling import page_cache
+from flathunter.crawling.page_cache import PageCache
 from flathunter.persistence.idmaintainer import IdMaintainer
 from flathunter.testing.dummy_crawler import DummyCrawler
 from flathunter.testing.util import count
@@ -230,3 +235,75 @@ excluded_titles:
             for expose in unfiltered:
                 print("Got unfiltered expose: ", expose)
         self.assertTrue(len(unfiltered) == 0, "Expected flats with too few rooms to be filtered")
+
+    INCREMENTAL_CONFIG = """
+urls:
+  - https://www.example.com/search/flats-in-berlin
+
+crawl:
+  incremental: true
+"""
+
+    def test_incremental_crawl_moves_watermark(self):
+        config = StringConfig(string=self.INCREMENTAL_CONFIG)
+        crawler = DummyCrawler()
+        config.set_searchers([crawler])
+        id_watch = IdMaintainer(":memory:")
+        url = config.target_urls()[0]
+        id_watch.save_watermark(url, [100001])
+        known = []
+        get_results = crawler.get_results
+        def spy(search_url, max_pages=None, known_ids=None):
+            known.append(known_ids)
+            return get_results(search_url, max_pages)
+        crawler.get_results = spy
+        hunter = Hunter(config, id_watch)
+        exposes = list(hunter.crawl_for_exposes())
+        self.assertEqual(known, [{100001}])
+        # the watermark moves once the exposes were processed
+        self.assertEqual(id_watch.get_watermark(url), [100001])
+        hunter.commit_crawl()
+        watermark = id_watch.get_watermark(url)
+        self.assertEqual(watermark[-1], 100001)
+        self.assertEqual(set(watermark[:-1]), {expose['id'] for expose in exposes})
+
+    def test_failed_hunt_keeps_watermark(self):
+        config = StringConfig(string=self.INCREMENTAL_CONFIG)
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        url = config.target_urls()[0]
+        id_watch.save_watermark(url, [100001])
+        hunter = Hunter(config, id_watch)
+        with mock.patch('flathunter.processing.default_processors.Filter.process_batch',
+                        side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                hunter.hunt_flats()
+        self.assertEqual(id_watch.get_watermark(url), [100001])
+
+    def test_page_digests_are_committed_by_a_finished_hunt(self):
+        config = StringConfig(string=self.FILTER_TITLES_CONFIG)
+        config.set_searchers([DummyCrawler()])
+        hunter = Hunter(config, IdMaintainer(":memory:"))
+        url = config.target_urls()[0]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PageCache(directory)
+            page_cache._CACHE = cache  # pylint: disable=protected-access
+            try:
+                cache.remember_digest(url, "v1")
+                with mock.patch.object(hunter, 'crawl_for_exposes', side_effect=ValueError):
+                    with self.assertRaises(ValueError):
+                        hunter.hunt_flats()
+                self.assertFalse(cache.is_unchanged(url, "v1"))
+                cache.remember_digest(url, "v1")
+                hunter.hunt_flats()
+                self.assertTrue(cache.is_unchanged(url, "v1"))
+            finally:
+                page_cache._CACHE = None  # pylint: disable=protected-access
+
+    def test_hunters_warm_up_connections(self):
+        config = StringConfig(string=self.FILTER_TITLES_CONFIG + "\nhttp:\n  warm_up: true\n")
+        config.set_searchers([DummyCrawler()])
+        for hunter_cls in [Hunter, WebHunter]:
+            with mock.patch('flathunter.app.hunter.get_session_pool') as get_session_pool:
+                hunter_cls(config, IdMaintainer(":memory:")).hunt_flats()
+            get_session_pool().warm_up.assert_called_once_with(config.target_urls())
@@ -0,0 +1,30 @@
+"""Set-up shared by the entry points (flathunt.py, main.py and the cloud job): the
+process-wide state used by all crawlers and processors, and the searchers"""
+from flathunter.crawling.domain_slots import configure_domain_slots
+from flathunter.crawling.driver_pool import configure_driver_pool
+from flathunter.crawling.fixture_store import configure_fixture_store
+from flathunter.crawling.http_session import configure_session_pool
+from flathunter.crawling.page_cache import configure_page_cache
+from flathunter.crawling.proxies import configure_proxy_pool
+from flathunter.crawling.rate_limiter import configure_rate_limiter
+from flathunter.processing.duration_cache import configure_duration_cache
+
+
+def configure_runtime(config):
+    """Configure everything a hunt needs besides the ID store and the notifiers"""
+    # set up pooled HTTP sessions, browsers, rate limits, the page cache and proxies
+    # shared by all crawlers
+    configure_session_pool(config)
+    configure_driver_pool(config)
+    configure_rate_limiter(config)
+    configure_domain_slots(config)
+    configure_page_cache(config)
+    configure_fixture_store(config)
+    if config.use_proxy():
+        configure_proxy_pool(config)
+
+    # cache travel durations across hunts
+    configure_duration_cache(config)
+
+    # initialize search plugins for config
+    config.init_searchers(only_configured=True)
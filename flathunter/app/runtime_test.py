@@ -0,0 +1,31 @@
+# pylint: disable=missing-docstring
+import unittest
+
+from flathunter.app.runtime import configure_runtime
+from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.crawling import domain_slots
+from flathunter.crawling.domain_slots import get_domain_slots
+from flathunter.processing.duration_cache import get_duration_cache
+from flathunter.testing.config import StringConfig
+
+CONFIG = """
+urls:
+  - https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=REGION%5E87490
+crawl:
+  per_domain_concurrency: 3
+duration_cache:
+  enabled: false
+"""
+
+
+class RuntimeTest(unittest.TestCase):
+
+    def test_shared_state_and_searchers_are_configured(self):
+        config = StringConfig(string=CONFIG)
+        try:
+            configure_runtime(config)
+            self.assertEqual(get_domain_slots().per_domain, 3)
+            self.assertIsNone(get_duration_cache())
+            self.assertEqual([type(searcher) for searcher in config.searchers()], [Rightmove])
+        finally:
+            domain_slots._SLOTS = None  # pylint: disable=protected-access
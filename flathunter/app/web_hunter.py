@@ -13,23 +13,37 @@ class WebHunter(Hunter):
 
     def hunt_flats(self, max_pages=1):
         """Crawl all URLs, and send notifications to users of new flats"""
+        report = self.start_report()
+        self.warm_up()
         filter_set = Filter.builder() \
                        .read_config(self.config) \
                        .filter_already_seen(self.id_watch) \
                        .build()
 
         processor_chain = ProcessorChain.builder(self.config) \
+                                        .normalize() \
                                         .apply_filter(filter_set) \
                                         .crawl_expose_details() \
                                         .save_all_exposes(self.id_watch) \
                                         .resolve_addresses() \
+                                        .deduplicate(self.duplicates) \
+                                        .deduplicate_images(self.image_duplicates) \
                                         .calculate_durations() \
                                         .send_messages() \
+                                        .instrument(report) \
                                         .build()
 
         new_exposes = []
-        for expose in processor_chain.process(self.crawl_for_exposes(max_pages=max_pages)):
-            new_exposes.append(expose)
+        try:
+            for expose in processor_chain.process(self.crawl_measured(max_pages, report)):
+                new_exposes.append(expose)
+        except BaseException:
+            self.discard_crawl()
+            raise
+        else:
+            self.commit_crawl()
+        finally:
+            self.finish_report(report, len(new_exposes))
 
         for (user_id, settings) in self.id_watch.get_user_settings():
             if 'mute_notifications' in settings:
@@ -1,8 +1,9 @@
 """Factory for creating crawler instances"""
 import re
-from typing import Dict, List, Type, Optional
+from typing import Dict, Iterable, List, Type, Optional
 from flathunter.core.abstract_crawler import Crawler
 from flathunter.core.logging import logger
+from flathunter.crawling.router import CrawlerRouter
 
 class CrawlerFactory:
     """Factory for managing and creating crawler instances"""
@@ -20,12 +21,17 @@ class CrawlerFactory:
         """Create all registered crawler instances"""
         return [crawler_cls(config) for crawler_cls in self._registry.values()]
 
+    def create_for_urls(self, urls: Iterable[str], config) -> List[Crawler]:
+        """Create only the crawlers that handle at least one of the URLs"""
+        router = CrawlerRouter(self._registry.items())
+        return [crawler_cls(config) for crawler_cls in router.targets_for(urls)]
+
     def get_crawler_for_url(self, url: str, config) -> Optional[Crawler]:
         """Get appropriate crawler instance for URL"""
-        for pattern, crawler_cls in self._registry.items():
-            if pattern.search(url):
-                return crawler_cls(config)
-        return None
+        crawler_cls = CrawlerRouter(self._registry.items()).route(url)
+        if crawler_cls is None:
+            return None
+        return crawler_cls(config)
 
 def get_default_crawler_factory() -> CrawlerFactory:
     """Create factory with all built-in crawlers registered"""
@@ -42,16 +48,10 @@ def get_default_crawler_factory() -> CrawlerFactory:
 
     factory = CrawlerFactory()
 
-    # Register all crawlers with their patterns
-    factory.register(re.compile(r'https://www\.immobilienscout24\.de'), Immobilienscout)
-    factory.register(re.compile(r'https://www\.wg-gesucht\.de'), WgGesucht)
-    factory.register(re.compile(r'https://www\.kleinanzeigen\.de'), Kleinanzeigen)
-    factory.register(re.compile(r'https://www\.immowelt\.de'), Immowelt)
-    factory.register(re.compile(r'https://www\.vrm-immo\.de'), VrmImmo)
-    factory.register(re.compile(r'https://www\.zoopla\.co\.uk'), Zoopla)
-    factory.register(re.compile(r'https://www\.rightmove\.co\.uk'), Rightmove)
-    factory.register(re.compile(r'https://www\.immobiliare\.it'), Immobiliare)
-    factory.register(re.compile(r'https://www\.subito\.it'), Subito)
-    factory.register(re.compile(r'https://www\.idealista\.(it|com|es)'), Idealista)
+    # Register all crawlers with the pattern they check in crawl(), so that every
+    # URL a crawler accepts is routed to it
+    for crawler_cls in [Immobilienscout, WgGesucht, Kleinanzeigen, Immowelt, VrmImmo, Zoopla,
+                        Rightmove, Immobiliare, Subito, Idealista]:
+        factory.register(crawler_cls.URL_PATTERN, crawler_cls)
 
     return factory
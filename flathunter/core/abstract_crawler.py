@@ -11,6 +11,7 @@ import requests
 import requests_random_user_agent
 
 from bs4 import BeautifulSoup
+from bs4.filter import SoupStrainer
 
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from selenium.webdriver import Chrome
@@ -19,9 +20,14 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
 from flathunter.crawling import proxies
+from flathunter.crawling.chrome_wrapper import transferred_bytes
+from flathunter.crawling.domain_slots import get_domain_slots
+from flathunter.crawling.fixture_store import get_fixture_store
+from flathunter.crawling.http_session import get_session_pool
+from flathunter.crawling.page_cache import get_page_cache, listing_digest
+from flathunter.crawling.rate_limiter import get_rate_limiter
 from flathunter.captcha.captcha_solver import CaptchaUnsolvableError
 from flathunter.core.logging import logger
-from flathunter.core.exceptions import ProxyException
 
 
 class Crawler(ABC):
@@ -29,6 +35,18 @@ class Crawler(ABC):
 
     URL_PATTERN: re.Pattern
 
+    # CSS selector of the listing region of a search page, hashed to detect
+    # unchanged pages (defaults to the page body)
+    LISTING_SELECTOR: Optional[str] = None
+
+    # Restricts parsing of fetched pages to the matching elements (None parses
+    # the whole page)
+    PARSE_ONLY: Optional[SoupStrainer] = None
+
+    # How the portal writes numbers: 'uk' for 1,250.50 and 'eu' for 1.250,50
+    # (None guesses the format from every number)
+    NUMBER_LOCALE: Optional[str] = None
+
     HEADERS = {
         'Connection': 'keep-alive',
         'Pragma': 'no-cache',
@@ -49,6 +67,16 @@ class Crawler(ABC):
         if config.captcha_enabled():
             self.captcha_solver = config.get_captcha_solver()
 
+    def make_soup(self, markup) -> BeautifulSoup:
+        """Parses fetched markup, restricted to PARSE_ONLY if anything matches it"""
+        if self.PARSE_ONLY is not None:
+            soup = BeautifulSoup(markup, 'lxml', parse_only=self.PARSE_ONLY)
+            if soup.find(True) is not None:
+                return soup
+            logger.debug("Restricted parse of %s found nothing, parsing whole page",
+                         self.get_name())
+        return BeautifulSoup(markup, 'lxml')
+
     # pylint: disable=unused-argument
     def get_page(self, search_url, driver=None, page_no=None) -> BeautifulSoup:
         """Applies a page number to a formatted search URL and fetches the exposes at that page"""
@@ -65,9 +93,14 @@ class Crawler(ABC):
             afterlogin_string: Optional[str] = None) -> BeautifulSoup:
         """Creates a Soup object from the HTML at the provided URL"""
 
-        if self.config.use_proxy():
+        store = get_fixture_store()
+        if store is not None and store.replaying:
+            # recorded pages are replayed through the session pool
+            driver = None
+        elif self.config.use_proxy():
             return self.get_soup_with_proxy(url)
         if driver is not None:
+            get_rate_limiter().acquire(url)
             driver.get(url)
             if re.search("initGeetest", driver.page_source):
                 self.resolve_geetest(driver)
@@ -76,9 +109,33 @@ class Crawler(ABC):
             elif re.search("g-recaptcha", driver.page_source):
                 self.resolve_recaptcha(
                     driver, checkbox, afterlogin_string or "")
-            return BeautifulSoup(driver.page_source, 'lxml')
-
-        resp = requests.get(url, headers=self.HEADERS, timeout=30)
+            self.wait_until_loaded(driver)
+            transferred = transferred_bytes(driver)
+            if transferred is not None:
+                logger.debug("Loaded %s in the browser, %d KiB transferred",
+                             url, transferred // 1024)
+            if store is not None and store.recording:
+                store.record_page(url, driver.page_source)
+            return self.make_soup(driver.page_source)
+
+        cache = get_page_cache()
+        headers = self.HEADERS
+        if cache is not None:
+            headers = {**self.HEADERS, **cache.conditional_headers(url)}
+        resp = get_session_pool().get(url, headers=headers, timeout=30)
+        if cache is not None:
+            if resp.status_code == 304:
+                body = cache.cached_body(url)
+                if body is not None:
+                    logger.debug("Page %s not modified, using cached copy", url)
+                    if store is not None and store.recording:
+                        store.record_page(url, body)
+                    return self.make_soup(body)
+                # the cached copy is gone, so the page is loaded in full
+                logger.debug("Page %s not modified, but not cached, fetching it again", url)
+                resp = get_session_pool().get(url, headers=self.HEADERS, timeout=30)
+            if resp.status_code == 200:
+                cache.store(url, resp)
         if resp.status_code not in (200, 405):
             user_agent = 'Unknown'
             if 'User-Agent' in self.HEADERS:
@@ -86,72 +143,66 @@ class Crawler(ABC):
             logger.error("Got response (%i): %s\n%s",
                          resp.status_code, resp.content, user_agent)
 
-        return BeautifulSoup(resp.content, 'lxml')
+        return self.make_soup(resp.content)
+
+    def wait_until_loaded(self, driver):
+        """Waits until a page loaded in the browser has rendered the listings.
+           Crawlers of sites that render their listings with JavaScript override this"""
 
     def get_soup_with_proxy(self, url) -> BeautifulSoup:
-        """Will try proxies until it's possible to crawl and return a soup"""
-        resolved = False
-        resp = None
-
-        # We will keep trying to fetch new proxies until one works
-        while not resolved:
-            proxies_list = proxies.get_proxies()
-            for proxy in proxies_list:
-                try:
-                    # Very low proxy read timeout, or it will get stuck on slow proxies
-                    resp = requests.get(
-                        url,
-                        headers=self.HEADERS,
-                        proxies={"http": proxy, "https": proxy},
-                        timeout=(20, 0.1)
-                    )
-
-                    if resp.status_code != 200:
-                        logger.error("Got response (%i): %s",
-                                     resp.status_code, resp.content)
-                    else:
-                        resolved = True
-                        break
-
-                except requests.exceptions.ConnectionError:
-                    logger.error(
-                        "Connection failed for proxy %s. Trying new proxy...", proxy)
-                except requests.exceptions.Timeout:
-                    logger.error(
-                        "Connection timed out for proxy %s. Trying new proxy...", proxy
-                    )
-                except requests.exceptions.RequestException:
-                    logger.error("Some error occurred. Trying new proxy...")
-
-        if not resp:
-            raise ProxyException(
-                "An error occurred while fetching proxies or content")
-
-        return BeautifulSoup(resp.content, 'lxml')
+        """Fetches the page through the best available proxy and returns a soup.
+           Raises a ProxyException if no proxy delivered it before the deadline"""
+        resp = proxies.get_proxy_pool().fetch(url, headers=self.HEADERS)
+        return self.make_soup(resp.content)
 
     def extract_data(self, raw_data):
         """Should be implemented in subclass"""
         raise NotImplementedError
 
     # pylint: disable=unused-argument
-    def get_results(self, search_url, max_pages=None):
-        """Loads the exposes from the site, starting at the provided URL"""
+    def get_results(self, search_url, max_pages=None, known_ids=None):
+        """Loads the exposes from the site, starting at the provided URL. Crawlers
+           that paginate stop at the first page that only holds 'known_ids'"""
         logger.debug("Got search URL %s", search_url)
 
         # load first page
         soup = self.get_page(search_url)
 
+        # skip parsing if the listings did not change since the last crawl
+        if self.listings_unchanged(search_url, soup):
+            return []
+
         # get data from first page
         entries = self.extract_data(soup)
         logger.debug('Number of found entries: %d', len(entries))
 
         return entries
 
-    def crawl(self, url, max_pages=None):
-        """Load as many exposes as possible from the provided URL"""
+    def listings_unchanged(self, url: str, soup: BeautifulSoup) -> bool:
+        """True if the listings of a fetched page are the same as at the last
+           crawl whose hunt was committed. The digest of a changed page is
+           recorded, to be committed by the hunt once its listings are processed"""
+        cache = get_page_cache()
+        if cache is None:
+            return False
+        digest = listing_digest(soup, self.LISTING_SELECTOR)
+        if digest is None:
+            return False
+        if cache.is_unchanged(url, digest):
+            logger.debug("Listings at %s unchanged since last crawl", url)
+            return True
+        cache.remember_digest(url, digest)
+        return False
+
+    def crawl(self, url, max_pages=None, known_ids=None):
+        """Load as many exposes as possible from the provided URL. If the IDs
+           seen at the last crawl are passed, only new exposes need to be loaded"""
         if re.search(self.URL_PATTERN, url):
             try:
-                return self.get_results(url, max_pages)
+                with get_domain_slots().hold(url):
+                    if known_ids is not None:
+                        return self.get_results(url, max_pages, known_ids=known_ids)
+                    return self.get_results(url, max_pages)
             except requests.exceptions.ConnectionError:
                 logger.warning(
                     "Connection to %s failed. Retrying.", url.split('/')[2])
@@ -1,5 +1,22 @@
 """Abstract class interface for message notifiers"""
 from abc import ABC, abstractmethod
+from typing import List, Optional
+
+DIGEST_SEPARATOR = "\n\n----\n\n"
+
+
+def digests(messages: List[str], max_length: Optional[int] = None) -> List[str]:
+    """Join messages into as few digests of at most `max_length` characters as
+       possible. A message longer than that is sent as a digest of its own"""
+    result: List[str] = []
+    for message in messages:
+        if result and (max_length is None or
+                       len(result[-1]) + len(DIGEST_SEPARATOR) + len(message) <= max_length):
+            result[-1] += DIGEST_SEPARATOR + message
+        else:
+            result.append(message)
+    return result
+
 
 class Notifier(ABC):
     """Notifier class interface definition"""
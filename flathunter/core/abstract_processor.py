@@ -1,5 +1,8 @@
 """Abstract class defining the 'Processor' interface"""
-from typing import Dict, Union
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Union
+
+from flathunter.utils.stream import ReadyIterator, is_ready, take_ready
 
 # Import domain model - but keep as optional for backward compatibility
 try:
@@ -12,10 +15,44 @@ class Processor:
     """Processor interface. Flathunter runs sequences of exposes through
        a set of processors that stack on each other"""
 
+    # Number of exposes `process_expose` may work on at once, when the chain
+    # runs as a pipeline. Processors that wait on the network raise this
+    concurrency = 1
+    # Most exposes handed to `process_batch` at once. A batch is handed over
+    # before it is full when the next expose is not there yet
+    batch_size = 50
+
     def process_expose(self, expose: ExposeType) -> ExposeType:
         """Mutate the expose. Should be implemented in the subclass"""
         return expose
 
+    def process_batch(self, exposes: List) -> List:
+        """Process a batch of exposes and return those to pass on. Processors
+           that save round trips by handling several exposes together (database
+           writes, API calls) override this"""
+        return [self.process_expose(expose) for expose in exposes]
+
+    def supports_batches(self) -> bool:
+        """True if the processor implements `process_batch`"""
+        return type(self).process_batch is not Processor.process_batch
+
     def process_exposes(self, exposes):
-        """Apply the processor to every expose in the sequence"""
-        return map(self.process_expose, exposes)
+        """Apply the processor to every expose in the sequence, in batches of up
+           to `batch_size` if the processor supports them"""
+        iterator = iter(exposes)
+        if not self.supports_batches():
+            return ReadyIterator(map(self.process_expose, iterator), lambda: is_ready(iterator))
+        return self._process_in_batches(iterator)
+
+    def _process_in_batches(self, iterator: Iterator) -> Iterator:
+        processed: Deque = deque()
+
+        def results():
+            batch = take_ready(iterator, self.batch_size)
+            while batch:
+                processed.extend(self.process_batch(batch))
+                while processed:
+                    yield processed.popleft()
+                batch = take_ready(iterator, self.batch_size)
+
+        return ReadyIterator(results(), lambda: bool(processed) or is_ready(iterator))
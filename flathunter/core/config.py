@@ -28,6 +28,7 @@ from flathunter.crawler.italy.subito import Subito
 # Spanish crawlers
 from flathunter.crawler.spain.idealista import Idealista
 from flathunter.processing.filter import Filter
+from flathunter.crawling.router import CrawlerRouter
 from flathunter.core.logging import logger
 from flathunter.core.exceptions import ConfigException
 
@@ -137,6 +138,7 @@ Location: {address}
             config = {}
         self.config = config
         self.__searchers__ = []
+        self.__router__ = None
         self.check_deprecated()
 
     def __iter__(self):
@@ -147,16 +149,21 @@ Location: {address}
         """Emulate dictionary"""
         return self.config[value]
 
-    def init_searchers(self):
-        """Initialize search plugins using factory pattern"""
+    def init_searchers(self, only_configured: bool = False):
+        """Initialize search plugins using factory pattern. With only_configured,
+           crawlers that handle none of the target URLs are not created at all"""
         try:
             from flathunter.config import get_default_crawler_factory
             crawler_factory = get_default_crawler_factory()
-            self.__searchers__ = crawler_factory.create_all(self)
+            if only_configured:
+                searchers = crawler_factory.create_for_urls(self.target_urls(), self)
+            else:
+                searchers = crawler_factory.create_all(self)
+            self.set_searchers(searchers)
         except ImportError:
             # Fallback to old hard-coded list if factory not available
             logger.warning("Could not import crawler factory, using legacy initialization")
-            self.__searchers__ = [
+            self.set_searchers([
                 Immobilienscout(self),
                 WgGesucht(self),
                 Kleinanzeigen(self),
@@ -167,7 +174,7 @@ Location: {address}
                 VrmImmo(self),
                 Zoopla(self),
                 Rightmove(self)
-            ]
+            ])
 
     def check_deprecated(self):
         """Notifies user of deprecated config items"""
@@ -207,11 +214,19 @@ Location: {address}
     def set_searchers(self, searchers):
         """Update the active search plugins"""
         self.__searchers__ = searchers
+        self.__router__ = None
 
     def searchers(self):
         """Get the list of search plugins"""
         return self.__searchers__
 
+    def crawler_for_url(self, url):
+        """Return the search plugin responsible for the URL, or None"""
+        if self.__router__ is None:
+            self.__router__ = CrawlerRouter(
+                (searcher.URL_PATTERN, searcher) for searcher in self.__searchers__)
+        return self.__router__.route(url)
+
     def get_filter(self):
         """Read the configured filter"""
         builder = Filter.builder()
@@ -312,6 +327,10 @@ Location: {address}
         """List of currently-active notifiers"""
         return self._read_yaml_path('notifiers', [])
 
+    def notification_digest(self) -> bool:
+        """True if the notifiers should describe a batch of exposes in one message"""
+        return _to_bool(self._read_yaml_path('notifications.digest', False))
+
     def telegram_bot_token(self) -> Optional[str]:
         """API Token to authenticate to the Telegram bot"""
         return self._read_yaml_path('telegram.bot_token', None)
@@ -387,10 +406,214 @@ Location: {address}
         """The list of driver arguments for Selenium / Webdriver"""
         return self._read_yaml_path('captcha.driver_arguments', [])
 
+    def webdriver_pool_size(self) -> int:
+        """Number of browsers shared by the webdriver crawlers"""
+        return int(self._read_yaml_path('webdriver.pool_size', 1))
+
+    def webdriver_max_pages(self) -> int:
+        """Pages after which a browser is replaced (0 = never)"""
+        return int(self._read_yaml_path('webdriver.max_pages', 200))
+
+    def webdriver_max_rss_mb(self) -> int:
+        """Resident memory in MiB above which a browser is replaced (0 = no limit)"""
+        return int(self._read_yaml_path('webdriver.max_rss_mb', 0))
+
+    def webdriver_crawl_profile(self) -> bool:
+        """True if the browsers should skip images, media, fonts and trackers"""
+        return _to_bool(self._read_yaml_path('webdriver.crawl_profile', False))
+
     def use_proxy(self):
         """Check if proxy is configured"""
         return "use_proxy_list" in self.config and self.config["use_proxy_list"]
 
+    def proxy_list_ttl(self) -> int:
+        """Seconds the list of free proxies is cached for"""
+        return int(self._read_yaml_path('proxy.list_ttl', 600))
+
+    def proxy_fetch_deadline(self) -> int:
+        """Seconds after which a fetch through proxies is given up"""
+        return int(self._read_yaml_path('proxy.fetch_deadline', 120))
+
+    def proxy_probe_concurrency(self) -> int:
+        """Number of proxies probed at the same time"""
+        return int(self._read_yaml_path('proxy.probe_concurrency', 16))
+
+    def async_crawl_enabled(self) -> bool:
+        """True if the target URLs should be crawled concurrently"""
+        return _to_bool(self._read_yaml_path('crawl.async', False))
+
+    def incremental_crawl_enabled(self) -> bool:
+        """True if crawls should stop at listings already seen at the last crawl"""
+        return _to_bool(self._read_yaml_path('crawl.incremental', False))
+
+    def crawl_max_concurrency(self) -> int:
+        """Maximum number of pages crawled at the same time in async mode"""
+        return int(self._read_yaml_path('crawl.max_concurrency', 8))
+
+    def crawl_per_domain_concurrency(self) -> int:
+        """Maximum number of pages crawled at the same time per site"""
+        return int(self._read_yaml_path('crawl.per_domain_concurrency', 2))
+
+    def crawl_page_concurrency(self) -> int:
+        """Number of result pages of one search fetched at the same time"""
+        return int(self._read_yaml_path('crawl.page_concurrency', 4))
+
+    def rate_limit_requests_per_second(self) -> Optional[float]:
+        """Default number of fetches per second and site (None is unlimited)"""
+        rate = self._read_yaml_path('rate_limit.requests_per_second', None)
+        return float(rate) if rate is not None else None
+
+    def rate_limit_burst(self) -> float:
+        """Number of fetches a site may receive back-to-back before the limit applies"""
+        return float(self._read_yaml_path('rate_limit.burst', 1))
+
+    def rate_limit_jitter(self) -> float:
+        """Random extra delay, as a fraction of the interval between two fetches"""
+        return float(self._read_yaml_path('rate_limit.jitter', 0.0))
+
+    def rate_limit_domains(self) -> Dict[str, Dict]:
+        """Per-host overrides of 'requests_per_second' and 'burst'"""
+        return self._read_yaml_path('rate_limit.domains', {})
+
+    def http_pool_connections(self) -> int:
+        """Number of per-host connection pools kept by each pooled session"""
+        return int(self._read_yaml_path('http.pool_connections', 10))
+
+    def http_pool_maxsize(self) -> int:
+        """Maximum number of keep-alive connections kept open per host"""
+        return int(self._read_yaml_path('http.pool_maxsize', 10))
+
+    def http_dns_cache_ttl(self) -> int:
+        """Seconds to cache DNS lookups for (0 disables the cache)"""
+        return int(self._read_yaml_path('http.dns_cache_ttl', 0))
+
+    def http_warm_up(self) -> bool:
+        """True if connections should be opened before each crawl"""
+        return _to_bool(self._read_yaml_path('http.warm_up', False))
+
+    def page_cache_enabled(self) -> bool:
+        """True if fetched pages should be cached and revalidated"""
+        return _to_bool(self._read_yaml_path('page_cache.enabled', False))
+
+    def page_cache_directory(self) -> str:
+        """Folder in which cached pages are stored"""
+        return self._read_yaml_path('page_cache.directory',
+                                    os.path.join(self.database_location(), 'page_cache'))
+
+    def fixtures_mode(self) -> Optional[str]:
+        """'record' to save fetched pages as fixtures, 'replay' to answer
+           fetches from them, or None to use the network only"""
+        return self._read_yaml_path('fixtures.mode', None)
+
+    def fixtures_directory(self) -> str:
+        """Folder of the recorded fixtures"""
+        return self._read_yaml_path('fixtures.directory',
+                                    os.path.join(self.database_location(), 'fixtures'))
+
+    def processing_batch_size(self) -> Optional[int]:
+        """Number of exposes handed to processors that work on batches at once,
+           or None to keep the default of every processor"""
+        batch_size = self._read_yaml_path('processing.batch_size', None)
+        return int(batch_size) if batch_size is not None else None
+
+    def pipeline_enabled(self) -> bool:
+        """True if the processors should run concurrently as a pipeline"""
+        return _to_bool(self._read_yaml_path('pipeline.enabled', False))
+
+    def pipeline_queue_size(self) -> int:
+        """Number of exposes that may wait between two pipeline stages"""
+        return int(self._read_yaml_path('pipeline.queue_size', 100))
+
+    def pipeline_keep_order(self) -> bool:
+        """True if exposes should leave the pipeline in the order they were crawled"""
+        return _to_bool(self._read_yaml_path('pipeline.keep_order', True))
+
+    def pipeline_concurrency(self) -> Dict[str, int]:
+        """Number of workers per processor, by processor class name"""
+        return dict(self._read_yaml_path('pipeline.concurrency', {}) or {})
+
+    def run_report_enabled(self) -> bool:
+        """True if every hunt should measure its stages and store a run report"""
+        return _to_bool(self._read_yaml_path('run_report.enabled', True))
+
+    def dedup_enabled(self) -> bool:
+        """True if listings duplicating a recent listing should be dropped"""
+        return _to_bool(self._read_yaml_path('dedup.enabled', False))
+
+    def dedup_threshold(self) -> float:
+        """Smallest similarity of the addresses of duplicate listings"""
+        return float(self._read_yaml_path('dedup.threshold', 0.5))
+
+    def dedup_price_tolerance(self) -> float:
+        """Largest difference in price of duplicate listings, as a share of the price"""
+        return float(self._read_yaml_path('dedup.price_tolerance', 0.05))
+
+    def dedup_window_days(self) -> float:
+        """Number of days that listings are checked for duplicates"""
+        return float(self._read_yaml_path('dedup.window_days', 30))
+
+    def image_dedup_enabled(self) -> bool:
+        """True if listings re-posting the photo of a recent listing should be detected"""
+        return _to_bool(self._read_yaml_path('image_dedup.enabled', False))
+
+    def image_dedup_action(self) -> str:
+        """'drop' to drop re-posted listings, 'link' to pass them on marked"""
+        action = str(self._read_yaml_path('image_dedup.action', 'drop'))
+        if action not in ('drop', 'link'):
+            raise ConfigException(
+                f"Unknown image_dedup action '{action}', expected 'drop' or 'link'")
+        return action
+
+    def image_dedup_max_distance(self) -> int:
+        """Largest number of bits in which the hashes of the same photo differ"""
+        return int(self._read_yaml_path('image_dedup.max_distance', 6))
+
+    def image_dedup_window_days(self) -> float:
+        """Number of days that photos are checked for re-posts"""
+        return float(self._read_yaml_path('image_dedup.window_days', 90))
+
+    def image_dedup_workers(self) -> int:
+        """Number of thumbnails downloaded at once"""
+        return int(self._read_yaml_path('image_dedup.workers', 8))
+
+    def image_dedup_timeout(self) -> float:
+        """Seconds to wait for a thumbnail"""
+        return float(self._read_yaml_path('image_dedup.timeout', 10))
+
+    def image_dedup_database(self) -> str:
+        """SQLite database of the hashes of thumbnails"""
+        return self._read_yaml_path('image_dedup.database',
+                                    os.path.join(self.database_location(), 'image_hashes.db'))
+
+    def duration_cache_enabled(self) -> bool:
+        """True if travel durations should be cached"""
+        return _to_bool(self._read_yaml_path('duration_cache.enabled', True))
+
+    def duration_cache_ttl_days(self) -> float:
+        """Number of days that a cached travel duration is used for"""
+        return float(self._read_yaml_path('duration_cache.ttl_days', 30))
+
+    def duration_cache_size(self) -> int:
+        """Number of travel durations kept in memory"""
+        return int(self._read_yaml_path('duration_cache.size', 10000))
+
+    def duration_cache_database(self) -> str:
+        """SQLite database of the cached travel durations"""
+        return self._read_yaml_path('duration_cache.database',
+                                    os.path.join(self.database_location(), 'durations.db'))
+
+    def seen_index_mode(self) -> str:
+        """'off' to look every ID up in the database, or, for a single process
+           writing to the database, 'memory' to keep the processed IDs in memory
+           or 'bloom' to keep a Bloom filter of them"""
+        mode = self._read_yaml_path('seen_index.mode', 'off')
+        # YAML reads an unquoted 'off' as false
+        return 'off' if mode is False else str(mode)
+
+    def seen_index_error_rate(self) -> float:
+        """False positive rate of the Bloom filter in 'bloom' mode"""
+        return float(self._read_yaml_path('seen_index.error_rate', 0.01))
+
     def set_keys(self, dict_keys: Dict[str, Any]):
         """Update the config keys based on the content of the dictionary passed"""
         self.config.update(dict_keys)
@@ -34,6 +34,11 @@ class ProxyException(ValueException):
     Exception loading the proxy configuration
     """
 
+class FixtureMissingException(ValueException):
+    """
+    No response was recorded for a request replayed from the fixture store
+    """
+
 class ConfigException(ValueException):
     """
     Exception indicating a problem with the configuration
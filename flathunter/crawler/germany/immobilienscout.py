@@ -5,6 +5,7 @@ from urllib.parse import urlencode, urlparse, parse_qs
 import requests
 
 from flathunter.core.abstract_crawler import Crawler
+from flathunter.crawling.http_session import get_session_pool
 from flathunter.core.logging import logger
 from flathunter.schemas.immobilienscout import ImmoscoutQuery
 
@@ -14,6 +15,7 @@ class Immobilienscout(Crawler):
     """Implementation of Crawler interface for ImmobilienScout"""
 
     URL_PATTERN = STATIC_URL_PATTERN
+    NUMBER_LOCALE = 'eu'
 
     HEADERS = {
         "Connection": "keep-alive",
@@ -82,7 +84,7 @@ class Immobilienscout(Crawler):
             "supportedResultListType": [],
             "userData": {}
         }
-        response = requests.post(
+        response = get_session_pool().post(
             search_url.format(page_no),
             headers=self.HEADERS,
             json=data,
@@ -129,8 +131,10 @@ class Immobilienscout(Crawler):
         logger.debug('Number of entries found: %d', len(entries))
         return entries
 
-    def get_results(self, search_url: str, max_pages: int | None = None) -> list:
-        """Fetches the exposes from the ImmoScout mobile API, starting at the provided URL"""
+    def get_results(self, search_url: str, max_pages: int | None = None,
+                    known_ids: set | None = None) -> list:
+        """Fetches the exposes from the ImmoScout mobile API, starting at the provided URL.
+           Stops paginating at the first page that only holds 'known_ids'"""
         query = self.get_immoscout_query(search_url)
         api_url = self.compose_api_url(query)
         if '&pagenumber' in api_url:
@@ -146,10 +150,14 @@ class Immobilienscout(Crawler):
 
         # get data from first page
         entries = self.extract_data(listings)
+        cur_entries = entries
 
         # iterate over all remaining pages
         while len(entries) < min(no_of_results, self.RESULT_LIMIT) and \
                 (max_pages is None or page_no < max_pages):
+            if known_ids is not None and all(e['id'] in known_ids for e in cur_entries):
+                logger.debug('Page %d only holds known exposes, stopping', page_no)
+                break
             logger.debug(
                 '(Next page) Number of entries: %d / Number of results: %d',
                 len(entries), no_of_results)
@@ -131,3 +131,29 @@ def test_extract_data_from_response(crawler):
     assert entries
     for entry in entries:
         assert required_keys == entry.keys()
+
+class FakeResponse:
+
+    def __init__(self, ids, total):
+        self.ids = ids
+        self.total = total
+
+    def json(self):
+        return {
+            "totalResults": self.total,
+            "resultListItems": [{"type": "EXPOSE_RESULT", "item": {
+                "id": str(expose_id), "title": "Flat", "attributes": [{"value": "500\xa0€"}]
+            }} for expose_id in self.ids]
+        }
+
+def test_pagination_stops_at_known_exposes(crawler, monkeypatch):
+    pages = {1: [10, 9], 2: [8, 7], 3: [6, 5], 4: [4, 3]}
+    requested = []
+    def fetch_api_data(api_url, page_no=1):
+        requested.append(page_no)
+        return FakeResponse(pages[page_no], 8)
+    monkeypatch.setattr(crawler, "RESULT_LIMIT", 8)
+    monkeypatch.setattr(crawler, "fetch_api_data", fetch_api_data)
+    entries = crawler.get_results(crawler.config.target_urls()[0], known_ids={8, 7, 6, 5})
+    assert requested == [1, 2]
+    assert [entry["id"] for entry in entries] == [10, 9, 8, 7]
@@ -13,6 +13,7 @@ class VrmImmo(Crawler):
 
     BASE_URL = "https://vrm-immo.de"
     URL_PATTERN = re.compile(r'https://vrm-immo\.de')
+    NUMBER_LOCALE = 'eu'
 
     def __init__(self, config):
         super().__init__(config)
@@ -2,11 +2,12 @@
 import re
 from typing import Optional, List, Dict, Any, Union
 
-import requests
 from bs4 import BeautifulSoup, Tag
 
 from flathunter.core.logging import logger
 from flathunter.core.abstract_crawler import Crawler
+from flathunter.crawling.http_session import get_session_pool
+from flathunter.crawling.rate_limiter import get_rate_limiter
 
 
 def get_title(title_row: Tag) -> str:
@@ -177,6 +178,7 @@ class WgGesucht(Crawler):
     """Implementation of Crawler interface for WgGesucht"""
 
     URL_PATTERN = re.compile(r'https://www\.wg-gesucht\.de')
+    NUMBER_LOCALE = 'eu'
 
     def __init__(self, config):
         super().__init__(config)
@@ -228,11 +230,15 @@ class WgGesucht(Crawler):
         necessary as we need to reload the page once for all filters to
         be applied correctly on wg-gesucht.
         """
-        sess = requests.session()
-        # First page load to set filters; response is discarded
-        sess.get(url, headers=self.HEADERS)
+        pool = get_session_pool()
+        # Every search gets its own cookies, so that the filters set by one
+        # search do not leak into another, while the connections stay pooled
+        session = pool.fresh_session(url)
+        # First page load to set filters; response is discarded. The session
+        # keeps the cookies for the second load
+        pool.get(url, session=session, headers=self.HEADERS)
         # Second page load
-        resp = sess.get(url, headers=self.HEADERS)
+        resp = pool.get(url, session=session, headers=self.HEADERS)
 
         if resp.status_code not in (200, 405):
             logger.error("Got response (%i): %s",
@@ -240,6 +246,7 @@ class WgGesucht(Crawler):
         if self.config.use_proxy():
             return self.get_soup_with_proxy(url)
         if driver is not None:
+            get_rate_limiter().acquire(url)
             driver.get(url)
             if re.search("initGeetest", driver.page_source):
                 self.resolve_geetest(driver)
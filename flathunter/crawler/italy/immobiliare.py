@@ -9,6 +9,7 @@ class Immobiliare(Crawler):
     """Implementation of Crawler interface for Immobiliare"""
 
     URL_PATTERN = re.compile(r'https://www\.immobiliare\.it')
+    NUMBER_LOCALE = 'eu'
 
     def __init__(self, config):
         super().__init__(config)
@@ -9,6 +9,7 @@ class Subito(Crawler):
     """Implementation of Crawler interface for Subito"""
 
     URL_PATTERN = re.compile(r'https://www\.subito\.it')
+    NUMBER_LOCALE = 'eu'
 
     def __init__(self, config):
         super().__init__(config)
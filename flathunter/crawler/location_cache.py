@@ -3,9 +3,9 @@ import json
 import os
 from datetime import datetime, timedelta
 from typing import Optional
-import requests
 
 from flathunter.core.logging import logger
+from flathunter.crawling.http_session import get_session_pool
 
 CACHE_FILE = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
@@ -54,7 +54,7 @@ class RightmoveLocationCache:
         try:
             token_path = self._tokenize(area_name)
             url = f"{TYPEAHEAD_BASE}/{token_path}/"
-            resp = requests.get(
+            resp = get_session_pool().get(
                 url,
                 timeout=10,
                 headers={"User-Agent": "Mozilla/5.0"}
@@ -8,6 +8,7 @@ class Idealista(Crawler):
     """Implementation of Crawler interface for Idealista"""
 
     URL_PATTERN = re.compile(r'https://www\.idealista\.it')
+    NUMBER_LOCALE = 'eu'
 
     def __init__(self, config):
         super().__init__(config)
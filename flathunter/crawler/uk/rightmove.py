@@ -1,36 +1,328 @@
 """Expose crawler for Rightmove (UK)"""
+import json
 import re
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
 from bs4 import BeautifulSoup, Tag
+from bs4.filter import SoupStrainer
 
 from flathunter.core.logging import logger
 from flathunter.core.abstract_crawler import Crawler
+from flathunter.crawling.domain_slots import get_domain_slots
+
+# The search results are embedded as the Next.js page model
+MODEL_ID = '__NEXT_DATA__'
+
+# Rightmove uses class "PropertyCard_propertyCardContainerWrapper" for top-level cards
+CARD_CLASS = re.compile(r'PropertyCard_propertyCardContainerWrapper')
+LEGACY_CARD_CLASS = re.compile(r'propertyCard', re.I)
+CARD_ID = re.compile(r'property-\d+', re.I)
+
+LINK_CLASS = re.compile(r'propertyCard.*link', re.I)
+PROPERTIES_HREF = re.compile(r'/properties/')
+TITLE_CLASS = re.compile(r'propertyCard.*title', re.I)
+PRICE_CLASS = re.compile(r'propertyCard.*price', re.I)
+ADDRESS_CLASS = re.compile(r'propertyCard.*address', re.I)
+BEDROOMS_CLASS = re.compile(r'bedroomsCount', re.I)
+DETAILS_CLASS = re.compile(r'propertyCard.*details', re.I)
+IMAGE_CLASS = re.compile(r'propertyCard.*img', re.I)
+
+PRICE_TEXT = re.compile(r'£[\d,]+\s*(pcm|per month|pw)?', re.I)
+BEDROOMS_TEXT = re.compile(r'(\d+)\s*bed', re.I)
+SIZE_TEXT = re.compile(r'(\d+[\d,]*)\s*sq\.?\s*(ft|m|metres|feet)', re.I)
+
+
+def _class_matches(tag: Tag, pattern: re.Pattern) -> bool:
+    """Match a class pattern the way BeautifulSoup's class_ filter does"""
+    classes = tag.get('class')
+    if not classes:
+        return False
+    if any(pattern.search(cls) for cls in classes):
+        return True
+    return len(classes) > 1 and pattern.search(' '.join(classes)) is not None
+
+
+class SearchPageStrainer(SoupStrainer):
+    """Keeps the page model and the property cards of a search page, by the same
+       patterns _extract_cards looks for cards with. Tags are matched on their
+       raw attributes, which is much cheaper than general SoupStrainer rules"""
+
+    @property
+    def includes_everything(self) -> bool:
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if not attrs:
+            return False
+        if name == 'script':
+            return attrs.get('id') == MODEL_ID
+        if name != 'div':
+            return False
+        classes = attrs.get('class')
+        if isinstance(classes, str) and (CARD_CLASS.search(classes)
+                                         or LEGACY_CARD_CLASS.search(classes)):
+            return True
+        element_id = attrs.get('id')
+        return isinstance(element_id, str) and CARD_ID.search(element_id) is not None
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+
+class CardElements:
+    """The elements of a property card that hold its details, collected in a
+       single walk over the card (the first match of each kind wins)"""
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, card: Tag):
+        self.link: Optional[Tag] = None
+        self.properties_link: Optional[Tag] = None
+        self.title: Optional[Tag] = None
+        self.headings: Dict[str, Tag] = {}
+        self.price: Optional[Tag] = None
+        self.address_by_class: Optional[Tag] = None
+        self.address_tag: Optional[Tag] = None
+        self.address_itemprop: Optional[Tag] = None
+        self.bedrooms: Optional[Tag] = None
+        self.details: Optional[Tag] = None
+        self.image_by_class: Optional[Tag] = None
+        self.image: Optional[Tag] = None
+        self._card = card
+        self._text: Optional[str] = None
+        for element in card.descendants:
+            if isinstance(element, Tag):
+                self._visit(element)
+
+    # pylint: disable=too-many-branches
+    def _visit(self, element: Tag):
+        name = element.name
+        if name == 'a':
+            if self.link is None and _class_matches(element, LINK_CLASS):
+                self.link = element
+            if self.properties_link is None:
+                href = element.get('href')
+                if isinstance(href, str) and PROPERTIES_HREF.search(href):
+                    self.properties_link = element
+        elif name in ('h2', 'h3', 'h4') and name not in self.headings:
+            self.headings[name] = element
+        elif name == 'address' and self.address_tag is None:
+            self.address_tag = element
+        elif name == 'span' and self.bedrooms is None \
+                and _class_matches(element, BEDROOMS_CLASS):
+            self.bedrooms = element
+        elif name == 'img':
+            if self.image is None:
+                self.image = element
+            if self.image_by_class is None and _class_matches(element, IMAGE_CLASS):
+                self.image_by_class = element
+        if self.address_itemprop is None and element.get('itemprop') == 'address':
+            self.address_itemprop = element
+        if element.get('class'):
+            if self.title is None and _class_matches(element, TITLE_CLASS):
+                self.title = element
+            if self.price is None and _class_matches(element, PRICE_CLASS):
+                self.price = element
+            if self.address_by_class is None and _class_matches(element, ADDRESS_CLASS):
+                self.address_by_class = element
+            if self.details is None and _class_matches(element, DETAILS_CLASS):
+                self.details = element
+
+    @property
+    def text(self) -> str:
+        """Full text of the card, computed once"""
+        if self._text is None:
+            self._text = self._card.get_text()
+        return self._text
 
 
 class Rightmove(Crawler):
     """Implementation of Crawler interface for Rightmove"""
 
     URL_PATTERN = re.compile(r'https://www\.rightmove\.co\.uk')
+    NUMBER_LOCALE = 'uk'
+
+    LISTING_SELECTOR = 'div[class*="PropertyCard_propertyCardContainerWrapper"]'
+
+    # Only the page model and the property cards of a search page are parsed
+    PARSE_ONLY = SearchPageStrainer()
 
     def __init__(self, config):
         super().__init__(config)
         self.config = config
 
+    def get_results(self, search_url, max_pages=None, known_ids=None):
+        """Loads the exposes of all result pages of a search. The number of
+           pages is read from the first page, the others are fetched concurrently
+           while the site has free slots.
+           Pages whose listings did not change since the last crawl are skipped"""
+        logger.debug("Got search URL %s", search_url)
+        soup = self.get_page(search_url)
+
+        # the pagination is read even if the listings of the first page did not change
+        model = self._extract_search_results(soup)
+        entries = [] if self.listings_unchanged(search_url, soup) \
+            else self._entries_from(soup, model)
+        logger.debug('Number of found entries: %d', len(entries))
+
+        if known_ids is not None and all(e['id'] in known_ids for e in entries):
+            logger.debug('First page only holds known exposes, stopping')
+            return entries
+
+        page_urls = self._other_page_urls(search_url, model)
+        if max_pages is not None:
+            page_urls = page_urls[:max(0, max_pages - 1)]
+        if not page_urls:
+            return entries
+
+        logger.debug('Fetching %d more result pages', len(page_urls))
+        wanted = min(len(page_urls), max(1, self.config.crawl_page_concurrency()))
+        # the crawl holds one slot of the site, the other workers need free ones
+        with get_domain_slots().extra(search_url, wanted - 1) as extra:
+            with ThreadPoolExecutor(max_workers=1 + extra,
+                                    thread_name_prefix="rightmove-page") as executor:
+                for page_entries in executor.map(self._get_page_entries, page_urls):
+                    entries.extend(page_entries)
+
+        # a listing can move to the next page while the pages are fetched
+        seen = set()
+        unique = []
+        for entry in entries:
+            if entry['id'] not in seen:
+                seen.add(entry['id'])
+                unique.append(entry)
+        return unique
+
+    def _get_page_entries(self, page_url: str) -> List[Dict]:
+        """Fetches and extracts one further result page. A page that cannot be
+           fetched is left out, so that it does not cost the pages around it"""
+        try:
+            soup = self.get_page(page_url)
+        except requests.exceptions.RequestException as error:
+            logger.warning("Could not fetch result page %s: %s", page_url, error)
+            return []
+        if self.listings_unchanged(page_url, soup):
+            return []
+        return self.extract_data(soup)
+
+    @staticmethod
+    def _other_page_urls(search_url: str, model: Optional[Dict]) -> List[str]:
+        """URLs of the result pages after the one at search_url, from the
+           pagination options of the page model"""
+        if model is None:
+            return []
+        options = (model.get('pagination') or {}).get('options') or []
+        parts = urlsplit(search_url)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        current = query.get('index', '0')
+        current_index = int(current) if current.isdigit() else 0
+        urls = []
+        for option in options:
+            index = str(option.get('value', '')) if isinstance(option, dict) else ''
+            if not index.isdigit() or int(index) <= current_index:
+                continue
+            query['index'] = index
+            urls.append(urlunsplit(parts._replace(query=urlencode(query))))
+        return urls
+
     def extract_data(self, soup: BeautifulSoup) -> List[Dict]:
         """Extracts all property listings from a provided Soup object"""
+        return self._entries_from(soup, self._extract_search_results(soup))
+
+    def _entries_from(self, soup: BeautifulSoup, model: Optional[Dict]) -> List[Dict]:
+        """Extracts the listings from the page model, or from the property
+           cards if the page has no usable model"""
+        if model is not None:
+            entries = self._parse_search_results(model)
+            if entries is not None:
+                return entries
+            logger.debug('Page model holds no properties, parsing property cards')
+        return self._extract_cards(soup)
+
+    @staticmethod
+    def _extract_search_results(soup: BeautifulSoup) -> Optional[Dict]:
+        """The search results of the page model embedded in the page"""
+        script = soup.find('script', id=MODEL_ID)
+        if not isinstance(script, Tag):
+            return None
+        try:
+            model = json.loads(script.get_text())
+            results = model['props']['pageProps']['searchResults']
+        except (ValueError, KeyError, TypeError):
+            logger.warning('Could not read the Rightmove page model')
+            return None
+        return results if isinstance(results, dict) else None
+
+    def _parse_search_results(self, results: Dict) -> Optional[List[Dict]]:
+        """Converts the properties of the page model to exposes"""
+        properties = results.get('properties')
+        if not isinstance(properties, list):
+            return None
+        entries = []
+        for prop in properties:
+            details = self._parse_property(prop) if isinstance(prop, dict) else None
+            if details is not None:
+                entries.append(details)
+        logger.debug('Number of valid entries found: %d', len(entries))
+        return entries
+
+    def _parse_property(self, prop: Dict[str, Any]) -> Optional[Dict]:
+        """Converts a property of the page model to an expose"""
+        property_id = prop.get('id')
+        url = prop.get('propertyUrl')
+        if not isinstance(property_id, int) or not isinstance(url, str):
+            logger.debug("No ID or URL found - skipping")
+            return None
+        if not url.startswith('http'):
+            url = f'https://www.rightmove.co.uk{url}'
+
+        prices = (prop.get('price') or {}).get('displayPrices') or [{}]
+        price = prices[0].get('displayPrice') or ''
+        title = prop.get('propertyTypeFullDescription') or ''
+        address = prop.get('displayAddress') or ''
+        if not title or not price or not address:
+            logger.debug("No title, price or address found - skipping")
+            return None
+
+        size = ''
+        for text in (prop.get('displaySize'), prop.get('summary')):
+            size_match = SIZE_TEXT.search(text or '')
+            if size_match:
+                size = f"{size_match.group(1)} {size_match.group(2)}"
+                break
+
+        bedrooms = prop.get('bedrooms')
+        image = (prop.get('propertyImages') or {}).get('mainImageSrc')
+        if isinstance(image, str) and image.startswith('//'):
+            image = f'https:{image}'
+
+        return {
+            'id': property_id,
+            'url': url,
+            'title': title,
+            'price': price,
+            'size': size,
+            'rooms': str(bedrooms) if bedrooms is not None else '',
+            'address': address,
+            'image': image or None,
+            'crawler': self.get_name()
+        }
+
+    def _extract_cards(self, soup: BeautifulSoup) -> List[Dict]:
+        """Extracts the listings from the property cards of a page"""
         entries = []
 
-        # Rightmove uses class "PropertyCard_propertyCardContainerWrapper" for top-level cards
-        # This is more specific and avoids matching nested elements
-        findings = soup.find_all('div', class_=re.compile(r'PropertyCard_propertyCardContainerWrapper'))
+        # Top-level cards are more specific and avoid matching nested elements
+        findings = soup.find_all('div', class_=CARD_CLASS)
 
         if not findings:
             # Fallback: try old pattern for backward compatibility
-            findings = soup.find_all('div', class_=re.compile(r'propertyCard', re.I))
+            findings = soup.find_all('div', class_=LEGACY_CARD_CLASS)
 
         if not findings:
             # Second fallback: try to find listings by common patterns
-            findings = soup.find_all('div', attrs={'id': re.compile(r'property-\d+', re.I)})
+            findings = soup.find_all('div', attrs={'id': CARD_ID})
 
         logger.debug('Found %d potential property cards', len(findings))
 
@@ -47,9 +339,10 @@ class Rightmove(Crawler):
 
     def _parse_property_card(self, card: Tag) -> Optional[Dict]:
         """Parse a property card element to extract details"""
+        elements = CardElements(card)
 
         # Extract URL and ID
-        url = self._extract_url(card)
+        url = self._extract_url(elements)
         if url is None:
             logger.debug("No URL found - skipping")
             return None
@@ -61,68 +354,55 @@ class Rightmove(Crawler):
             return None
 
         # Extract title
-        title = self._extract_title(card)
+        title = self._extract_title(elements)
         if not title:
             logger.debug("No title found - skipping")
             return None
 
         # Extract price
-        price = self._extract_price(card)
+        price = self._extract_price(elements)
         if not price:
             logger.debug("No price found - skipping")
             return None
 
         # Extract address
-        address = self._extract_address(card)
+        address = self._extract_address(elements)
         if not address:
             logger.debug("No address found - skipping")
             return None
 
-        # Extract rooms (bedrooms)
-        rooms = self._extract_rooms(card)
-
-        # Extract size (square feet/meters)
-        size = self._extract_size(card)
-
-        # Extract image
-        image = self._extract_image(card)
-
         details = {
             'id': property_id,
             'url': url,
             'title': title,
             'price': price,
-            'size': size,
-            'rooms': rooms,
+            'size': self._extract_size(elements),
+            'rooms': self._extract_rooms(elements),
             'address': address,
-            'image': image,
+            'image': self._extract_image(elements),
             'crawler': self.get_name()
         }
 
         return details
 
-    def _extract_url(self, card: Tag) -> Optional[str]:
-        """Extract property URL from card"""
-        # Look for link with class propertyCard-link or similar
-        link = card.find('a', class_=re.compile(r'propertyCard.*link', re.I))
-        if isinstance(link, Tag) and link.has_attr('href'):
-            href = link['href']
-            if isinstance(href, str):
-                # Ensure absolute URL
-                if href.startswith('http'):
-                    return href
-                return f'https://www.rightmove.co.uk{href}'
-
-        # Try any link that contains "properties"
-        link = card.find('a', href=re.compile(r'/properties/'))
-        if isinstance(link, Tag) and link.has_attr('href'):
-            href = link['href']
-            if isinstance(href, str):
-                if href.startswith('http'):
-                    return href
-                return f'https://www.rightmove.co.uk{href}'
+    @staticmethod
+    def _absolute_url(link: Optional[Tag]) -> Optional[str]:
+        """Absolute URL of a link element"""
+        if link is None:
+            return None
+        href = link.get('href')
+        if not isinstance(href, str):
+            return None
+        if href.startswith('http'):
+            return href
+        return f'https://www.rightmove.co.uk{href}'
 
-        return None
+    def _extract_url(self, elements: CardElements) -> Optional[str]:
+        """Extract property URL from card"""
+        # Look for link with class propertyCard-link or similar, else any
+        # link that contains "properties"
+        return self._absolute_url(elements.link) or \
+            self._absolute_url(elements.properties_link)
 
     def _extract_id(self, card: Tag, url: str) -> Optional[int]:
         """Extract property ID from card or URL"""
@@ -155,122 +435,97 @@ class Rightmove(Crawler):
 
         return None
 
-    def _extract_title(self, card: Tag) -> str:
+    def _extract_title(self, elements: CardElements) -> str:
         """Extract property title/description"""
         # Try propertyCard-title class
-        title_elem = card.find(class_=re.compile(r'propertyCard.*title', re.I))
-        if isinstance(title_elem, Tag):
-            return title_elem.get_text(strip=True)
+        if elements.title is not None:
+            return elements.title.get_text(strip=True)
 
         # Try heading tags
         for tag in ['h2', 'h3', 'h4']:
-            heading = card.find(tag)
-            if isinstance(heading, Tag):
+            heading = elements.headings.get(tag)
+            if heading is not None:
                 text = heading.get_text(strip=True)
                 if text and 'bedroom' in text.lower():
                     return text
 
         return ""
 
-    def _extract_price(self, card: Tag) -> str:
+    def _extract_price(self, elements: CardElements) -> str:
         """Extract rental price"""
         # Try propertyCard-priceValue class
-        price_elem = card.find(class_=re.compile(r'propertyCard.*price', re.I))
-        if isinstance(price_elem, Tag):
-            return price_elem.get_text(strip=True)
+        if elements.price is not None:
+            return elements.price.get_text(strip=True)
 
         # Try finding text with currency symbol
-        text = card.get_text()
-        price_match = re.search(r'£[\d,]+\s*(pcm|per month|pw)?', text, re.I)
+        price_match = PRICE_TEXT.search(elements.text)
         if price_match:
             return price_match.group(0)
 
         return ""
 
-    def _extract_address(self, card: Tag) -> str:
+    def _extract_address(self, elements: CardElements) -> str:
         """Extract property address"""
-        # Try propertyCard-address class
-        address_elem = card.find(class_=re.compile(r'propertyCard.*address', re.I))
-        if isinstance(address_elem, Tag):
-            return address_elem.get_text(strip=True)
-
-        # Try address tag
-        address_elem = card.find('address')
-        if isinstance(address_elem, Tag):
-            return address_elem.get_text(strip=True)
-
-        # Try meta itemprop="address"
-        address_elem = card.find(attrs={'itemprop': 'address'})
-        if isinstance(address_elem, Tag):
-            return address_elem.get_text(strip=True)
+        # Try propertyCard-address class, the address tag and meta itemprop="address"
+        for address_elem in (elements.address_by_class, elements.address_tag,
+                             elements.address_itemprop):
+            if address_elem is not None:
+                return address_elem.get_text(strip=True)
 
         return ""
 
-    def _extract_rooms(self, card: Tag) -> str:
+    def _extract_rooms(self, elements: CardElements) -> str:
         """Extract number of bedrooms"""
         # Try to find the bedroom count span (Rightmove's specific class)
-        bedroom_span = card.find('span', class_=re.compile(r'bedroomsCount', re.I))
-        if isinstance(bedroom_span, Tag):
-            bedroom_text = bedroom_span.get_text(strip=True)
+        if elements.bedrooms is not None:
+            bedroom_text = elements.bedrooms.get_text(strip=True)
             if bedroom_text.isdigit():
                 return bedroom_text
 
         # Try propertyCard-details or similar
-        details_elem = card.find(class_=re.compile(r'propertyCard.*details', re.I))
-        if isinstance(details_elem, Tag):
-            text = details_elem.get_text()
-            bedroom_match = re.search(r'(\d+)\s*bed', text, re.I)
+        if elements.details is not None:
+            bedroom_match = BEDROOMS_TEXT.search(elements.details.get_text())
             if bedroom_match:
                 return bedroom_match.group(1)
 
         # Look in the full card text
-        text = card.get_text()
-        bedroom_match = re.search(r'(\d+)\s*bed', text, re.I)
+        bedroom_match = BEDROOMS_TEXT.search(elements.text)
         if bedroom_match:
             return bedroom_match.group(1)
 
         return ""
 
-    def _extract_size(self, card: Tag) -> str:
+    def _extract_size(self, elements: CardElements) -> str:
         """Extract property size in square feet or meters"""
-        text = card.get_text()
-
         # Try to match patterns like "850 sq ft", "79 sq m", etc.
-        size_match = re.search(r'(\d+[\d,]*)\s*sq\.?\s*(ft|m|metres|feet)', text, re.I)
+        size_match = SIZE_TEXT.search(elements.text)
         if size_match:
             return f"{size_match.group(1)} {size_match.group(2)}"
 
         return ""
 
-    def _extract_image(self, card: Tag) -> Optional[str]:
+    @staticmethod
+    def _image_source(img: Tag, attribute: str) -> Optional[str]:
+        """Absolute image URL from an attribute of an img element"""
+        src = img.get(attribute)
+        if isinstance(src, str) and ('http' in src or src.startswith('//')):
+            if src.startswith('//'):
+                return f'https:{src}'
+            return src
+        return None
+
+    def _extract_image(self, elements: CardElements) -> Optional[str]:
         """Extract main property image URL"""
-        # Try to find img tag with propertyCard-img class
-        img = card.find('img', class_=re.compile(r'propertyCard.*img', re.I))
-        if isinstance(img, Tag):
-            # Try src attribute
-            if img.has_attr('src'):
-                src = img['src']
-                if isinstance(src, str) and ('http' in src or src.startswith('//')):
-                    if src.startswith('//'):
-                        return f'https:{src}'
-                    return src
-
-            # Try data-src (lazy loading)
-            if img.has_attr('data-src'):
-                data_src = img['data-src']
-                if isinstance(data_src, str) and ('http' in data_src or data_src.startswith('//')):
-                    if data_src.startswith('//'):
-                        return f'https:{data_src}'
-                    return data_src
+        # Try to find img tag with propertyCard-img class, with src or
+        # data-src (lazy loading) attribute
+        if elements.image_by_class is not None:
+            image = self._image_source(elements.image_by_class, 'src') or \
+                self._image_source(elements.image_by_class, 'data-src')
+            if image is not None:
+                return image
 
         # Try any img tag in the card
-        img = card.find('img')
-        if isinstance(img, Tag):
-            if img.has_attr('src'):
-                src = img['src']
-                if isinstance(src, str) and ('http' in src or src.startswith('//')):
-                    if src.startswith('//'):
-                        return f'https:{src}'
-                    return src
+        if elements.image is not None:
+            return self._image_source(elements.image, 'src')
 
         return None
@@ -1,7 +1,18 @@
 # pylint: disable=missing-docstring
+import json
+import os
+import re
+import threading
+import time
+
 import pytest
+import requests
+from bs4 import BeautifulSoup
 
 from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.crawling import domain_slots, page_cache
+from flathunter.crawling.domain_slots import DomainSlots
+from flathunter.crawling.page_cache import PageCache
 from flathunter.testing.config import StringConfig
 
 DUMMY_CONFIG = """
@@ -11,6 +22,11 @@ urls:
 
 TEST_URL = 'https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=REGION%5E93917&minBedrooms=2&maxPrice=2000&propertyTypes=&includeLetAgreed=false&mustHave=&dontShow=&furnishTypes=&keywords='
 
+# Search pages modelled on the markup of Rightmove, with made-up listings: one with
+# the page model, and the same page without it, read from the property cards
+FIXTURES = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir,
+                        "testing", "fixtures")
+
 @pytest.fixture
 def crawler():
     return Rightmove(StringConfig(string=DUMMY_CONFIG))
@@ -117,3 +133,144 @@ def test_property_type_in_title(crawler):
     title_lower = entry['title'].lower()
     assert any(word in title_lower for word in ['flat', 'house', 'apartment', 'bedroom']), \
         "Title should contain property type or bedroom information"
+
+@pytest.mark.parametrize("fixture_name,card_ids", [("rightmove-search.html", True),
+                                                    ("rightmove-search-cards.html", True),
+                                                    ("rightmove-search-cards.html", False)])
+def test_restricted_parse_matches_full_parse(crawler, fixture_name, card_ids):
+    """Test that parsing only the page model and property cards yields the same
+    entries as the whole page, with and without a page model, and for cards that
+    are only recognised by their class"""
+    with open(os.path.join(FIXTURES, fixture_name), encoding="utf-8") as fixture:
+        html = fixture.read()
+    if not card_ids:
+        html = re.sub(r' id="property-\d+"', '', html)
+    full = crawler.extract_data(BeautifulSoup(html, 'lxml'))
+    restricted = crawler.extract_data(crawler.make_soup(html))
+    assert len(full) > 5
+    assert restricted == full
+
+def test_restricted_parse_falls_back_to_full_page(crawler):
+    """Test that pages without any known property cards are still parsed in full"""
+    html = '<html><body><ul><li class="result"><a href="/properties/123">x</a></li></ul>' \
+           '</body></html>'
+    soup = crawler.make_soup(html)
+    assert soup.find('li', class_='result') is not None
+
+def test_extract_data_reads_page_model(crawler):
+    """Test that listings are read from the embedded page model"""
+    with open(os.path.join(FIXTURES, "rightmove-search.html"), encoding="utf-8") as fixture:
+        soup = crawler.make_soup(fixture.read())
+    entries = crawler.extract_data(soup)
+    assert len(entries) == 24
+    entry = entries[0]
+    assert entry['id'] == 156780000
+    assert entry['url'] == 'https://www.rightmove.co.uk/properties/156780000#/?channel=RES_LET'
+    assert entry['title'] == '2 bedroom flat for rent'
+    assert entry['price'] == '£1,675 pcm'
+    assert entry['size'] == '1,158 ft'
+    assert entry['rooms'] == '2'
+    assert entry['address'] == 'Mare Street, London, E8'
+    assert entry['image'].startswith('https://media.rightmove.co.uk/')
+
+def search_page(ids, pages=3):
+    properties = [{
+        'id': property_id,
+        'propertyUrl': f'/properties/{property_id}',
+        'propertyTypeFullDescription': '2 bedroom flat for rent',
+        'price': {'displayPrices': [{'displayPrice': '£1,500 pcm'}]},
+        'displayAddress': 'Mare Street, London, E8',
+        'bedrooms': 2,
+    } for property_id in ids]
+    pagination = {'options': [{'value': str(24 * page)} for page in range(pages)]}
+    model = {'props': {'pageProps': {'searchResults': {
+        'properties': properties, 'pagination': pagination}}}}
+    cards = ''.join(f'<div id="property-{property_id}" '
+                    f'class="PropertyCard_propertyCardContainerWrapper__a">{property_id}</div>'
+                    for property_id in ids)
+    script = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(model)}</script>'
+    return f'<html><body>{script}{cards}</body></html>'
+
+def test_get_results_fetches_all_pages(crawler, requests_mock):
+    """Test that the result pages listed in the page model are all fetched"""
+    requests_mock.get(TEST_URL, text=search_page([1, 2]))
+    requests_mock.get(TEST_URL + '&index=24', text=search_page([3, 4]))
+    requests_mock.get(TEST_URL + '&index=48', text=search_page([4, 5]))
+    entries = crawler.get_results(TEST_URL)
+    assert [entry['id'] for entry in entries] == [1, 2, 3, 4, 5]
+
+def test_failed_page_only_costs_that_page(crawler, requests_mock):
+    """Test that a result page that cannot be fetched does not drop the others"""
+    requests_mock.get(TEST_URL, text=search_page([1, 2]))
+    requests_mock.get(TEST_URL + '&index=24', exc=requests.exceptions.ConnectionError)
+    requests_mock.get(TEST_URL + '&index=48', text=search_page([5, 6]))
+    entries = crawler.crawl(TEST_URL)
+    assert [entry['id'] for entry in entries] == [1, 2, 5, 6]
+
+def test_get_results_respects_max_pages(crawler, requests_mock):
+    """Test that no more than max_pages result pages are fetched"""
+    requests_mock.get(TEST_URL, text=search_page([1, 2]))
+    requests_mock.get(TEST_URL + '&index=24', text=search_page([3, 4]))
+    entries = crawler.get_results(TEST_URL, max_pages=2)
+    assert [entry['id'] for entry in entries] == [1, 2, 3, 4]
+    assert requests_mock.call_count == 2
+
+def test_get_results_stops_at_known_first_page(crawler, requests_mock):
+    """Test that further pages are not fetched if the first only holds known listings"""
+    requests_mock.get(TEST_URL, text=search_page([1, 2]))
+    entries = crawler.get_results(TEST_URL, known_ids={1, 2})
+    assert [entry['id'] for entry in entries] == [1, 2]
+    assert requests_mock.call_count == 1
+
+def test_get_results_skips_unchanged_pages(crawler, requests_mock, tmp_path):
+    """Test that every result page is skipped or parsed by its own listings, and
+       that digests only count once committed"""
+    page_cache._CACHE = PageCache(str(tmp_path))  # pylint: disable=protected-access
+    try:
+        requests_mock.get(TEST_URL, text=search_page([1, 2]))
+        requests_mock.get(TEST_URL + '&index=24', text=search_page([3, 4]))
+        requests_mock.get(TEST_URL + '&index=48', text=search_page([5, 6]))
+        assert len(crawler.get_results(TEST_URL)) == 6
+        # not committed: the hunt of the first crawl did not finish
+        assert len(crawler.get_results(TEST_URL)) == 6
+        page_cache._CACHE.commit_digests()  # pylint: disable=protected-access
+        requests_mock.get(TEST_URL + '&index=48', text=search_page([5, 7]))
+        entries = crawler.get_results(TEST_URL)
+        assert [entry['id'] for entry in entries] == [5, 7]
+    finally:
+        page_cache._CACHE = None  # pylint: disable=protected-access
+
+def test_page_workers_stay_within_the_per_domain_cap(crawler, requests_mock):
+    """Test that the pages of a search are only fetched concurrently while the
+       site has free slots"""
+    running = []
+    most = []
+    lock = threading.Lock()
+    get_page_entries = crawler._get_page_entries  # pylint: disable=protected-access
+
+    def counting(page_url):
+        with lock:
+            running.append(page_url)
+            most.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(page_url)
+        return get_page_entries(page_url)
+
+    crawler._get_page_entries = counting  # pylint: disable=protected-access
+    requests_mock.get(TEST_URL, text=search_page([1], pages=6))
+    for index in range(1, 6):
+        requests_mock.get(TEST_URL + f'&index={24 * index}', text=search_page([index + 1]))
+    slots = DomainSlots(per_domain=2)
+    domain_slots._SLOTS = slots  # pylint: disable=protected-access
+    try:
+        assert len(crawler.crawl(TEST_URL)) == 6
+        assert max(most) == 2
+        most.clear()
+        # another search of the site takes the second slot
+        with slots.hold(TEST_URL):
+            assert len(crawler.crawl(TEST_URL)) == 6
+        assert max(most) == 1
+        assert slots.in_use(TEST_URL) == 0
+    finally:
+        domain_slots._SLOTS = None  # pylint: disable=protected-access
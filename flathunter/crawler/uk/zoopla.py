@@ -1,39 +1,50 @@
 """Expose crawler for Zoopla (UK)"""
 import re
-import time
 import json
 from typing import Optional, List, Dict
 from bs4 import BeautifulSoup, Tag
+from bs4.filter import SoupStrainer
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
 
 from flathunter.core.logging import logger
 from flathunter.crawling.webdriver_crawler import WebdriverCrawler
 
+# True once the JSON-LD search results have been rendered into the page
+SEARCH_RESULTS_PRESENT = """
+return Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+    .some(script => script.textContent.includes('SearchResultsPage'));
+"""
+
 
 class Zoopla(WebdriverCrawler):
     """Implementation of Crawler interface for Zoopla"""
 
     URL_PATTERN = re.compile(r'https://www\.zoopla\.co\.uk')
+    NUMBER_LOCALE = 'uk'
+
+    LISTING_SELECTOR = 'script[type="application/ld+json"]'
+
+    # Only the structured data and the addresses of a search page are parsed
+    PARSE_ONLY = SoupStrainer(['script', 'address'])
+
+    # Seconds to wait for the search results to be rendered
+    PAGE_LOAD_TIMEOUT = 15
 
     def __init__(self, config):
         super().__init__(config)
         self.config = config
 
-    def get_page(self, search_url, driver=None, page_no=None) -> BeautifulSoup:
-        """Applies a page number to a formatted search URL and fetches the exposes at that page"""
-        driver = self.get_driver()
-        soup = self.get_soup_from_url(search_url, driver=driver)
-
-        # Wait for JavaScript to render property listings
-        # Zoopla uses heavy JavaScript, so we need to give it time
+    def wait_until_loaded(self, driver):
+        """Waits until Zoopla's JavaScript has rendered the JSON-LD search results"""
         logger.debug("Waiting for JavaScript to render property listings...")
-        time.sleep(3)
-
-        # Refresh the soup with updated page source
-        if driver:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(driver.page_source, 'lxml')
-
-        return soup
+        try:
+            WebDriverWait(driver, self.PAGE_LOAD_TIMEOUT, poll_frequency=0.2) \
+                .until(lambda d: d.execute_script(SEARCH_RESULTS_PRESENT))
+        except TimeoutException:
+            logger.warning("Search results not rendered after %d seconds, parsing page as is",
+                           self.PAGE_LOAD_TIMEOUT)
 
     def extract_data(self, soup: BeautifulSoup) -> List[Dict]:
         """Extracts all property listings from JSON-LD structured data"""
@@ -116,3 +116,48 @@ def test_price_format(crawler):
     entry = entries[0]
     assert '£' in entry['price'] or 'pcm' in entry['price'].lower(), \
         "Price should contain UK currency symbol or rental period"
+
+SEARCH_PAGE = """<html><head>
+<script>window.dataLayer = [];</script>
+<script type="application/ld+json">{"@graph": [{"@type": "SearchResultsPage", "mainEntity": {
+  "@type": "ItemList", "itemListElement": [{"item": {
+    "url": "https://www.zoopla.co.uk/to-rent/details/12345678/", "name": "2 bed flat to rent",
+    "image": "https://lid.zoocdn.com/12345678.jpg", "offers": {"price": 1800}}}]}}]}</script>
+</head><body><div class="listing"><address>Mare Street, London E8</address></div></body></html>"""
+
+class FakeDriver:
+    def __init__(self, results_after):
+        self.calls = 0
+        self.results_after = results_after
+
+    def execute_script(self, script):
+        self.calls += 1
+        return self.results_after is not None and self.calls >= self.results_after
+
+def test_extract_data_from_restricted_parse(crawler):
+    """Test that the JSON-LD and addresses survive the restricted parse"""
+    entries = crawler.extract_data(crawler.make_soup(SEARCH_PAGE))
+    assert entries == [{
+        'id': 12345678,
+        'url': 'https://www.zoopla.co.uk/to-rent/details/12345678/',
+        'title': '2 bed flat to rent',
+        'price': '£1800 pcm',
+        'size': '',
+        'rooms': '2',
+        'address': 'Mare Street, London E8',
+        'image': 'https://lid.zoocdn.com/12345678.jpg',
+        'crawler': 'Zoopla'
+    }]
+
+def test_wait_returns_once_results_are_rendered(crawler):
+    """Test that the wait ends as soon as the search results are present"""
+    driver = FakeDriver(results_after=2)
+    crawler.wait_until_loaded(driver)
+    assert driver.calls == 2
+
+def test_wait_gives_up_after_timeout(crawler, monkeypatch):
+    """Test that a page without search results is parsed after the timeout"""
+    monkeypatch.setattr(Zoopla, 'PAGE_LOAD_TIMEOUT', 0.5)
+    driver = FakeDriver(results_after=None)
+    crawler.wait_until_loaded(driver)
+    assert driver.calls > 1
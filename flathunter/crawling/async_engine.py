@@ -0,0 +1,85 @@
+"""Concurrent crawl engine. Runs the (blocking) crawlers on a worker pool driven
+by an asyncio event loop, with a global and a per-domain concurrency cap, and
+streams exposes to the caller as soon as each page has been crawled"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+from urllib.parse import urlparse
+
+from flathunter.core.logging import logger
+from flathunter.crawling.driver_pool import get_driver_pool
+from flathunter.crawling.webdriver_crawler import WebdriverCrawler
+from flathunter.utils.stream import ReadyIterator
+
+CrawlJob = Tuple[Any, str]
+
+_DONE = object()
+
+
+class _Failure:
+    """Wraps an unexpected exception raised in a crawl worker"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class AsyncCrawlEngine:
+    """Crawls a list of (crawler, url) jobs concurrently"""
+
+    def __init__(self, max_concurrency: int = 8, per_domain_concurrency: int = 2):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_domain_concurrency = max(1, per_domain_concurrency)
+
+    def stream(self,
+               jobs: Sequence[CrawlJob],
+               crawl: Callable[[Any, str], List[Dict]]) -> Iterator[Dict]:
+        """Run `crawl(crawler, url)` for every job and yield the exposes in
+           the order in which the pages finish"""
+        results: queue.Queue = queue.Queue()
+
+        def exposes():
+            worker = threading.Thread(target=self._run_loop, args=(list(jobs), crawl, results),
+                                      name="crawl-engine", daemon=True)
+            worker.start()
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+            worker.join()
+
+        return ReadyIterator(exposes(), lambda: not results.empty())
+
+    def _run_loop(self, jobs: List[CrawlJob], crawl, results: queue.Queue):
+        try:
+            asyncio.run(self._crawl_all(jobs, crawl, results))
+        except BaseException as error:  # pylint: disable=broad-except
+            results.put(_Failure(error))
+        finally:
+            results.put(_DONE)
+
+    async def _crawl_all(self, jobs: List[CrawlJob], crawl, results: queue.Queue):
+        loop = asyncio.get_running_loop()
+        overall = asyncio.Semaphore(self.max_concurrency)
+        domains: Dict[str, asyncio.Semaphore] = {}
+        # webdriver crawlers share the browsers of the driver pool
+        browsers = asyncio.Semaphore(get_driver_pool().size)
+        unlimited = asyncio.Semaphore(self.max_concurrency)
+
+        async def crawl_one(executor, crawler, url):
+            host = urlparse(url).netloc
+            domain = domains.setdefault(host, asyncio.Semaphore(self.per_domain_concurrency))
+            driver = browsers if isinstance(crawler, WebdriverCrawler) else unlimited
+            async with overall, domain, driver:
+                exposes = await loop.run_in_executor(executor, crawl, crawler, url)
+            logger.debug("Crawled %s: %d exposes", url, len(exposes))
+            for expose in exposes:
+                results.put(expose)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                thread_name_prefix="crawl") as executor:
+            await asyncio.gather(*[crawl_one(executor, crawler, url) for crawler, url in jobs])
@@ -0,0 +1,100 @@
+# pylint: disable=missing-docstring
+import threading
+import time
+import unittest
+
+import requests
+
+from flathunter.app.hunter import Hunter
+from flathunter.crawling.async_engine import AsyncCrawlEngine
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.testing.config import StringConfig
+from flathunter.testing.dummy_crawler import DummyCrawler
+from flathunter.testing.util import count
+
+
+class ConcurrencyRecorder:
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def crawl(self, crawler, url):
+        host = url.split('/')[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[host] -= 1
+        return [{'id': url, 'crawler': crawler}]
+
+
+class AsyncCrawlEngineTest(unittest.TestCase):
+
+    def test_all_jobs_are_crawled(self):
+        recorder = ConcurrencyRecorder(delay=0)
+        jobs = [("crawler", f"https://www.example.com/{i}") for i in range(10)]
+        exposes = list(AsyncCrawlEngine().stream(jobs, recorder.crawl))
+        self.assertEqual(sorted(e['id'] for e in exposes), sorted(url for _, url in jobs))
+
+    def test_per_domain_concurrency_is_capped(self):
+        recorder = ConcurrencyRecorder()
+        jobs = [("crawler", f"https://www.example.com/{i}") for i in range(6)] + \
+               [("crawler", f"https://www.example.org/{i}") for i in range(6)]
+        list(AsyncCrawlEngine(max_concurrency=8, per_domain_concurrency=2)
+             .stream(jobs, recorder.crawl))
+        self.assertEqual(recorder.peak["www.example.com"], 2)
+        self.assertEqual(recorder.peak["www.example.org"], 2)
+
+    def test_results_are_streamed(self):
+        def crawl(_crawler, url):
+            if url.endswith("slow"):
+                time.sleep(0.5)
+            return [{'id': url}]
+        jobs = [("crawler", "https://www.example.com/slow"),
+                ("crawler", "https://www.example.org/fast")]
+        stream = AsyncCrawlEngine().stream(jobs, crawl)
+        start = time.monotonic()
+        first = next(stream)
+        self.assertEqual(first['id'], "https://www.example.org/fast")
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual(next(stream)['id'], "https://www.example.com/slow")
+
+    def test_unexpected_errors_are_raised(self):
+        def crawl(_crawler, _url):
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            list(AsyncCrawlEngine().stream([("crawler", "https://www.example.com/")], crawl))
+
+
+class FailingCrawler(DummyCrawler):
+
+    def get_results(self, search_url, max_pages=None, known_ids=None):
+        if "broken" in search_url:
+            raise requests.exceptions.ConnectionError("down")
+        return super().get_results(search_url, max_pages, known_ids)
+
+
+class AsyncHunterTest(unittest.TestCase):
+
+    ASYNC_CONFIG = """
+urls:
+  - https://www.example.com/search/flats-in-berlin
+  - https://www.example.com/search/broken
+  - https://www.example.com/search/flats-in-hamburg
+
+crawl:
+  async: true
+  max_concurrency: 4
+  per_domain_concurrency: 2
+"""
+
+    def test_hunt_flats_in_async_mode(self):
+        config = StringConfig(string=self.ASYNC_CONFIG)
+        config.set_searchers([FailingCrawler()])
+        hunter = Hunter(config, IdMaintainer(":memory:"))
+        exposes = hunter.hunt_flats()
+        self.assertTrue(count(exposes) > 4, "Expected to find exposes")
@@ -1,9 +1,10 @@
 """Chrome needs some special handling to work out where the correct
 binary is, to attach the correct selenium chromedriver, and to set
 the correct version number"""
+import json
 import re
 import subprocess
-from typing import List
+from typing import List, Optional
 from sys import platform
 import undetected_chromedriver as uc
 
@@ -16,6 +17,37 @@ WINDOWS_CHROME_REG_REGEXP = re.compile(r'\s*version\s*REG_SZ\s*(\d+)\..*')
 CHROME_BINARY_NAMES = ['google-chrome', 'chromium', 'chrome', 'chromium-browser',
                        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome']
 
+# Always blocked, so that GeeTest captchas can be solved by the captcha solver
+CAPTCHA_BLOCKED_URLS = ["https://api.geetest.com/get.*"]
+
+# Resources that the crawlers never read, blocked by the crawl profile
+CRAWL_PROFILE_BLOCKED_URLS = [
+    # images and media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # ads and analytics
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.*", "*amazon-adsystem.com*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*scorecardresearch.com*",
+    "*criteo.com*", "*criteo.net*", "*taboola.com*", "*outbrain.com*", "*permutive.com*",
+    "*bat.bing.com*", "*clarity.ms*", "*newrelic.com*", "*nr-data.net*",
+]
+
+# Chrome features a crawl does not need
+CRAWL_PROFILE_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--autoplay-policy=user-gesture-required",
+    "--mute-audio",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+]
+
 def get_command_output(args) -> List[str]:
     """Run a command and return stdout"""
     try:
@@ -55,8 +87,9 @@ def get_chrome_version() -> int:
         pass
     raise ChromeNotFound()
 
-def get_chrome_driver(driver_arguments):
-    """Configure Chrome WebDriver"""
+def get_chrome_driver(driver_arguments, crawl_profile: bool = False):
+    """Configure Chrome WebDriver. The crawl profile blocks images, media, fonts
+    and trackers, and returns from page loads once the DOM is ready"""
     logger.info('Initializing Chrome WebDriver for crawler...')
     chrome_options = uc.ChromeOptions() # pylint: disable=no-member
     if platform == "darwin":
@@ -64,6 +97,12 @@ def get_chrome_driver(driver_arguments):
     if driver_arguments is not None:
         for driver_argument in driver_arguments:
             chrome_options.add_argument(driver_argument)
+    blocked_urls = CAPTCHA_BLOCKED_URLS
+    if crawl_profile:
+        for driver_argument in CRAWL_PROFILE_ARGUMENTS:
+            chrome_options.add_argument(driver_argument)
+        chrome_options.page_load_strategy = 'eager'
+        blocked_urls = CAPTCHA_BLOCKED_URLS + CRAWL_PROFILE_BLOCKED_URLS
     chrome_version = get_chrome_version()
     chrome_options.add_argument("--headless=new")
     chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
@@ -79,9 +118,25 @@ def get_chrome_driver(driver_arguments):
             },
         )
 
-        driver.execute_cdp_cmd('Network.setBlockedURLs',
-            {"urls": ["https://api.geetest.com/get.*"]})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": blocked_urls})
         driver.execute_cdp_cmd('Network.enable', {})
     except Exception as e:
         logger.warning(f"Could not execute CDP commands: {e}. Continuing anyway...")
     return driver
+
+def transferred_bytes(driver) -> Optional[int]:
+    """Bytes received over the network since the last call, read from (and
+    draining) the performance log of the driver. None if the log is unavailable"""
+    try:
+        entries = driver.get_log("performance")
+    except Exception:  # pylint: disable=broad-except
+        return None
+    total = 0
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get("method") == "Network.loadingFinished":
+            total += int(message.get("params", {}).get("encodedDataLength", 0))
+    return total
@@ -1,9 +1,12 @@
 # pylint: disable=missing-docstring
-import pytest
+import json
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import pytest
 
-from flathunter.crawling.chrome_wrapper import get_chrome_version, CHROME_BINARY_NAMES
+from flathunter.crawling.chrome_wrapper import get_chrome_driver, get_chrome_version, \
+    transferred_bytes, CHROME_BINARY_NAMES
 from flathunter.core.exceptions import ChromeNotFound
 
 
@@ -63,3 +66,38 @@ class ChromeWrapperTest(unittest.TestCase):
         self.assertEqual(get_chrome_version(), 107)
         self.assertEqual(get_chrome_version(), 107)
         self.assertEqual(get_chrome_version(), 116)
+
+    @patch("flathunter.crawling.chrome_wrapper.get_chrome_version", return_value=120)
+    @patch("flathunter.crawling.chrome_wrapper.uc.Chrome")
+    def test_crawl_profile(self, chrome_mock, _version_mock):
+        get_chrome_driver([], crawl_profile=True)
+        options = chrome_mock.call_args.kwargs['options']
+        self.assertEqual(options.page_load_strategy, 'eager')
+        self.assertIn("--blink-settings=imagesEnabled=false", options.arguments)
+        blocked = chrome_mock.return_value.execute_cdp_cmd.call_args_list[1].args[1]['urls']
+        self.assertIn("https://api.geetest.com/get.*", blocked)
+        self.assertIn("*.woff2", blocked)
+
+    @patch("flathunter.crawling.chrome_wrapper.get_chrome_version", return_value=120)
+    @patch("flathunter.crawling.chrome_wrapper.uc.Chrome")
+    def test_default_profile_only_blocks_captcha(self, chrome_mock, _version_mock):
+        get_chrome_driver([])
+        options = chrome_mock.call_args.kwargs['options']
+        self.assertNotEqual(options.page_load_strategy, 'eager')
+        blocked = chrome_mock.return_value.execute_cdp_cmd.call_args_list[1].args[1]['urls']
+        self.assertEqual(blocked, ["https://api.geetest.com/get.*"])
+
+    def test_transferred_bytes(self):
+        def entry(method, length):
+            return {"message": json.dumps({"message": {
+                "method": method, "params": {"encodedDataLength": length}}})}
+        driver = MagicMock()
+        driver.get_log.return_value = [entry("Network.loadingFinished", 1000),
+                                       entry("Network.dataReceived", 500),
+                                       entry("Network.loadingFinished", 24)]
+        self.assertEqual(transferred_bytes(driver), 1024)
+
+    def test_transferred_bytes_without_log(self):
+        driver = MagicMock()
+        driver.get_log.side_effect = Exception("performance log not enabled")
+        self.assertIsNone(transferred_bytes(driver))
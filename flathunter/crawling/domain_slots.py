@@ -0,0 +1,86 @@
+"""Process-wide count of the crawls running against every site. A crawl takes a
+slot of its site for as long as it runs; crawlers that fetch several pages of
+a search at once (Rightmove) only use more threads while their site has free
+slots, so that all fetches together stay within the per-domain concurrency"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+from flathunter.core.logging import logger
+
+
+class DomainSlots:
+    """Counts the fetchers per host against a cap"""
+
+    def __init__(self, per_domain: int = 2):
+        self.per_domain = max(1, per_domain)
+        self._used: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        """Host part of a URL, used to key the slots"""
+        return urlparse(url).netloc.lower()
+
+    def in_use(self, url: str) -> int:
+        """Number of slots of the host of the URL taken right now"""
+        with self._lock:
+            return self._used.get(self.host(url), 0)
+
+    def _release(self, host: str, count: int):
+        with self._lock:
+            self._used[host] -= count
+            if not self._used[host]:
+                del self._used[host]
+
+    @contextmanager
+    def hold(self, url: str) -> Iterator[None]:
+        """Take a slot of the host for a crawl. The caller (the crawl engine, or
+           the hunter crawling one URL at a time) keeps the number of crawls per
+           host within the cap, so this does not wait"""
+        host = self.host(url)
+        with self._lock:
+            self._used[host] = self._used.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            self._release(host, 1)
+
+    @contextmanager
+    def extra(self, url: str, wanted: int) -> Iterator[int]:
+        """Take up to `wanted` more slots of the host, as many as are free, and
+           yield the number taken"""
+        host = self.host(url)
+        with self._lock:
+            used = self._used.get(host, 0)
+            granted = max(0, min(wanted, self.per_domain - used))
+            if granted:
+                self._used[host] = used + granted
+        try:
+            yield granted
+        finally:
+            if granted:
+                self._release(host, granted)
+
+
+_SLOTS_LOCK = threading.Lock()
+_SLOTS: Optional[DomainSlots] = None
+
+
+def configure_domain_slots(config) -> DomainSlots:
+    """(Re)create the process-wide domain slots from the config"""
+    global _SLOTS  # pylint: disable=global-statement
+    with _SLOTS_LOCK:
+        _SLOTS = DomainSlots(config.crawl_per_domain_concurrency())
+        logger.debug("At most %d concurrent fetches per site", _SLOTS.per_domain)
+        return _SLOTS
+
+
+def get_domain_slots() -> DomainSlots:
+    """Return the process-wide domain slots, creating default ones if needed"""
+    global _SLOTS  # pylint: disable=global-statement
+    with _SLOTS_LOCK:
+        if _SLOTS is None:
+            _SLOTS = DomainSlots()
+        return _SLOTS
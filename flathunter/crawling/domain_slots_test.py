@@ -0,0 +1,38 @@
+# pylint: disable=missing-docstring
+import unittest
+
+from flathunter.crawling import domain_slots
+from flathunter.crawling.domain_slots import DomainSlots, configure_domain_slots, \
+    get_domain_slots
+from flathunter.testing.config import StringConfig
+
+URL = "https://www.rightmove.co.uk/property-to-rent/find.html"
+
+
+class DomainSlotsTest(unittest.TestCase):
+
+    def test_extra_slots_are_the_free_ones(self):
+        slots = DomainSlots(per_domain=3)
+        with slots.hold(URL):
+            with slots.extra(URL, 5) as extra:
+                self.assertEqual(extra, 2)
+                self.assertEqual(slots.in_use(URL), 3)
+                with slots.extra(URL, 1) as more:
+                    self.assertEqual(more, 0)
+                with slots.extra("https://www.zoopla.co.uk/", 1) as other:
+                    self.assertEqual(other, 1)
+            self.assertEqual(slots.in_use(URL), 1)
+        self.assertEqual(slots.in_use(URL), 0)
+
+    def test_configure_from_config(self):
+        try:
+            slots = configure_domain_slots(StringConfig(string="""
+crawl:
+  per_domain_concurrency: 3
+"""))
+            self.assertIs(get_domain_slots(), slots)
+            self.assertEqual(slots.per_domain, 3)
+        finally:
+            domain_slots._SLOTS = None  # pylint: disable=protected-access
+        self.assertEqual(get_domain_slots().per_domain, 2)
+        domain_slots._SLOTS = None  # pylint: disable=protected-access
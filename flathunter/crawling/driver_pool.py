@@ -0,0 +1,165 @@
+"""Process-wide pool of Chrome WebDrivers shared by all webdriver crawlers. Browsers
+are handed out for one fetch at a time, so several pages can render in parallel,
+and are replaced after a number of pages or once they use too much memory"""
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Chrome
+
+from flathunter.core.logging import logger
+from flathunter.crawling.chrome_wrapper import get_chrome_driver
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and all of its descendants in MiB, or
+       None where it cannot be read (no /proc file system)"""
+    if not os.path.isdir('/proc'):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', encoding='utf-8') as stat:
+                # the parent pid follows the state, after the parenthesised command
+                parent = int(stat.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total_pages = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/statm', encoding='utf-8') as statm:
+                total_pages += int(statm.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        pending.extend(children.get(current, []))
+    return total_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def browser_pid(driver: Chrome) -> Optional[int]:
+    """Process id of the browser, or of the chromedriver that started it"""
+    pid = getattr(driver, 'browser_pid', None)
+    if isinstance(pid, int):
+        return pid
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+class PooledDriver:
+    """A browser of the pool and the number of pages it has loaded"""
+
+    def __init__(self, driver: Chrome):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    """Hands out up to `size` browsers, one fetch at a time"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 size: int = 1,
+                 driver_arguments: Optional[List[str]] = None,
+                 max_pages: int = 0,
+                 max_rss_mb: int = 0,
+                 factory: Callable[[Optional[List[str]]], Chrome] = get_chrome_driver):
+        self.size = max(1, size)
+        self.driver_arguments = driver_arguments
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: List[PooledDriver] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def lease(self) -> Iterator[Chrome]:
+        """Borrow a browser for one fetch, waiting while all of them are busy"""
+        with self._slots:
+            pooled = self._take()
+            broken = False
+            try:
+                yield pooled.driver
+            except WebDriverException:
+                broken = True
+                raise
+            finally:
+                pooled.pages += 1
+                self._give_back(pooled, broken)
+
+    def _take(self) -> PooledDriver:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return PooledDriver(self._factory(self.driver_arguments))
+
+    def _give_back(self, pooled: PooledDriver, broken: bool):
+        reason = None
+        if broken:
+            reason = "it failed"
+        elif self.max_pages > 0 and pooled.pages >= self.max_pages:
+            reason = f"{pooled.pages} pages"
+        elif self.max_rss_mb > 0:
+            pid = browser_pid(pooled.driver)
+            rss = process_tree_rss_mb(pid) if pid is not None else None
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"{rss:.0f} MiB resident memory"
+        with self._lock:
+            if reason is None and not self._closed:
+                self._idle.append(pooled)
+                return
+        if reason is not None:
+            logger.info("Recycling browser after %s", reason)
+        self._quit(pooled)
+
+    @staticmethod
+    def _quit(pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as error:  # pylint: disable=broad-except
+            logger.debug("Could not quit browser: %s", error)
+
+    def close(self):
+        """Quit all idle browsers; browsers in use are quit when they are given back"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._quit(pooled)
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[DriverPool] = None
+
+
+def configure_driver_pool(config) -> DriverPool:
+    """(Re)create the process-wide driver pool from the config"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _POOL = DriverPool(size=config.webdriver_pool_size(),
+                           driver_arguments=config.captcha_driver_arguments(),
+                           max_pages=config.webdriver_max_pages(),
+                           max_rss_mb=config.webdriver_max_rss_mb(),
+                           factory=partial(get_chrome_driver,
+                                           crawl_profile=config.webdriver_crawl_profile()))
+        return _POOL
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the process-wide driver pool, creating a default one if needed"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = DriverPool()
+        return _POOL
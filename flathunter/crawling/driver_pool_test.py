@@ -0,0 +1,120 @@
+# pylint: disable=missing-docstring
+import os
+import threading
+import unittest
+from typing import cast
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver import Chrome
+
+from flathunter.crawling import driver_pool
+from flathunter.crawling.driver_pool import DriverPool, configure_driver_pool, process_tree_rss_mb
+from flathunter.testing.config import StringConfig
+
+
+class FakeDriver:
+
+    def __init__(self, browser_pid=None):
+        self.browser_pid = browser_pid
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def factory(self, driver_arguments) -> Chrome:  # pylint: disable=unused-argument
+        driver = FakeDriver(browser_pid=os.getpid())
+        self.created.append(driver)
+        return cast(Chrome, driver)
+
+    def test_drivers_are_reused(self):
+        pool = DriverPool(factory=self.factory)
+        with pool.lease() as first:
+            pass
+        with pool.lease() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.created), 1)
+
+    def test_concurrent_leases_get_separate_drivers(self):
+        pool = DriverPool(size=2, factory=self.factory)
+        with pool.lease() as first, pool.lease() as second:
+            self.assertIsNot(first, second)
+
+    def test_lease_waits_for_free_driver(self):
+        pool = DriverPool(size=1, factory=self.factory)
+        leased = []
+
+        def lease():
+            with pool.lease() as driver:
+                leased.append(driver)
+
+        with pool.lease():
+            waiting = threading.Thread(target=lease)
+            waiting.start()
+            waiting.join(timeout=0.2)
+            self.assertEqual(leased, [])
+        waiting.join(timeout=1)
+        self.assertEqual(len(leased), 1)
+        self.assertEqual(len(self.created), 1)
+
+    def test_driver_is_recycled_after_max_pages(self):
+        pool = DriverPool(max_pages=2, factory=self.factory)
+        for _ in range(3):
+            with pool.lease():
+                pass
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[0].quit_called)
+        self.assertFalse(self.created[1].quit_called)
+
+    @pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+    def test_driver_is_recycled_above_rss_threshold(self):
+        pool = DriverPool(max_rss_mb=1, factory=self.factory)
+        with pool.lease():
+            pass
+        self.assertTrue(self.created[0].quit_called)
+
+    def test_failed_driver_is_replaced(self):
+        pool = DriverPool(factory=self.factory)
+        with pytest.raises(WebDriverException):
+            with pool.lease():
+                raise WebDriverException("tab crashed")
+        with pool.lease() as driver:
+            self.assertIs(driver, self.created[1])
+        self.assertTrue(self.created[0].quit_called)
+
+    def test_close_quits_idle_drivers(self):
+        pool = DriverPool(factory=self.factory)
+        with pool.lease():
+            pass
+        pool.close()
+        self.assertTrue(self.created[0].quit_called)
+
+    @pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+    def test_process_tree_rss(self):
+        rss = process_tree_rss_mb(os.getpid())
+        assert rss is not None
+        self.assertGreater(rss, 1)
+
+    def test_configure_from_config(self):
+        pool = configure_driver_pool(StringConfig(string="""
+webdriver:
+  pool_size: 3
+  max_pages: 50
+  max_rss_mb: 800
+captcha:
+  driver_arguments:
+    - "--window-size=1024,768"
+"""))
+        self.assertEqual(pool.size, 3)
+        self.assertEqual(pool.max_pages, 50)
+        self.assertEqual(pool.max_rss_mb, 800)
+        self.assertEqual(pool.driver_arguments, ["--window-size=1024,768"])
+        pool.close()
+        driver_pool._POOL = None  # pylint: disable=protected-access
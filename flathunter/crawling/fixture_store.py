@@ -0,0 +1,166 @@
+"""Record and replay of crawled pages. In record mode, every response fetched by a
+crawler (HTML pages, JSON API responses, images and pages rendered in the
+browser) is saved to a fixture store, one folder per site. Fetched bodies are
+kept byte for byte, base64 encoded. In replay mode, fetches are
+answered from the store without touching the network, so that crawlers can be
+tested and benchmarked offline"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+import requests
+
+from flathunter.core.exceptions import ConfigException, FixtureMissingException
+from flathunter.core.logging import logger
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class FixtureStore:
+    """Saves responses to, and answers requests from, a folder of fixtures"""
+
+    def __init__(self, directory: str, mode: str):
+        if mode not in (RECORD, REPLAY):
+            raise ConfigException(f"Unknown fixture mode '{mode}', expected "
+                                  f"'{RECORD}' or '{REPLAY}'")
+        self.directory = directory
+        self.mode = mode
+        self.replayed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        """True if fetches are answered from the store"""
+        return self.mode == REPLAY
+
+    @property
+    def recording(self) -> bool:
+        """True if fetched responses are saved to the store"""
+        return self.mode == RECORD
+
+    @staticmethod
+    def _request_key(method: str, url: str, payload: Any = None) -> str:
+        sha = hashlib.sha1(f"{method.upper()} {url}".encode('utf-8'))
+        if payload is not None:
+            sha.update(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'))
+        return sha.hexdigest()
+
+    def _path(self, method: str, url: str, payload: Any = None) -> str:
+        site = urlparse(url).netloc or 'unknown'
+        return os.path.join(self.directory, site,
+                            self._request_key(method, url, payload) + '.json')
+
+    def record(self, method: str, url: str, response: requests.Response,
+               payload: Any = None):
+        """Save a fetched response"""
+        self.save(method, url, response.status_code, response.content,
+                  response.headers.get('Content-Type', ''), payload, response.encoding)
+
+    def record_page(self, url: str, page_source: Union[bytes, str]):
+        """Save a page rendered in the browser or taken from the page cache, as if
+           it had been fetched with a GET"""
+        if isinstance(page_source, bytes):
+            self.save('GET', url, 200, page_source, 'text/html', encoding=None)
+        else:
+            self.save('GET', url, 200, page_source, 'text/html; charset=utf-8')
+
+    # pylint: disable=too-many-arguments
+    def save(self, method: str, url: str, status_code: int, body: Union[bytes, str],
+             content_type: str, payload: Any = None, encoding: Optional[str] = 'utf-8'):
+        """Write a fixture. Bodies given as bytes are stored base64 encoded"""
+        path = self._path(method, url, payload)
+        fixture = {
+            'method': method.upper(),
+            'url': url,
+            'payload': payload,
+            'status_code': status_code,
+            'content_type': content_type,
+            'encoding': encoding,
+        }
+        if isinstance(body, bytes):
+            fixture['content'] = base64.b64encode(body).decode('ascii')
+        else:
+            fixture['body'] = body
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as file:
+                    json.dump(fixture, file, ensure_ascii=False, indent=1)
+        except OSError as error:
+            logger.warning("Could not record fixture for %s: %s", url, error)
+
+    def replay(self, method: str, url: str, payload: Any = None) -> requests.Response:
+        """Answer a request from the store. Raises a FixtureMissingException if
+           it was not recorded"""
+        path = self._path(method, url, payload)
+        try:
+            with open(path, encoding='utf-8') as file:
+                fixture = json.load(file)
+        except (OSError, ValueError) as error:
+            raise FixtureMissingException(
+                f"No recorded response for {method.upper()} {url}") from error
+        with self._lock:
+            self.replayed += 1
+        response = requests.Response()
+        response.status_code = fixture['status_code']
+        response.url = url
+        response.headers['Content-Type'] = fixture['content_type']
+        response.encoding = fixture.get('encoding', 'utf-8')
+        response._content = self.content(fixture)  # pylint: disable=protected-access
+        return response
+
+    @staticmethod
+    def content(fixture: dict) -> bytes:
+        """The recorded body of a fixture"""
+        if 'content' in fixture:
+            return base64.b64decode(fixture['content'])
+        return fixture['body'].encode('utf-8')
+
+    def fixtures(self, site: Optional[str] = None) -> Iterator[dict]:
+        """All recorded fixtures (of one site), in a stable order"""
+        sites = [site] if site is not None else self.sites()
+        for name in sites:
+            folder = os.path.join(self.directory, name)
+            for filename in sorted(os.listdir(folder)):
+                if filename.endswith('.json'):
+                    with open(os.path.join(folder, filename), encoding='utf-8') as file:
+                        yield json.load(file)
+
+    def sites(self) -> List[str]:
+        """The sites that fixtures were recorded for"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+
+_STORE_LOCK = threading.Lock()
+_STORE: Optional[FixtureStore] = None
+
+
+def configure_fixture_store(config) -> Optional[FixtureStore]:
+    """(Re)create the process-wide fixture store from the config"""
+    global _STORE  # pylint: disable=global-statement
+    with _STORE_LOCK:
+        mode = config.fixtures_mode()
+        _STORE = FixtureStore(config.fixtures_directory(), mode) if mode else None
+        if _STORE is not None:
+            logger.info("Fixture store in %s mode at %s", _STORE.mode, _STORE.directory)
+        return _STORE
+
+
+def get_fixture_store() -> Optional[FixtureStore]:
+    """Return the process-wide fixture store, or None if fetches go to the network"""
+    with _STORE_LOCK:
+        return _STORE
+
+
+def replaying() -> bool:
+    """True if fetches are answered from the fixture store"""
+    store = get_fixture_store()
+    return store is not None and store.replaying
@@ -0,0 +1,115 @@
+# pylint: disable=missing-docstring
+import os
+import tempfile
+import unittest
+
+import pytest
+import requests_mock
+
+from flathunter.core.exceptions import FixtureMissingException
+from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.crawling.fixture_store import FixtureStore, configure_fixture_store, \
+    get_fixture_store
+from flathunter.crawling.http_session import HttpSessionPool
+from flathunter.testing.benchmark import benchmark_extract, benchmark_hunt, compare
+from flathunter.testing.config import StringConfig
+
+URL = "https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=REGION%5E93917"
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                       "testing", "fixtures", "rightmove-search.html")
+
+
+class FixtureStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        configure_fixture_store(StringConfig(string=""))
+
+    def use_store(self, mode):
+        store = configure_fixture_store(StringConfig(string=f"""
+fixtures:
+  mode: {mode}
+  directory: {self.directory}
+"""))
+        assert store is not None
+        return store
+
+    @requests_mock.Mocker()
+    def test_records_and_replays_responses(self, m):
+        m.get(URL, text="<html>listings</html>", headers={"Content-Type": "text/html"})
+        self.use_store("record")
+        HttpSessionPool().get(URL)
+        self.assertEqual(os.listdir(self.directory), ["www.rightmove.co.uk"])
+
+        m.reset_mock()
+        store = self.use_store("replay")
+        response = HttpSessionPool().get(URL)
+        self.assertEqual(m.call_count, 0)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "<html>listings</html>")
+        self.assertEqual(store.replayed, 1)
+
+    @requests_mock.Mocker()
+    def test_bodies_are_replayed_byte_for_byte(self, m):
+        image = "https://media.rightmove.co.uk/photo.jpg"
+        m.get(image, content=b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01",
+              headers={"Content-Type": "image/jpeg"})
+        m.get(URL, content="<html>Miete 900 €</html>".encode('iso-8859-15'),
+              headers={"Content-Type": "text/html; charset=iso-8859-15"})
+        self.use_store("record")
+        HttpSessionPool().get(image)
+        HttpSessionPool().get(URL)
+        self.use_store("replay")
+        self.assertEqual(HttpSessionPool().get(image).content,
+                         b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01")
+        self.assertEqual(HttpSessionPool().get(URL).text, "<html>Miete 900 €</html>")
+
+    @requests_mock.Mocker()
+    def test_request_payload_is_part_of_the_key(self, m):
+        api = "https://api.mobile.immobilienscout24.de/search/list"
+        m.post(api, json={"page": 1})
+        self.use_store("record")
+        HttpSessionPool().post(api, json={"page": 1})
+        self.use_store("replay")
+        self.assertEqual(HttpSessionPool().post(api, json={"page": 1}).json(), {"page": 1})
+        with pytest.raises(FixtureMissingException):
+            HttpSessionPool().post(api, json={"page": 2})
+
+    def test_browser_pages_are_replayed_as_get(self):
+        store = FixtureStore(self.directory, "record")
+        store.record_page(URL, "<html>rendered</html>")
+        self.assertEqual(FixtureStore(self.directory, "replay").replay("GET", URL).text,
+                         "<html>rendered</html>")
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_fixture_store())
+
+    def test_unknown_mode(self):
+        with pytest.raises(Exception):
+            FixtureStore(self.directory, "rewind")
+
+    @requests_mock.Mocker()
+    def test_benchmarks_replay_recorded_crawl(self, m):
+        with open(FIXTURE, encoding="utf-8") as file:
+            page = file.read()
+        m.get(URL, text=page, headers={"Content-Type": "text/html"})
+        m.get(URL + "&index=24", text=page, headers={"Content-Type": "text/html"})
+        m.get(URL + "&index=48", text=page, headers={"Content-Type": "text/html"})
+        config = StringConfig(string=f"urls:\n  - {URL}\n")
+        config.init_searchers()
+        self.use_store("record")
+        self.assertEqual(len(Rightmove(config).crawl(URL)), 24)
+        m.reset_mock()
+
+        store = FixtureStore(self.directory, "replay")
+        extract = benchmark_extract(config, store, repeat=1)
+        hunt = benchmark_hunt(config, store, repeat=1)
+        self.assertEqual(m.call_count, 0)
+        self.assertEqual(extract["Rightmove"]["pages"], 3)
+        self.assertEqual(extract["Rightmove"]["listings"], 72)
+        self.assertEqual(hunt["Rightmove"]["pages"], 3)
+        self.assertEqual(hunt["Rightmove"]["listings"], 24)
+        lines = compare({"extract": extract}, {"extract": extract})
+        self.assertIn("(1.00x baseline)", lines[0])
@@ -0,0 +1,182 @@
+"""Pooled, keep-alive HTTP sessions shared by all crawlers. One `requests.Session`
+is kept per host, so consecutive fetches to the same portal reuse the open
+TCP + TLS connection instead of paying for a new handshake"""
+import socket
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from flathunter.core.logging import logger
+from flathunter.crawling.fixture_store import get_fixture_store, replaying
+from flathunter.crawling.rate_limiter import get_rate_limiter
+
+
+class DnsCache:
+    """Caches `socket.getaddrinfo` lookups for a fixed time-to-live"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, list]] = {}
+        self._lock = threading.Lock()
+        self._original: Optional[Callable[..., list]] = None
+
+    def getaddrinfo(self, *args, **kwargs):
+        """Drop-in replacement for `socket.getaddrinfo`"""
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        # Not installed, the socket module still has the original resolver
+        resolve = self._original or socket.getaddrinfo
+        result = resolve(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+        return result
+
+    def install(self):
+        """Route all name resolution of this process through the cache"""
+        if self._original is not None:
+            return
+        self._original = socket.getaddrinfo
+        socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        """Restore the original resolver"""
+        if self._original is None:
+            return
+        socket.getaddrinfo = self._original
+        self._original = None
+        with self._lock:
+            self._entries.clear()
+
+
+class HttpSessionPool:
+    """Hands out one pooled `requests.Session` per host"""
+
+    def __init__(self,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 dns_cache_ttl: int = 0):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self.dns_cache: Optional[DnsCache] = None
+        if dns_cache_ttl > 0:
+            self.dns_cache = DnsCache(dns_cache_ttl)
+            self.dns_cache.install()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Scheme and host of a URL, used to key the sessions"""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the (shared) session for the host of the URL"""
+        key = self.host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._new_session()
+                self._sessions[key] = session
+        return session
+
+    def fresh_session(self, url: str) -> requests.Session:
+        """A new session without cookies that sends its requests over the pooled
+           connections of the host of the URL. It must not be closed, as that
+           would close the shared connections"""
+        pooled = self.session_for(url)
+        session = requests.Session()
+        for prefix, adapter in pooled.adapters.items():
+            session.mount(prefix, adapter)
+        return session
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None,
+                **kwargs) -> requests.Response:
+        """Send a request through the pooled session of the target host (or the
+           given session), respecting the rate limit of the host. Requests are
+           answered from the fixture store instead if it replays"""
+        store = get_fixture_store()
+        payload = kwargs.get('json', kwargs.get('data'))
+        if store is not None and store.replaying:
+            return store.replay(method, url, payload)
+        limiter = get_rate_limiter()
+        limiter.acquire(url)
+        response = (session or self.session_for(url)).request(method, url, **kwargs)
+        # a proxy being throttled says nothing about the rate of our own address
+        if not kwargs.get('proxies'):
+            limiter.feedback(url, response.status_code, response.headers.get('Retry-After'))
+        # unmodified (304) pages are recorded with their cached body by the crawler
+        if store is not None and response.status_code != 304:
+            store.record(method, url, response, payload)
+        return response
+
+    def get(self, url: str, session: Optional[requests.Session] = None,
+            **kwargs) -> requests.Response:
+        """Send a GET request through the pooled session"""
+        return self.request('GET', url, session, **kwargs)
+
+    def post(self, url: str, session: Optional[requests.Session] = None,
+             **kwargs) -> requests.Response:
+        """Send a POST request through the pooled session"""
+        return self.request('POST', url, session, **kwargs)
+
+    def warm_up(self, urls: Iterable[str], timeout: float = 10):
+        """Open a connection to every distinct host before the crawl starts,
+           so that the first real fetch does not pay for the handshake"""
+        if replaying():
+            return
+        for key in sorted({self.host_key(url) for url in urls}):
+            try:
+                self.session_for(key).head(key + '/', timeout=timeout, allow_redirects=False)
+            except requests.exceptions.RequestException as error:
+                logger.debug("Warm-up of %s failed: %s", key, error)
+
+    def close(self):
+        """Close all open sessions and connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if self.dns_cache is not None:
+            self.dns_cache.uninstall()
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[HttpSessionPool] = None
+
+
+def configure_session_pool(config) -> HttpSessionPool:
+    """(Re)create the process-wide session pool from the config"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _POOL = HttpSessionPool(pool_connections=config.http_pool_connections(),
+                                pool_maxsize=config.http_pool_maxsize(),
+                                dns_cache_ttl=config.http_dns_cache_ttl())
+        return _POOL
+
+
+def get_session_pool() -> HttpSessionPool:
+    """Return the process-wide session pool, creating a default one if needed"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = HttpSessionPool()
+        return _POOL
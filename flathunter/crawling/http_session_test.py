@@ -0,0 +1,100 @@
+# pylint: disable=missing-docstring
+import socket
+import unittest
+
+import requests_mock
+from requests.adapters import HTTPAdapter
+
+from flathunter.crawling import http_session
+from flathunter.crawling.http_session import DnsCache, HttpSessionPool, configure_session_pool
+from flathunter.testing.config import StringConfig
+
+
+class HttpSessionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = HttpSessionPool()
+        self.process_pool = http_session._POOL  # pylint: disable=protected-access
+
+    def tearDown(self):
+        self.pool.close()
+        # configure_session_pool replaces the process-wide pool
+        pool = http_session._POOL  # pylint: disable=protected-access
+        if pool is not None and pool is not self.process_pool:
+            pool.close()
+            http_session._POOL = self.process_pool  # pylint: disable=protected-access
+
+    def test_same_host_shares_session(self):
+        first = self.pool.session_for("https://www.rightmove.co.uk/property-to-rent/find.html")
+        second = self.pool.session_for("https://www.rightmove.co.uk/properties/123")
+        self.assertIs(first, second)
+
+    def test_different_hosts_get_different_sessions(self):
+        first = self.pool.session_for("https://www.rightmove.co.uk/")
+        second = self.pool.session_for("https://www.zoopla.co.uk/")
+        self.assertIsNot(first, second)
+
+    def test_pool_size_is_applied(self):
+        pool = HttpSessionPool(pool_connections=3, pool_maxsize=7)
+        url = "https://www.example.com/"
+        adapter = pool.session_for(url).get_adapter(url)
+        assert isinstance(adapter, HTTPAdapter)
+        self.assertEqual(adapter._pool_maxsize, 7)  # pylint: disable=protected-access
+        self.assertEqual(adapter._pool_connections, 3)  # pylint: disable=protected-access
+        pool.close()
+
+    def test_fresh_sessions_share_connections_but_not_cookies(self):
+        url = "https://www.wg-gesucht.de/wg-zimmer-in-Berlin.8.0.1.0.html"
+        first = self.pool.fresh_session(url)
+        second = self.pool.fresh_session(url)
+        first.cookies.set('filter', 'berlin')
+        self.assertEqual(len(second.cookies), 0)
+        self.assertEqual(len(self.pool.session_for(url).cookies), 0)
+        self.assertIs(second.get_adapter(url), self.pool.session_for(url).get_adapter(url))
+
+    @requests_mock.Mocker()
+    def test_get_goes_through_session(self, m):
+        m.get("https://www.example.com/search", text="hello")
+        self.assertEqual(self.pool.get("https://www.example.com/search").text, "hello")
+
+    @requests_mock.Mocker()
+    def test_warm_up_visits_each_host_once(self, m):
+        m.head("https://www.example.com/", status_code=200)
+        m.head("https://www.example.org/", status_code=200)
+        self.pool.warm_up(["https://www.example.com/a", "https://www.example.com/b",
+                           "https://www.example.org/c"])
+        self.assertEqual(m.call_count, 2)
+
+    def test_configure_from_config(self):
+        config = StringConfig(string="""
+http:
+  pool_connections: 4
+  pool_maxsize: 20
+""")
+        pool = configure_session_pool(config)
+        self.assertEqual(pool.pool_connections, 4)
+        self.assertEqual(pool.pool_maxsize, 20)
+        self.assertIsNone(pool.dns_cache)
+
+
+class DnsCacheTest(unittest.TestCase):
+
+    def test_lookups_are_cached(self):
+        calls = []
+        cache = DnsCache(ttl=60)
+        def getaddrinfo(*args, **_kwargs):
+            calls.append(args)
+            return ["addr"]
+
+        cache._original = getaddrinfo  # pylint: disable=protected-access
+        self.assertEqual(cache.getaddrinfo("example.com", 443), ["addr"])
+        self.assertEqual(cache.getaddrinfo("example.com", 443), ["addr"])
+        self.assertEqual(len(calls), 1)
+
+    def test_install_and_uninstall(self):
+        original = socket.getaddrinfo
+        cache = DnsCache(ttl=60)
+        cache.install()
+        self.assertEqual(socket.getaddrinfo, cache.getaddrinfo)
+        cache.uninstall()
+        self.assertIs(socket.getaddrinfo, original)
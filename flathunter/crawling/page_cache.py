@@ -0,0 +1,136 @@
+"""On-disk HTTP cache for crawled pages. Responses carrying an ETag or a
+Last-Modified header are stored, so that the next fetch can be revalidated
+with a conditional GET. Independently of that, the listing region of every
+search page is hashed, so that pages whose listings did not change since the
+last crawl can skip parsing and processing altogether"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from flathunter.core.logging import logger
+
+
+def listing_digest(soup: BeautifulSoup, selector: Optional[str] = None) -> Optional[str]:
+    """Hash of the listing region of a page (the elements matched by the CSS
+       selector, or the page body). None if the region could not be found"""
+    if selector is not None:
+        region = soup.select(selector)
+    else:
+        region = [soup.body] if soup.body is not None else []
+    if not region:
+        return None
+    sha = hashlib.sha256()
+    for element in region:
+        sha.update(str(element).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class PageCache:
+    """Stores revalidation headers and bodies of fetched pages on disk, and the
+       listing digests of crawled search pages in memory. Digests of pages
+       crawled in a hunt only count once the hunt has processed their
+       listings and commits them"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._digests: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_meta(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url, '.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        return meta
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Revalidation headers for the cached copy of the URL, if there is one"""
+        meta = self._load_meta(url)
+        if meta is None or not os.path.exists(self._path(url, '.body')):
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url: str, response):
+        """Keep the body of a successful response, if the site supports revalidation"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+        try:
+            with open(self._path(url, '.body'), 'wb') as file:
+                file.write(response.content)
+            with open(self._path(url, '.json'), 'w', encoding='utf-8') as file:
+                json.dump({'url': url, 'etag': etag, 'last_modified': last_modified}, file)
+        except OSError as error:
+            logger.warning("Could not write page cache entry for %s: %s", url, error)
+
+    def cached_body(self, url: str) -> Optional[bytes]:
+        """Body of the cached copy of the URL"""
+        if self._load_meta(url) is None:
+            return None
+        try:
+            with open(self._path(url, '.body'), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def is_unchanged(self, url: str, digest: str) -> bool:
+        """True if the listings at the URL had the same digest at the last crawl"""
+        with self._lock:
+            return self._digests.get(url) == digest
+
+    def remember_digest(self, url: str, digest: str):
+        """Record the listing digest of a crawled search page, to be used once
+           committed"""
+        with self._lock:
+            self._pending[url] = digest
+
+    def commit_digests(self):
+        """Use the digests recorded since the last commit, after their listings
+           have been processed"""
+        with self._lock:
+            self._digests.update(self._pending)
+            self._pending = {}
+
+    def discard_digests(self):
+        """Forget the digests recorded since the last commit, so that their
+           pages are parsed again at the next crawl"""
+        with self._lock:
+            self._pending = {}
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: Optional[PageCache] = None
+
+
+def configure_page_cache(config) -> Optional[PageCache]:
+    """(Re)create the process-wide page cache from the config"""
+    global _CACHE  # pylint: disable=global-statement
+    with _CACHE_LOCK:
+        _CACHE = PageCache(config.page_cache_directory()) \
+            if config.page_cache_enabled() else None
+        return _CACHE
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None if caching is disabled"""
+    with _CACHE_LOCK:
+        return _CACHE
@@ -0,0 +1,131 @@
+# pylint: disable=missing-docstring
+import os
+import re
+import tempfile
+import unittest
+
+import requests_mock
+from bs4 import BeautifulSoup
+
+from flathunter.core.abstract_crawler import Crawler
+from flathunter.crawling import page_cache
+from flathunter.crawling.page_cache import PageCache, configure_page_cache, listing_digest
+from flathunter.testing.config import StringConfig
+
+URL = "https://www.example.com/search"
+
+PAGE = """<html><body><p>Rendered at %s</p>
+<div class="card">Flat A</div><div class="card">Flat B</div></body></html>"""
+
+
+class CountingCrawler(Crawler):
+    URL_PATTERN = re.compile(r'https://www\.example\.com')
+    LISTING_SELECTOR = 'div.card'
+
+    def __init__(self):
+        super().__init__(StringConfig(string=""))
+        self.extracted = 0
+
+    def extract_data(self, raw_data):
+        self.extracted += 1
+        return [{'id': card.get_text()} for card in raw_data.select('div.card')]
+
+
+class ListingDigestTest(unittest.TestCase):
+
+    def test_digest_ignores_content_outside_region(self):
+        first = BeautifulSoup(PAGE % "10:00", 'lxml')
+        second = BeautifulSoup(PAGE % "10:10", 'lxml')
+        self.assertEqual(listing_digest(first, 'div.card'), listing_digest(second, 'div.card'))
+        self.assertNotEqual(listing_digest(first), listing_digest(second))
+
+    def test_missing_region_has_no_digest(self):
+        self.assertIsNone(listing_digest(BeautifulSoup(PAGE % "now", 'lxml'), 'li.result'))
+
+
+class PageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cache = PageCache(self.tempdir.name)
+        page_cache._CACHE = self.cache  # pylint: disable=protected-access
+        self.crawler = CountingCrawler()
+
+    def tearDown(self):
+        page_cache._CACHE = None  # pylint: disable=protected-access
+        self.tempdir.cleanup()
+
+    @requests_mock.Mocker()
+    def test_revalidates_with_etag(self, m):
+        m.get(URL, [{'text': PAGE % "10:00", 'headers': {'ETag': '"v1"'}},
+                    {'status_code': 304}])
+        self.crawler.get_soup_from_url(URL)
+        soup = self.crawler.get_soup_from_url(URL)
+        self.assertEqual(m.request_history[1].headers['If-None-Match'], '"v1"')
+        self.assertEqual(len(soup.select('div.card')), 2)
+
+    @requests_mock.Mocker()
+    def test_no_revalidation_without_validators(self, m):
+        m.get(URL, text=PAGE % "10:00")
+        self.crawler.get_soup_from_url(URL)
+        self.crawler.get_soup_from_url(URL)
+        self.assertNotIn('If-None-Match', m.request_history[1].headers)
+        self.assertNotIn('If-Modified-Since', m.request_history[1].headers)
+
+    @requests_mock.Mocker()
+    def test_not_modified_without_cached_copy_is_fetched_again(self, m):
+        m.get(URL, [{'text': PAGE % "10:00", 'headers': {'ETag': '"v1"'}},
+                    {'status_code': 304}, {'text': PAGE % "10:10"}])
+        self.crawler.get_soup_from_url(URL)
+        for name in os.listdir(self.tempdir.name):
+            if name.endswith('.body'):
+                os.remove(os.path.join(self.tempdir.name, name))
+        soup = self.crawler.get_soup_from_url(URL)
+        self.assertEqual(m.call_count, 3)
+        self.assertNotIn('If-None-Match', m.request_history[2].headers)
+        self.assertEqual(len(soup.select('div.card')), 2)
+
+    @requests_mock.Mocker()
+    def test_unchanged_listings_are_not_parsed_again(self, m):
+        m.get(URL, [{'text': PAGE % "10:00"}, {'text': PAGE % "10:10"}])
+        self.assertEqual(len(self.crawler.crawl(URL)), 2)
+        self.cache.commit_digests()
+        self.assertEqual(self.crawler.crawl(URL), [])
+        self.assertEqual(self.crawler.extracted, 1)
+
+    @requests_mock.Mocker()
+    def test_listings_of_a_failed_hunt_are_parsed_again(self, m):
+        m.get(URL, text=PAGE % "10:00")
+        self.crawler.crawl(URL)
+        self.cache.discard_digests()
+        self.assertEqual(len(self.crawler.crawl(URL)), 2)
+        self.cache.commit_digests()
+        self.assertEqual(self.crawler.crawl(URL), [])
+
+    @requests_mock.Mocker()
+    def test_changed_listings_are_parsed(self, m):
+        m.get(URL, [{'text': PAGE % "10:00"},
+                    {'text': (PAGE % "10:10").replace("Flat B", "Flat C")}])
+        self.crawler.crawl(URL)
+        self.cache.commit_digests()
+        self.assertEqual([e['id'] for e in self.crawler.crawl(URL)], ["Flat A", "Flat C"])
+        self.assertEqual(self.crawler.extracted, 2)
+
+
+class ConfigurePageCacheTest(unittest.TestCase):
+
+    def tearDown(self):
+        page_cache._CACHE = None  # pylint: disable=protected-access
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(configure_page_cache(StringConfig(string="")))
+
+    def test_enabled_in_config(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            cache = configure_page_cache(StringConfig(string=f"""
+page_cache:
+  enabled: true
+  directory: {tempdir}
+"""))
+            assert cache is not None
+            self.assertEqual(cache.directory, tempdir)
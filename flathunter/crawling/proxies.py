@@ -1,7 +1,18 @@
 """ Gets proxies """
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as WaitTimeout, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
 import requests
 from lxml.html import fromstring
 
+from flathunter.core.exceptions import ProxyException
+from flathunter.core.logging import logger
+from flathunter.crawling.http_session import get_session_pool
+
+
 def get_proxies():
     """
     Gets random, free proxies
@@ -16,3 +27,257 @@ def get_proxies():
             proxy = ":".join([i.xpath('.//td[1]/text()')[0], i.xpath('.//td[2]/text()')[0]])
             proxies.add(proxy)
     return proxies
+
+
+class ProxyStats:
+    """Success rate and smoothed latency of a proxy"""
+
+    # Latency assumed for proxies that have not been used yet, in seconds
+    PRIOR_LATENCY = 5.0
+    # Consecutive failures after which a proxy is considered dead
+    MAX_FAILURES = 3
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = self.PRIOR_LATENCY
+
+    def record(self, success: bool, latency: float):
+        """Account for the outcome of a request through the proxy"""
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.latency = 0.7 * self.latency + 0.3 * latency
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    @property
+    def alive(self) -> bool:
+        """False once the proxy failed too often in a row"""
+        return self.consecutive_failures < self.MAX_FAILURES
+
+    @property
+    def score(self) -> float:
+        """Higher is better: smoothed success rate per second of latency"""
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return success_rate / max(self.latency, 0.01)
+
+
+class ProxyPool:
+    """Long-lived pool of free proxies. The proxy list is cached for a while,
+       new candidates are probed in the background, and every fetch uses the
+       best scoring live proxy for the target domain"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 source: Callable[[], Iterable[str]] = get_proxies,
+                 ttl: float = 600,
+                 deadline: float = 120,
+                 probe_concurrency: int = 16,
+                 probe_url: str = "https://www.gstatic.com/generate_204",
+                 clock: Callable[[], float] = time.monotonic):
+        self.source = source
+        self.ttl = ttl
+        self.deadline = deadline
+        self.probe_url = probe_url
+        self.clock = clock
+        self._proxies: List[str] = []
+        self._fetched_at: Optional[float] = None
+        self._stats: Dict[Tuple[str, str], ProxyStats] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, probe_concurrency),
+                                            thread_name_prefix="proxy-probe")
+        self._probes: Set[Future] = set()
+        # Loads of the list and proxied fetches run here, so that fetch() can stop
+        # waiting for them at its deadline
+        self._fetcher = ThreadPoolExecutor(max_workers=max(1, probe_concurrency),
+                                           thread_name_prefix="proxy-fetch")
+        # Proxied fetches keep their cookies and connections out of the shared sessions
+        self._session = requests.Session()
+
+    @staticmethod
+    def domain(url: str) -> str:
+        """Host part of a URL"""
+        return urlparse(url).netloc.lower()
+
+    def _stats_for(self, proxy: str, domain: str) -> ProxyStats:
+        key = (proxy, domain)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = ProxyStats()
+            self._stats[key] = stats
+        return stats
+
+    def record(self, proxy: str, url: str, success: bool, latency: float):
+        """Account for the outcome of a request to the URL through the proxy"""
+        with self._lock:
+            self._stats_for(proxy, self.domain(url)).record(success, latency)
+            # every fetch also tells us whether the proxy is up at all
+            self._stats_for(proxy, "").record(success, latency)
+
+    def _within(self, seconds: Optional[float], function: Callable, /, *args, **kwargs):
+        """Call the function, waiting at most `seconds` for its result if given.
+           Raises a concurrent.futures.TimeoutError when it is not done by then;
+           the call itself runs on until its own timeouts"""
+        if seconds is None:
+            return function(*args, **kwargs)
+        return self._fetcher.submit(function, *args, **kwargs).result(timeout=max(0.0, seconds))
+
+    def refresh(self, force: bool = False, timeout: Optional[float] = None):
+        """Reload the proxy list if it expired, and probe new candidates. With a
+           timeout, waits at most that many seconds for the list"""
+        with self._lock:
+            if not force and self._fetched_at is not None \
+                    and self.clock() - self._fetched_at < self.ttl:
+                return
+        proxies = self._within(timeout, lambda: list(self.source()))
+        with self._lock:
+            # only a list that could be loaded counts, a failed load is retried
+            self._fetched_at = self.clock()
+            known = set(self._proxies)
+            self._proxies = proxies
+            listed = set(proxies)
+            self._stats = {key: stats for key, stats in self._stats.items()
+                           if key[0] in listed}
+        logger.debug("Loaded %d proxies", len(proxies))
+        for proxy in proxies:
+            if proxy not in known:
+                probe = self._executor.submit(self.probe, proxy)
+                with self._lock:
+                    self._probes.add(probe)
+                probe.add_done_callback(self._probe_done)
+
+    def _probe_done(self, probe: Future):
+        with self._lock:
+            self._probes.discard(probe)
+
+    def probe(self, proxy: str):
+        """Check whether the proxy is reachable, and how fast it is"""
+        started = self.clock()
+        try:
+            response = requests.get(self.probe_url, proxies={"http": proxy, "https": proxy},
+                                    timeout=(5, 5))
+            success = response.status_code < 400
+        except requests.exceptions.RequestException:
+            success = False
+        with self._lock:
+            self._stats_for(proxy, "").record(success, self.clock() - started)
+
+    def wait_for_probes(self):
+        """Block until all pending probes have finished"""
+        while True:
+            with self._lock:
+                probes = list(self._probes)
+            if not probes:
+                return
+            wait(probes)
+
+    def _score(self, proxy: str, domain: str) -> Optional[float]:
+        stats = self._stats.get((proxy, domain))
+        general = self._stats.get((proxy, ""))
+        if (stats is not None and not stats.alive) or (general is not None and not general.alive):
+            return None
+        if stats is not None and stats.successes + stats.failures > 0:
+            return stats.score
+        if general is not None:
+            return general.score
+        return ProxyStats().score
+
+    def best(self, url: str, exclude: Optional[Set[str]] = None) -> Optional[str]:
+        """The best scoring live proxy for the domain of the URL"""
+        domain = self.domain(url)
+        exclude = exclude or set()
+        with self._lock:
+            scored = [(score, proxy) for proxy in self._proxies if proxy not in exclude
+                      for score in [self._score(proxy, domain)] if score is not None]
+        if not scored:
+            return None
+        return max(scored)[1]
+
+    def fetch(self, url: str, **kwargs) -> requests.Response:
+        """Fetch the URL through the best available proxies. Raises a ProxyException
+           if the proxy list cannot be loaded, or no proxy delivered the page before
+           the deadline, which covers loading the list and every attempt"""
+        started = self.clock()
+        tried: Set[str] = set()
+        reloaded = False
+        while True:
+            remaining = self.deadline - (self.clock() - started)
+            if remaining <= 0:
+                break
+            self._load(remaining)
+            proxy = self.best(url, exclude=tried)
+            if proxy is None:
+                if reloaded:
+                    break
+                # every listed proxy was tried, get a fresh list
+                self._load(self.deadline - (self.clock() - started), force=True)
+                reloaded = True
+                tried.clear()
+                continue
+            tried.add(proxy)
+            timeout = min(10.0, remaining)
+            request_started = self.clock()
+            try:
+                resp = self._within(remaining, get_session_pool().get, url,
+                                    session=self._session,
+                                    proxies={"http": proxy, "https": proxy},
+                                    timeout=(timeout, timeout), **kwargs)
+            except requests.exceptions.RequestException as error:
+                logger.debug("Proxy %s failed for %s: %s", proxy, url, error)
+                self.record(proxy, url, False, self.clock() - request_started)
+                continue
+            except WaitTimeout:
+                logger.debug("Proxy %s did not deliver %s before the deadline", proxy, url)
+                self.record(proxy, url, False, self.clock() - request_started)
+                break
+            success = resp.status_code == 200
+            self.record(proxy, url, success, self.clock() - request_started)
+            if success:
+                return resp
+            logger.debug("Got response (%i) through proxy %s", resp.status_code, proxy)
+        raise ProxyException(f"No proxy could fetch {url} within {self.deadline} seconds")
+
+    def _load(self, remaining: float, force: bool = False):
+        """Refresh the proxy list within the remaining time of a fetch. Raises a
+           ProxyException if no list could be loaded"""
+        try:
+            self.refresh(force=force, timeout=remaining)
+        except WaitTimeout as error:
+            raise ProxyException(f"Proxy list not loaded within {self.deadline} seconds") \
+                from error
+        except requests.exceptions.RequestException as error:
+            raise ProxyException(f"Could not load the proxy list: {error}") from error
+
+    def close(self):
+        """Stop probing and close the connections of proxied fetches"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._fetcher.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[ProxyPool] = None
+
+
+def configure_proxy_pool(config) -> ProxyPool:
+    """(Re)create the process-wide proxy pool from the config"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+        _POOL = ProxyPool(ttl=config.proxy_list_ttl(),
+                          deadline=config.proxy_fetch_deadline(),
+                          probe_concurrency=config.proxy_probe_concurrency())
+        return _POOL
+
+
+def get_proxy_pool() -> ProxyPool:
+    """Return the process-wide proxy pool, creating a default one if needed"""
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProxyPool()
+        return _POOL
@@ -0,0 +1,191 @@
+# pylint: disable=missing-docstring
+import time
+import unittest
+
+import pytest
+import requests
+import requests_mock
+
+from flathunter.core.exceptions import ProxyException
+from flathunter.crawling import http_session, proxies
+from flathunter.crawling.proxies import ProxyPool, configure_proxy_pool
+from flathunter.testing.config import StringConfig
+
+URL = "https://www.idealista.it/affitto-case/milano-milano/"
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.content = b"<html></html>"
+
+
+class FakeSessionPool:
+    """Answers requests depending on the proxy used, and lets time pass"""
+
+    def __init__(self, clock, answers, duration=1.0, delay=0.0):
+        self.clock = clock
+        self.answers = answers
+        self.duration = duration
+        # real time each request takes
+        self.delay = delay
+        self.used = []
+        self.sessions = []
+
+    def get(self, url, session=None, *, proxies, **kwargs):  # pylint: disable=unused-argument
+        proxy = proxies["https"]
+        self.used.append(proxy)
+        self.sessions.append(session)
+        time.sleep(self.delay)
+        self.clock.now += self.duration
+        answer = self.answers.get(proxy, 200)
+        if isinstance(answer, Exception):
+            raise answer
+        return FakeResponse(answer)
+
+
+class ProxyPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.loads = 0
+        self.listed = ["1.1.1.1:80", "2.2.2.2:80", "3.3.3.3:80"]
+
+    def tearDown(self):
+        http_session._POOL = None  # pylint: disable=protected-access
+
+    def source(self):
+        self.loads += 1
+        return self.listed
+
+    def pool(self, **kwargs):
+        pool = ProxyPool(source=self.source, clock=self.clock, **kwargs)
+        pool.probe = lambda proxy: None
+        return pool
+
+    def use_session_pool(self, answers, duration=1.0, delay=0.0):
+        fake = FakeSessionPool(self.clock, answers, duration, delay)
+        http_session._POOL = fake  # pylint: disable=protected-access
+        return fake
+
+    def test_list_is_cached_until_ttl(self):
+        pool = self.pool(ttl=600)
+        pool.refresh()
+        self.clock.now = 300
+        pool.refresh()
+        self.assertEqual(self.loads, 1)
+        self.clock.now = 601
+        pool.refresh()
+        self.assertEqual(self.loads, 2)
+
+    def test_best_prefers_fast_reliable_proxies(self):
+        pool = self.pool()
+        pool.refresh()
+        pool.record("1.1.1.1:80", URL, True, 4.0)
+        pool.record("2.2.2.2:80", URL, True, 0.5)
+        pool.record("3.3.3.3:80", URL, False, 0.1)
+        self.assertEqual(pool.best(URL), "2.2.2.2:80")
+
+    def test_scores_are_kept_per_domain(self):
+        pool = self.pool()
+        pool.refresh()
+        pool.record("2.2.2.2:80", "https://www.example.com/", True, 0.5)
+        pool.record("2.2.2.2:80", URL, False, 0.5)
+        pool.record("1.1.1.1:80", URL, True, 2.0)
+        self.assertEqual(pool.best(URL), "1.1.1.1:80")
+        self.assertEqual(pool.best("https://www.example.com/"), "2.2.2.2:80")
+
+    def test_dead_proxies_are_skipped(self):
+        pool = self.pool()
+        pool.refresh()
+        for _ in range(3):
+            pool.record("1.1.1.1:80", URL, False, 0.1)
+        self.assertNotEqual(pool.best(URL, exclude={"3.3.3.3:80"}), "1.1.1.1:80")
+
+    def test_fetch_moves_on_to_next_proxy(self):
+        pool = self.pool()
+        pool.refresh()
+        pool.record("1.1.1.1:80", URL, True, 0.1)
+        fake = self.use_session_pool({"1.1.1.1:80": requests.exceptions.ConnectTimeout(),
+                                      "2.2.2.2:80": 403})
+        self.assertEqual(pool.fetch(URL).status_code, 200)
+        self.assertEqual(fake.used[0], "1.1.1.1:80")
+        self.assertEqual(fake.used[-1], "3.3.3.3:80")
+        # proxied fetches do not share the pooled session of the host
+        self.assertEqual({id(session) for session in fake.sessions}, {id(pool._session)})  # pylint: disable=protected-access
+
+    def test_fetch_gives_up_at_deadline(self):
+        pool = self.pool(deadline=30)
+        self.listed = [f"10.0.0.{i}:80" for i in range(100)]
+        fake = self.use_session_pool({proxy: 503 for proxy in self.listed}, duration=10.0)
+        with pytest.raises(ProxyException):
+            pool.fetch(URL)
+        self.assertEqual(len(fake.used), 3)
+
+    def test_failed_list_load_is_retried(self):
+        pool = self.pool()
+        self.use_session_pool({})
+
+        def failing_source():
+            self.loads += 1
+            raise requests.exceptions.ConnectionError("list unavailable")
+
+        pool.source = failing_source
+        with pytest.raises(ProxyException):
+            pool.fetch(URL)
+        pool.source = self.source
+        self.assertEqual(pool.fetch(URL).status_code, 200)
+        self.assertEqual(self.loads, 2)
+
+    def test_deadline_covers_slow_list_and_fetch(self):
+        def slow_source():
+            time.sleep(1)
+            return self.listed
+
+        pool = ProxyPool(source=slow_source, deadline=0.2)
+        pool.probe = lambda proxy: None
+        started = time.monotonic()
+        with pytest.raises(ProxyException):
+            pool.fetch(URL)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        pool.source = self.source
+        self.use_session_pool({}, delay=1.0)
+        started = time.monotonic()
+        with pytest.raises(ProxyException):
+            pool.fetch(URL)
+        self.assertLess(time.monotonic() - started, 0.5)
+        pool.close()
+
+    @requests_mock.Mocker()
+    def test_new_proxies_are_probed(self, m):
+        m.get("https://www.gstatic.com/generate_204", status_code=204)
+        pool = ProxyPool(source=self.source)
+        pool.refresh()
+        pool.wait_for_probes()
+        for proxy in self.listed:
+            self.assertEqual(pool._stats[(proxy, "")].successes, 1)  # pylint: disable=protected-access
+        # finished probes are not kept
+        self.assertEqual(pool._probes, set())  # pylint: disable=protected-access
+        pool.close()
+
+    def test_configure_from_config(self):
+        pool = configure_proxy_pool(StringConfig(string="""
+proxy:
+  list_ttl: 60
+  fetch_deadline: 45
+"""))
+        self.assertEqual(pool.ttl, 60)
+        self.assertEqual(pool.deadline, 45)
+        pool.close()
+        proxies._POOL = None  # pylint: disable=protected-access
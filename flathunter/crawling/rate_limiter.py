@@ -0,0 +1,144 @@
+"""Per-domain politeness scheduling for all outgoing fetches. Every site gets a
+token bucket; fetches wait for a token (plus some random jitter), and the rate
+of a site is cut back automatically when it answers with 429 or 403"""
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from flathunter.core.logging import logger
+
+THROTTLE_STATUS_CODES = (403, 429)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations. The token count may become
+       negative, so that concurrent callers queue up behind each other"""
+
+    def __init__(self, rate: Optional[float], burst: float, clock: Callable[[], float]):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it"""
+        now = self.clock()
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate is None:
+            return wait
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / self.rate)
+        return wait
+
+
+class DomainRateLimiter:
+    """Keeps one token bucket per host and adapts its rate to throttling responses"""
+
+    # Rate used once a site without a configured limit starts throttling us
+    FALLBACK_RATE = 1.0
+    # Lowest rate we back off to, in requests per second
+    MIN_RATE = 0.05
+    # Share of the configured rate that is restored after every successful fetch
+    RECOVERY_STEP = 0.1
+    # Longest pause we honour from a Retry-After header
+    MAX_RETRY_AFTER = 300.0
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 burst: float = 1,
+                 jitter: float = 0.0,
+                 domains: Optional[Dict[str, Dict]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.domains = domains or {}
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        """Host part of a URL"""
+        return urlparse(url).netloc.lower()
+
+    def configured_rate(self, host: str) -> Optional[float]:
+        """Requests per second configured for the host (None is unlimited)"""
+        return self.domains.get(host, {}).get('requests_per_second', self.rate)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            burst = self.domains.get(host, {}).get('burst', self.burst)
+            bucket = TokenBucket(self.configured_rate(host), burst, self.clock)
+            self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url: str):
+        """Block until a fetch of the URL is allowed"""
+        host = self.host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            wait = bucket.reserve()
+            rate = bucket.rate
+        if rate is not None and self.jitter > 0:
+            wait += random.uniform(0, self.jitter / rate)
+        if wait > 0:
+            logger.debug("Rate limit: waiting %.2fs before fetching from %s", wait, host)
+            self.sleep(wait)
+
+    def feedback(self, url: str, status_code: int, retry_after: Optional[str] = None):
+        """Adapt the rate of the host to the response status of a fetch"""
+        host = self.host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            configured = self.configured_rate(host)
+            if status_code in THROTTLE_STATUS_CODES:
+                current = bucket.rate if bucket.rate is not None else self.FALLBACK_RATE * 2
+                bucket.rate = max(self.MIN_RATE, current / 2)
+                bucket.tokens = min(bucket.tokens, 0)
+                if retry_after is not None and retry_after.strip().isdigit():
+                    pause = min(float(retry_after), self.MAX_RETRY_AFTER)
+                    bucket.blocked_until = max(bucket.blocked_until, self.clock() + pause)
+                logger.warning("Throttled by %s (%d): slowing down to %.2f requests/s",
+                               host, status_code, bucket.rate)
+            elif bucket.rate is not None and bucket.rate != configured and status_code < 400:
+                ceiling = configured if configured is not None else self.FALLBACK_RATE * 10
+                bucket.rate += ceiling * self.RECOVERY_STEP
+                if bucket.rate >= ceiling:
+                    bucket.rate = configured
+                    logger.info("Rate limit for %s restored", host)
+
+
+_LIMITER_LOCK = threading.Lock()
+_LIMITER: Optional[DomainRateLimiter] = None
+
+
+def configure_rate_limiter(config) -> DomainRateLimiter:
+    """(Re)create the process-wide rate limiter from the config"""
+    global _LIMITER  # pylint: disable=global-statement
+    with _LIMITER_LOCK:
+        _LIMITER = DomainRateLimiter(rate=config.rate_limit_requests_per_second(),
+                                     burst=config.rate_limit_burst(),
+                                     jitter=config.rate_limit_jitter(),
+                                     domains=config.rate_limit_domains())
+        return _LIMITER
+
+
+def get_rate_limiter() -> DomainRateLimiter:
+    """Return the process-wide rate limiter, creating an unlimited one if needed"""
+    global _LIMITER  # pylint: disable=global-statement
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = DomainRateLimiter()
+        return _LIMITER
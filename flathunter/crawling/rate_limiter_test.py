@@ -0,0 +1,129 @@
+# pylint: disable=missing-docstring
+import unittest
+
+import requests_mock
+
+from flathunter.crawling import rate_limiter
+from flathunter.crawling.http_session import HttpSessionPool
+from flathunter.crawling.rate_limiter import DomainRateLimiter, configure_rate_limiter
+from flathunter.testing.config import StringConfig
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+URL = "https://www.rightmove.co.uk/property-to-rent/find.html"
+
+
+class DomainRateLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.time = FakeClock()
+
+    def limiter(self, **kwargs):
+        return DomainRateLimiter(clock=self.time.clock, sleep=self.time.sleep, **kwargs)
+
+    def test_unlimited_by_default(self):
+        limiter = self.limiter()
+        for _ in range(10):
+            limiter.acquire(URL)
+        self.assertEqual(self.time.slept, [])
+
+    def test_rate_is_enforced_after_burst(self):
+        limiter = self.limiter(rate=2, burst=2)
+        for _ in range(4):
+            limiter.acquire(URL)
+        self.assertEqual(self.time.slept, [0.5, 0.5])
+
+    def test_domains_are_independent(self):
+        limiter = self.limiter(rate=1, burst=1)
+        limiter.acquire(URL)
+        limiter.acquire("https://www.zoopla.co.uk/to-rent/")
+        self.assertEqual(self.time.slept, [])
+
+    def test_domain_overrides(self):
+        limiter = self.limiter(rate=10, burst=1,
+                               domains={"www.rightmove.co.uk": {"requests_per_second": 0.5}})
+        limiter.acquire(URL)
+        limiter.acquire(URL)
+        self.assertEqual(self.time.slept, [2.0])
+
+    def test_throttling_slows_down_unlimited_site(self):
+        limiter = self.limiter()
+        limiter.feedback(URL, 429)
+        limiter.acquire(URL)
+        limiter.acquire(URL)
+        self.assertEqual(self.time.slept, [1.0, 1.0])
+
+    def test_throttling_halves_configured_rate(self):
+        limiter = self.limiter(rate=2, burst=1)
+        limiter.feedback(URL, 403)
+        self.assertEqual(limiter._bucket("www.rightmove.co.uk").rate, 1)  # pylint: disable=protected-access
+
+    def test_retry_after_is_honoured(self):
+        limiter = self.limiter()
+        limiter.feedback(URL, 429, retry_after="12")
+        limiter.acquire(URL)
+        self.assertEqual(self.time.slept, [12.0])
+
+    def test_rate_recovers_after_successful_fetches(self):
+        limiter = self.limiter(rate=2, burst=1)
+        limiter.feedback(URL, 429)
+        for _ in range(6):
+            limiter.feedback(URL, 200)
+        self.assertEqual(limiter._bucket("www.rightmove.co.uk").rate, 2)  # pylint: disable=protected-access
+
+    def test_configure_from_config(self):
+        config = StringConfig(string="""
+rate_limit:
+  requests_per_second: 0.5
+  burst: 3
+  jitter: 0.2
+  domains:
+    www.zoopla.co.uk:
+      requests_per_second: 0.2
+""")
+        try:
+            limiter = configure_rate_limiter(config)
+            self.assertEqual(limiter.rate, 0.5)
+            self.assertEqual(limiter.burst, 3)
+            self.assertEqual(limiter.configured_rate("www.zoopla.co.uk"), 0.2)
+            self.assertEqual(limiter.configured_rate("www.rightmove.co.uk"), 0.5)
+        finally:
+            rate_limiter._LIMITER = None  # pylint: disable=protected-access
+
+
+class SessionPoolFeedbackTest(unittest.TestCase):
+
+    @requests_mock.Mocker()
+    def test_pooled_fetches_report_throttling(self, m):
+        limiter = DomainRateLimiter(sleep=lambda _: None)
+        rate_limiter._LIMITER = limiter  # pylint: disable=protected-access
+        try:
+            m.get(URL, status_code=429)
+            HttpSessionPool().get(URL)
+            self.assertIsNotNone(limiter._bucket("www.rightmove.co.uk").rate)  # pylint: disable=protected-access
+        finally:
+            rate_limiter._LIMITER = None  # pylint: disable=protected-access
+
+    @requests_mock.Mocker()
+    def test_proxied_fetches_do_not_throttle_the_host(self, m):
+        limiter = DomainRateLimiter(sleep=lambda _: None)
+        rate_limiter._LIMITER = limiter  # pylint: disable=protected-access
+        try:
+            m.get(URL, status_code=429)
+            HttpSessionPool().get(URL, proxies={"https": "1.1.1.1:80"})
+            self.assertIsNone(limiter._bucket("www.rightmove.co.uk").rate)  # pylint: disable=protected-access
+        finally:
+            rate_limiter._LIMITER = None  # pylint: disable=protected-access
@@ -0,0 +1,44 @@
+"""Routing of URLs to the crawler responsible for them"""
+import re
+from typing import Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+RT = TypeVar("RT")
+
+
+class CrawlerRouter(Generic[RT]):
+    """Maps URLs to a target (a crawler, or a crawler class) by host.
+
+    Crawler URL patterns only ever look at the scheme and host of a URL, so the
+    first URL seen for a host is matched against the patterns once, and every
+    later URL of that host is resolved with a dictionary lookup."""
+
+    def __init__(self, routes: Iterable[Tuple[re.Pattern, RT]]):
+        self.routes: List[Tuple[re.Pattern, RT]] = list(routes)
+        self._by_host: Dict[str, Optional[RT]] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Scheme and host of a URL"""
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def route(self, url: str) -> Optional[RT]:
+        """Return the target responsible for the URL, or None"""
+        key = self.host_key(url)
+        if key in self._by_host:
+            return self._by_host[key]
+        target = next((target for pattern, target in self.routes
+                       if pattern.search(url)), None)
+        self._by_host[key] = target
+        return target
+
+    def targets_for(self, urls: Iterable[str]) -> List[RT]:
+        """Distinct targets needed to handle the given URLs, in registration order"""
+        needed = {id(target) for target in map(self.route, urls) if target is not None}
+        result: List[RT] = []
+        for _, target in self.routes:
+            if id(target) in needed:
+                needed.discard(id(target))
+                result.append(target)
+        return result
@@ -0,0 +1,102 @@
+# pylint: disable=missing-docstring
+import re
+import unittest
+from typing import cast
+
+from flathunter.config.crawler_factory import get_default_crawler_factory
+from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.crawler.uk.zoopla import Zoopla
+from flathunter.crawling.router import CrawlerRouter
+from flathunter.testing.config import StringConfig
+from flathunter.testing.dummy_crawler import DummyCrawler
+
+
+class CountingPattern:
+    """Wraps a pattern and counts how often it is searched"""
+
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+        self.calls = 0
+
+    def search(self, url):
+        self.calls += 1
+        return self.pattern.search(url)
+
+
+class CrawlerRouterTest(unittest.TestCase):
+
+    def test_routes_by_pattern(self):
+        router = CrawlerRouter([(re.compile(r'https://www\.rightmove\.co\.uk'), "rightmove"),
+                                (re.compile(r'https://www\.zoopla\.co\.uk'), "zoopla")])
+        self.assertEqual(router.route("https://www.zoopla.co.uk/to-rent/"), "zoopla")
+        self.assertEqual(router.route("https://www.rightmove.co.uk/find.html"), "rightmove")
+        self.assertIsNone(router.route("https://www.example.com/"))
+
+    def test_patterns_are_matched_once_per_host(self):
+        pattern = CountingPattern(r'https://www\.rightmove\.co\.uk')
+        router = CrawlerRouter([(cast(re.Pattern, pattern), "rightmove")])
+        for i in range(50):
+            self.assertEqual(router.route(f"https://www.rightmove.co.uk/properties/{i}"),
+                             "rightmove")
+        self.assertEqual(pattern.calls, 1)
+
+    def test_targets_for_keeps_registration_order(self):
+        router = CrawlerRouter([(re.compile(r'https://a\.com'), "a"),
+                                (re.compile(r'https://b\.com'), "b"),
+                                (re.compile(r'https://c\.com'), "c")])
+        self.assertEqual(router.targets_for(["https://c.com/1", "https://a.com/2",
+                                             "https://c.com/3"]), ["a", "c"])
+
+
+class RoutingConfigTest(unittest.TestCase):
+
+    CONFIG = """
+urls:
+  - https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=REGION%5E93917
+  - https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=REGION%5E87490
+"""
+
+    def test_only_configured_crawlers_are_created(self):
+        config = StringConfig(string=self.CONFIG)
+        config.init_searchers(only_configured=True)
+        self.assertEqual([type(s) for s in config.searchers()], [Rightmove])
+
+    def test_every_portal_url_routes_to_its_crawler(self):
+        urls = {
+            "Immobilienscout": "https://www.immobilienscout24.de/Suche/de/berlin/wohnung-mieten",
+            "WgGesucht": "https://www.wg-gesucht.de/wohnungen-in-Berlin.8.2.1.0.html",
+            "Kleinanzeigen": "https://www.kleinanzeigen.de/s-wohnung-mieten/berlin/c203l3331",
+            "Immowelt": "https://www.immowelt.de/liste/berlin/wohnungen/mieten",
+            "VrmImmo": "https://vrm-immo.de/suchergebnisse?l=Darmstadt",
+            "Zoopla": "https://www.zoopla.co.uk/to-rent/property/london/",
+            "Rightmove": "https://www.rightmove.co.uk/property-to-rent/find.html",
+            "Immobiliare": "https://www.immobiliare.it/affitto-case/milano/",
+            "Subito": "https://www.subito.it/annunci-lombardia/affitto/appartamenti/",
+            "Idealista": "https://www.idealista.it/affitto-case/milano-milano/",
+        }
+        config = StringConfig(string="urls:\n" + "".join(f"  - {url}\n"
+                                                          for url in urls.values()))
+        config.init_searchers(only_configured=True)
+        self.assertEqual(sorted(s.get_name() for s in config.searchers()), sorted(urls))
+        for name, url in urls.items():
+            crawler = config.crawler_for_url(url)
+            assert crawler is not None, url
+            self.assertEqual(crawler.get_name(), name)
+
+    def test_all_crawlers_are_created_by_default(self):
+        config = StringConfig(string=self.CONFIG)
+        config.init_searchers()
+        self.assertIn(Zoopla, [type(s) for s in config.searchers()])
+
+    def test_crawler_for_url(self):
+        config = StringConfig(string=self.CONFIG)
+        crawler = DummyCrawler()
+        config.set_searchers([crawler])
+        self.assertIs(config.crawler_for_url("https://www.example.com/expose/1"), crawler)
+        self.assertIsNone(config.crawler_for_url("https://www.rightmove.co.uk/properties/1"))
+
+    def test_factory_get_crawler_for_url(self):
+        factory = get_default_crawler_factory()
+        crawler = factory.get_crawler_for_url("https://www.zoopla.co.uk/to-rent/",
+                                              StringConfig(string=self.CONFIG))
+        self.assertIsInstance(crawler, Zoopla)
@@ -18,6 +18,11 @@ class Expose:
     durations: Optional[str] = None
     created_at: Optional[str] = None
 
+    # Numbers parsed from price, size and rooms by the normalizer
+    price_pcm: Optional[float] = None
+    size_sqm: Optional[float] = None
+    rooms_count: Optional[float] = None
+
     # AI/LLM enrichment fields
     ai_score: Optional[float] = None
     ai_reasoning: Optional[str] = None
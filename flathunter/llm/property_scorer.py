@@ -79,23 +79,17 @@ class PropertyScorerProcessor(Processor):
 
         return expose
 
-    def process_exposes(self, exposes):
-        """Process multiple exposes concurrently for speed"""
+    def process_batch(self, exposes: List[Dict]) -> List[Dict]:
+        """Score a batch of properties concurrently"""
         if not self.enabled:
-            # Return map for compatibility with base class
-            return map(lambda x: x, exposes)
+            return exposes
 
-        expose_list = list(exposes)
-
-        # Process in parallel for better performance
         try:
-            results = asyncio.run(self._process_batch_async(expose_list))
-            # Return as iterator but wrapped in map for type compatibility
-            return map(lambda x: x, results)
+            return asyncio.run(self._process_batch_async(exposes))
         except Exception as e:
             logger.error("Error in batch processing: %s", e)
             # Fall back to sequential processing
-            return map(self.process_expose, expose_list)
+            return [self.process_expose(expose) for expose in exposes]
 
     async def _process_batch_async(self, exposes: List[Dict]) -> List[Dict]:
         """Process multiple properties concurrently"""
@@ -1,7 +1,7 @@
 """Functions and classes related to sending Apprise messages"""
 import apprise
 
-from flathunter.core.abstract_notifier import Notifier
+from flathunter.core.abstract_notifier import Notifier, digests
 from flathunter.core.abstract_processor import Processor
 from flathunter.core.config import YamlConfig
 
@@ -17,26 +17,8 @@ class SenderApprise(Processor, Notifier):
 
     def process_expose(self, expose):
         """Send a message to a user describing the expose"""
-        message = (self.config.get('message') or '').format(
-            crawler=expose.get('crawler', 'N/A'),
-            title=expose.get('title', 'N/A'),
-            rooms=expose.get('rooms', 'N/A'),
-            size=expose.get('size', 'N/A'),
-            price=expose.get('price', 'N/A'),
-            url=expose.get('url', 'N/A'),
-            address=expose.get('address', 'N/A'),
-            durations=expose.get('durations', 'N/A')
-        ).strip()
-        title = (self.config.get('title') or '').format(
-            crawler=expose.get('crawler', 'N/A'),
-            title=expose.get('title', 'N/A'),
-            rooms=expose.get('rooms', 'N/A'),
-            size=expose.get('size', 'N/A'),
-            price=expose.get('price', 'N/A'),
-            url=expose.get('url', 'N/A'),
-            address=expose.get('address', 'N/A'),
-            durations=expose.get('durations', 'N/A')
-        ).strip()
+        message = self.__format('message', expose)
+        title = self.__format('title', expose)
         images = expose.get("images", [])[: self.__image_limit]
         image = expose.get("image")
         attach = (
@@ -47,6 +29,32 @@ class SenderApprise(Processor, Notifier):
         self.__send_msg(message, title, attach)
         return expose
 
+    def supports_batches(self) -> bool:
+        """True if batches of exposes are sent as digests"""
+        return self.config.notification_digest()
+
+    def process_batch(self, exposes):
+        """Send one message describing a batch of exposes"""
+        if not self.config.notification_digest():
+            return super().process_batch(exposes)
+        messages = [self.__format('message', expose) for expose in exposes]
+        for digest in digests(messages):
+            self.__send_msg(message=digest, title=None, attach=None)
+        return exposes
+
+    def __format(self, template: str, expose) -> str:
+        """Fill in the configured `template` ('message' or 'title') for the expose"""
+        return (self.config.get(template) or '').format(
+            crawler=expose.get('crawler', 'N/A'),
+            title=expose.get('title', 'N/A'),
+            rooms=expose.get('rooms', 'N/A'),
+            size=expose.get('size', 'N/A'),
+            price=expose.get('price', 'N/A'),
+            url=expose.get('url', 'N/A'),
+            address=expose.get('address', 'N/A'),
+            durations=expose.get('durations', 'N/A')
+        ).strip()
+
     def notify(self, message: str):
         """Send the given message to users"""
         self.__send_msg(message=message, title=None, attach=None)
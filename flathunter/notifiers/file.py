@@ -23,6 +23,10 @@ class SenderFile(Processor, Notifier):
 
     def process_expose(self, expose):
         """Save expose details to file"""
+        return self.process_batch([expose])[0]
+
+    def process_batch(self, exposes):
+        """Save the details of a batch of exposes to file, with one write"""
         # Load existing data
         try:
             with open(self.output_path, 'r', encoding='utf-8') as f:
@@ -30,19 +34,23 @@ class SenderFile(Processor, Notifier):
         except (json.JSONDecodeError, FileNotFoundError):
             data = []
 
-        # Add timestamp
-        expose_with_timestamp = {
-            'timestamp': datetime.now().isoformat(),
-            **expose
-        }
-
-        # Append new expose
-        data.append(expose_with_timestamp)
+        # Append new exposes, with a timestamp
+        for expose in exposes:
+            data.append({
+                'timestamp': datetime.now().isoformat(),
+                **expose
+            })
 
         # Save back to file
         with open(self.output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
+        for expose in exposes:
+            self._print_expose(expose)
+        return exposes
+
+    def _print_expose(self, expose):
+        """Show the expose details on the console"""
         print("\n" + "="*60)
         print("NEW LISTING FOUND AND SAVED!")
         print("="*60)
@@ -80,8 +88,6 @@ class SenderFile(Processor, Notifier):
         print(f"Saved to: {self.output_path.absolute()}")
         print(f"{'='*60}\n")
 
-        return expose
-
     def notify(self, message: str):
         """Save a notification message to file"""
         try:
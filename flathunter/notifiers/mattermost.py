@@ -3,7 +3,7 @@ import json
 
 import requests
 
-from flathunter.core.abstract_notifier import Notifier
+from flathunter.core.abstract_notifier import Notifier, digests
 from flathunter.core.abstract_processor import Processor
 from flathunter.core.logging import logger
 
@@ -11,13 +11,34 @@ from flathunter.core.logging import logger
 class SenderMattermost(Processor, Notifier):
     """Expose processor that sends Mattermost messages"""
 
+    # Longest text Mattermost takes in one post
+    MAX_MESSAGE_LENGTH = 16383
+
     def __init__(self, config):
         self.config = config
         self.webhook_url = self.config.mattermost_webhook_url()
 
     def process_expose(self, expose):
         """Send a message to a user describing the expose"""
-        message = self.config.message_format().format(
+        self.notify(self.__get_text_message(expose))
+        return expose
+
+    def supports_batches(self) -> bool:
+        """True if batches of exposes are sent as digests"""
+        return self.config.notification_digest()
+
+    def process_batch(self, exposes):
+        """Send messages to the webhook describing a batch of exposes together"""
+        if not self.config.notification_digest():
+            return super().process_batch(exposes)
+        messages = [self.__get_text_message(expose) for expose in exposes]
+        for digest in digests(messages, self.MAX_MESSAGE_LENGTH):
+            self.notify(digest)
+        return exposes
+
+    def __get_text_message(self, expose) -> str:
+        """Build the text message describing the expose"""
+        return self.config.message_format().format(
             title=expose['title'],
             rooms=expose['rooms'],
             size=expose['size'],
@@ -26,8 +47,6 @@ class SenderMattermost(Processor, Notifier):
             address=expose['address'],
             durations="" if 'durations' not in expose else expose[
                 'durations']).strip()
-        self.notify(message)
-        return expose
 
     def notify(self, message):
         """Send message to the mattermost webhook"""
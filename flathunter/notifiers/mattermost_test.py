@@ -17,3 +17,17 @@ class SenderMattermostTest(unittest.TestCase):
         m.post('http://example.com/dummy_webhook_url')
         self.assertEqual(None, sender.notify("result"),
                          "Expected message to be sent")
+
+    @requests_mock.Mocker()
+    def test_batch_is_sent_as_digest(self, m):
+        sender = SenderMattermost(YamlConfig({"mattermost": {
+            "webhook_url": "http://example.com/dummy_webhook_url"},
+            "message": "{title} ({rooms} rooms, {price})",
+            "notifications": {"digest": True}}))
+        exposes = [{'title': f"flat {i}", 'rooms': 2, 'size': 50, 'price': 1000,
+                    'url': 'https://example.com', 'address': 'High Street'} for i in range(3)]
+
+        m.post('http://example.com/dummy_webhook_url')
+        self.assertEqual(exposes, sender.process_batch(exposes))
+        self.assertEqual(1, m.call_count)
+        self.assertIn("flat 2", m.last_request.json()['text'])
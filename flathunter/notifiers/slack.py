@@ -1,10 +1,10 @@
 """Functions and classes related to sending Slack messages"""
 import json
-from typing import Dict
+from typing import Dict, List
 
 import requests
 
-from flathunter.core.abstract_notifier import Notifier
+from flathunter.core.abstract_notifier import Notifier, digests
 from flathunter.core.abstract_processor import Processor
 from flathunter.core.config import YamlConfig
 from flathunter.core.logging import logger
@@ -13,13 +13,34 @@ from flathunter.core.logging import logger
 class SenderSlack(Processor, Notifier):
     """Expose processor that sends Slack messages"""
 
+    # Longest text Slack shows in one message
+    MAX_MESSAGE_LENGTH = 40000
+
     def __init__(self, config: YamlConfig) -> None:
         self.config = config
         self.webhook_url = self.config.slack_webhook_url()
 
     def process_expose(self, expose: Dict) -> Dict:
         """Send a message to a Slack channel describing the expose"""
-        message = self.config.message_format().format(
+        self.notify(self.__get_text_message(expose))
+        return expose
+
+    def supports_batches(self) -> bool:
+        """True if batches of exposes are sent as digests"""
+        return self.config.notification_digest()
+
+    def process_batch(self, exposes: List[Dict]) -> List[Dict]:
+        """Send messages to a Slack channel describing a batch of exposes together"""
+        if not self.config.notification_digest():
+            return super().process_batch(exposes)
+        messages = [self.__get_text_message(expose) for expose in exposes]
+        for digest in digests(messages, self.MAX_MESSAGE_LENGTH):
+            self.notify(digest)
+        return exposes
+
+    def __get_text_message(self, expose: Dict) -> str:
+        """Build the text message describing the expose"""
+        return self.config.message_format().format(
             title=expose['title'],
             rooms=expose['rooms'],
             size=expose['size'],
@@ -28,8 +49,6 @@ class SenderSlack(Processor, Notifier):
             address=expose['address'],
             durations="" if 'durations' not in expose else expose[
                 'durations']).strip()
-        self.notify(message)
-        return expose
 
     def notify(self, message: str) -> None:
         """Send message to the Slack webhook"""
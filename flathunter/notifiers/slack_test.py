@@ -17,3 +17,31 @@ class SenderSlackTest(unittest.TestCase):
         m.post("http://hooks.slack.com/dummy_webhook_url")
         self.assertEqual(None, sender.notify("result"),
                          "Expected message to be sent")
+
+    @requests_mock.Mocker()
+    def test_one_message_per_expose_without_digest(self, m):
+        sender = SenderSlack(YamlConfig({"slack": {
+            "webhook_url": "http://hooks.slack.com/dummy_webhook_url"},
+            "message": "{title} ({rooms} rooms, {price})"}))
+        exposes = [{'title': f"flat {i}", 'rooms': 2, 'size': 50, 'price': 1000,
+                    'url': 'https://example.com', 'address': 'High Street'} for i in range(3)]
+
+        m.post("http://hooks.slack.com/dummy_webhook_url")
+        self.assertFalse(sender.supports_batches())
+        self.assertEqual(exposes, list(sender.process_exposes(exposes)))
+        self.assertEqual(3, m.call_count)
+
+    @requests_mock.Mocker()
+    def test_batch_is_sent_as_digest(self, m):
+        sender = SenderSlack(YamlConfig({"slack": {
+            "webhook_url": "http://hooks.slack.com/dummy_webhook_url"},
+            "message": "{title} ({rooms} rooms, {price})",
+            "notifications": {"digest": True}}))
+        exposes = [{'title': f"flat {i}", 'rooms': 2, 'size': 50, 'price': 1000,
+                    'url': 'https://example.com', 'address': 'High Street'} for i in range(3)]
+
+        m.post("http://hooks.slack.com/dummy_webhook_url")
+        self.assertEqual(exposes, list(sender.process_exposes(exposes)))
+        self.assertEqual(1, m.call_count)
+        text = m.last_request.json()['text']
+        self.assertEqual(3, text.count("flat "))
@@ -5,7 +5,7 @@ from typing import List, Dict, Optional
 
 import requests
 
-from flathunter.core.abstract_notifier import Notifier
+from flathunter.core.abstract_notifier import Notifier, digests
 from flathunter.core.abstract_processor import Processor
 from flathunter.core.config import YamlConfig
 from flathunter.core.exceptions import BotBlockedException
@@ -17,6 +17,9 @@ from flathunter.utils.list import chunk_list
 class SenderTelegram(Processor, Notifier):
     """Expose processor that sends Telegram messages"""
 
+    # Longest text Telegram takes in one message
+    MAX_MESSAGE_LENGTH = 4096
+
     def __init__(self, config: YamlConfig, receivers=None):
         self.config = config
         self.bot_token = self.config.telegram_bot_token()
@@ -39,6 +42,19 @@ class SenderTelegram(Processor, Notifier):
         )
         return expose
 
+    def supports_batches(self) -> bool:
+        """True if batches of exposes are sent as digests"""
+        return self.config.notification_digest()
+
+    def process_batch(self, exposes):
+        """Send messages to the users describing a batch of exposes together"""
+        if not self.config.notification_digest():
+            return super().process_batch(exposes)
+        messages = [self.__get_text_message(expose) for expose in exposes]
+        for digest in digests(messages, self.MAX_MESSAGE_LENGTH):
+            self.__broadcast(self.receiver_ids, digest, None)
+        return exposes
+
     def __broadcast(self,
                     receivers: List[int],
                     message: str,
@@ -2,6 +2,7 @@
 import json
 import unittest
 import datetime
+from urllib.parse import parse_qs
 
 from requests_mock import Mocker
 from flathunter.testing.request_matcher import RequestCounter
@@ -115,4 +116,46 @@ class SenderTelegramTest(unittest.TestCase):
         self.assertEqual(None, sender.notify("result"), "Expected no message to be sent")
         after = datetime.datetime.now()
 
-        self.assertEqual(2, (after - before).seconds)
\ No newline at end of file
+        self.assertEqual(2, (after - before).seconds)
+
+    @Mocker()
+    def test_batch_is_sent_as_digest(self, m: Mocker):
+        c = StringConfig(string=json.dumps(
+            {"telegram": {"bot_token": "dummy_token", "receiver_ids": [1234567, 7654321],
+                          "notify_with_images": "true"},
+             "notifications": {"digest": True}}
+        ))
+        sender = SenderTelegram(config=c)
+        exposes = [{"title": f"flat {i}", "images": ["https://example.com"]} for i in range(3)]
+
+        messages = RequestCounter()
+        media_groups = RequestCounter()
+        m.post('https://api.telegram.org/botdummy_token/sendMessage',
+               text='{"ok":true,"result":{"message_id":456}}', additional_matcher=messages.count)
+        m.post('https://api.telegram.org/botdummy_token/sendMediaGroup',
+               text='{"ok":true,"result":{"message_id":456}}',
+               additional_matcher=media_groups.count)
+
+        self.assertTrue(sender.supports_batches())
+        self.assertEqual(exposes, list(sender.process_exposes(exposes)))
+        self.assertEqual(2, messages.i)  # one digest per receiver
+        self.assertEqual(0, media_groups.i)
+        text = parse_qs(m.request_history[0].text)['text'][0]
+        self.assertIn("flat 0", text)
+        self.assertIn("flat 2", text)
+
+    @Mocker()
+    def test_long_digests_are_split(self, m: Mocker):
+        c = StringConfig(string=json.dumps(
+            {"telegram": {"bot_token": "dummy_token", "receiver_ids": [1234567]},
+             "notifications": {"digest": True}}
+        ))
+        sender = SenderTelegram(config=c)
+        exposes = [{"title": str(i) * 1500} for i in range(5)]
+
+        m.post('https://api.telegram.org/botdummy_token/sendMessage',
+               text='{"ok":true,"result":{"message_id":456}}')
+        sender.process_batch(exposes)
+
+        # The default message format takes about 100 characters besides the title
+        self.assertEqual(3, m.call_count)
@@ -1,5 +1,6 @@
 """Storage back-end implementation using Google Cloud Firestore"""
 import datetime
+import hashlib
 import pytz
 import firebase_admin
 from firebase_admin import credentials
@@ -9,6 +10,9 @@ from google.cloud.firestore_v1.base_query import BaseQuery
 from flathunter.core.logging import logger
 from flathunter.core.exceptions import PersistenceException
 
+# Maximum number of writes in a Firestore batch
+WRITE_BATCH_SIZE = 500
+
 
 class GoogleCloudIdMaintainer:
     """Storage back-end - implementation of IdMaintainer API"""
@@ -35,6 +39,27 @@ class GoogleCloudIdMaintainer:
         doc = self.database.collection('processed').document(str(expose_id))
         return doc.get().exists
 
+    def processed_ids(self, expose_ids):
+        """Returns the set of the given IDs that have already been marked as
+           processed, read with a single request"""
+        expose_ids = list(expose_ids)
+        if not expose_ids:
+            return set()
+        collection = self.database.collection('processed')
+        found = {doc.id for doc in self.database.get_all(
+            [collection.document(str(expose_id)) for expose_id in expose_ids]) if doc.exists}
+        return {expose_id for expose_id in expose_ids if str(expose_id) in found}
+
+    def mark_processed_many(self, expose_ids):
+        """Mark exposes as processed, in batched writes"""
+        logger.debug('mark_processed_many(%d IDs)', len(expose_ids))
+        collection = self.database.collection('processed')
+        for start in range(0, len(expose_ids), WRITE_BATCH_SIZE):
+            batch = self.database.batch()
+            for expose_id in expose_ids[start:start + WRITE_BATCH_SIZE]:
+                batch.set(collection.document(str(expose_id)), {'id': expose_id})
+            batch.commit()
+
     def save_expose(self, expose):
         """Writes an expose to the storage backend"""
         record = expose.copy()
@@ -43,6 +68,18 @@ class GoogleCloudIdMaintainer:
         self.database.collection('exposes').document(
             str(expose['id'])).set(record)
 
+    def save_exposes(self, exposes):
+        """Writes exposes to the storage backend, in batched writes"""
+        collection = self.database.collection('exposes')
+        for start in range(0, len(exposes), WRITE_BATCH_SIZE):
+            batch = self.database.batch()
+            for expose in exposes[start:start + WRITE_BATCH_SIZE]:
+                record = expose.copy()
+                record.update({'created_at': pytz.utc.localize(datetime.datetime.now()),
+                               'created_sort': (0 - datetime.datetime.now().timestamp())})
+                batch.set(collection.document(str(expose['id'])), record)
+            batch.commit()
+
     def get_exposes_since(self, min_datetime):
         """Returns all exposes since the supplied datetime"""
         localized_datetime = min_datetime.replace(tzinfo=pytz.UTC)
@@ -88,6 +125,20 @@ class GoogleCloudIdMaintainer:
                 res.append((int(doc.id), settings))
         return res
 
+    def get_watermark(self, search_url):
+        """Returns the IDs seen at the last crawl of a search URL, newest first"""
+        key = hashlib.sha1(search_url.encode('utf-8')).hexdigest()
+        doc = self.database.collection('watermarks').document(key).get().to_dict()
+        if doc is None:
+            return []
+        return doc['ids']
+
+    def save_watermark(self, search_url, expose_ids):
+        """Saves the IDs seen at the latest crawl of a search URL, newest first"""
+        key = hashlib.sha1(search_url.encode('utf-8')).hexdigest()
+        self.database.collection('watermarks').document(key).set(
+            {'url': search_url, 'ids': list(expose_ids), 'updated': datetime.datetime.now()})
+
     def get_last_run_time(self):
         """Returns the datetime of the last run"""
 
@@ -104,3 +155,19 @@ class GoogleCloudIdMaintainer:
         time = datetime.datetime.now()
         self.database.collection('executions').add({'timestamp': time})
         return time
+
+    def save_run_report(self, report):
+        """Saves the measurements of a hunt, as returned by RunReport.to_dict"""
+        self.database.collection('run_reports').add(
+            {'timestamp': datetime.datetime.now(), 'report': report})
+
+    def get_run_reports(self, count=10):
+        """Loads the reports of the most recent hunts, newest first"""
+        docs = self.database.collection('run_reports').order_by(
+            'timestamp', direction=BaseQuery.DESCENDING).limit(count).stream()
+        reports = []
+        for doc in docs:
+            doc_as_dict = doc.to_dict()
+            if doc_as_dict is not None:
+                reports.append(doc_as_dict['report'])
+        return reports
@@ -4,6 +4,7 @@ import re
 from typing import Dict
 import pytest
 from mockfirestore import MockFirestore
+from mockfirestore.transaction import Transaction
 
 from flathunter.persistence.googlecloud_idmaintainer import GoogleCloudIdMaintainer
 from flathunter.app.hunter import Hunter
@@ -13,10 +14,17 @@ from flathunter.testing.dummy_crawler import DummyCrawler
 from flathunter.testing.util import count
 from flathunter.testing.config import StringConfig
 
+class BatchingMockFirestore(MockFirestore):
+
+    def batch(self):
+        batch = Transaction(self)
+        batch._begin()  # pylint: disable=protected-access
+        return batch
+
 class MockGoogleCloudIdMaintainer(GoogleCloudIdMaintainer):
 
     def __init__(self):
-        self.database = MockFirestore()
+        self.database = BatchingMockFirestore()
 
 CONFIG_WITH_FILTERS = """
 urls:
@@ -34,6 +42,11 @@ def test_read_after_write(id_watch):
     id_watch.mark_processed(12345)
     assert id_watch.is_processed(12345)
 
+def test_processed_ids_are_read_and_written_in_batches(id_watch):
+    id_watch.mark_processed_many([1, 2, 3])
+    assert id_watch.processed_ids([2, 3, 4]) == {2, 3}
+    assert id_watch.processed_ids([]) == set()
+
 def test_get_last_run_time_none_by_default(id_watch):
     assert id_watch.get_last_run_time() is None
 
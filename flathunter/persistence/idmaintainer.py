@@ -6,6 +6,10 @@ import json
 
 from flathunter.core.logging import logger
 from flathunter.core.abstract_processor import Processor
+from flathunter.persistence.seen_index import OFF, seen_index_for
+
+# Number of IDs per query, below SQLite's limit on the number of parameters
+ID_BATCH_SIZE = 500
 
 __author__ = "Nody"
 __version__ = "0.1"
@@ -25,12 +29,20 @@ class SaveAllExposesProcessor(Processor):
         self.id_watch.save_expose(expose)
         return expose
 
+    def process_batch(self, exposes):
+        """Save a batch of exposes with a single write"""
+        if not hasattr(self.id_watch, 'save_exposes'):
+            return super().process_batch(exposes)
+        self.id_watch.save_exposes(exposes)
+        return exposes
+
 class IdMaintainer:
     """SQLite back-end for the database"""
 
-    def __init__(self, db_name):
+    def __init__(self, db_name, seen_index=OFF, error_rate=0.01):
         self.db_name = db_name
         self.threadlocal = threading.local()
+        self.seen = seen_index_for(self._load_processed_ids, seen_index, error_rate)
 
     def get_connection(self):
         """Connects to the SQLite database. Connections are thread-local"""
@@ -41,11 +53,16 @@ class IdMaintainer:
                 connection = self.threadlocal.connection
                 cur = self.threadlocal.connection.cursor()
                 cur.execute('CREATE TABLE IF NOT EXISTS processed (ID INTEGER)')
+                cur.execute('CREATE INDEX IF NOT EXISTS processed_id ON processed (ID)')
                 cur.execute('CREATE TABLE IF NOT EXISTS executions (timestamp timestamp)')
+                cur.execute('CREATE TABLE IF NOT EXISTS run_reports \
+                                    (timestamp timestamp, report BLOB)')
                 cur.execute('CREATE TABLE IF NOT EXISTS exposes (id INTEGER, created TIMESTAMP, \
                                     crawler STRING, details BLOB, PRIMARY KEY (id, crawler))')
                 cur.execute('CREATE TABLE IF NOT EXISTS users \
                                     (id INTEGER PRIMARY KEY, settings BLOB)')
+                cur.execute('CREATE TABLE IF NOT EXISTS watermarks \
+                                    (url STRING PRIMARY KEY, ids BLOB, updated TIMESTAMP)')
                 self.threadlocal.connection.commit()
             except lite.Error as error:
                 logger.error("Error %s:", error.args[0])
@@ -55,6 +72,8 @@ class IdMaintainer:
     def is_processed(self, expose_id):
         """Returns true if an expose has already been processed"""
         logger.debug('is_processed(%d)', expose_id)
+        if self.seen is not None:
+            return bool(self.seen.lookup([expose_id], self._query_processed_ids))
         cur = self.get_connection().cursor()
         cur.execute('SELECT id FROM processed WHERE id = ?', (expose_id,))
         row = cur.fetchone()
@@ -66,6 +85,40 @@ class IdMaintainer:
         cur = self.get_connection().cursor()
         cur.execute('INSERT INTO processed VALUES(?)', (expose_id,))
         self.get_connection().commit()
+        if self.seen is not None:
+            self.seen.add_many([expose_id])
+
+    def processed_ids(self, expose_ids):
+        """Returns the set of the given IDs that have already been processed"""
+        if self.seen is not None:
+            return self.seen.lookup(expose_ids, self._query_processed_ids)
+        return self._query_processed_ids(expose_ids)
+
+    def _query_processed_ids(self, expose_ids):
+        expose_ids = list(expose_ids)
+        found = set()
+        cur = self.get_connection().cursor()
+        for start in range(0, len(expose_ids), ID_BATCH_SIZE):
+            chunk = expose_ids[start:start + ID_BATCH_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cur.execute(f'SELECT id FROM processed WHERE id IN ({placeholders})', chunk)
+            found.update(str(row[0]) for row in cur.fetchall())
+        return {expose_id for expose_id in expose_ids if str(expose_id) in found}
+
+    def _load_processed_ids(self):
+        cur = self.get_connection().cursor()
+        cur.execute('SELECT id FROM processed')
+        return [row[0] for row in cur.fetchall()]
+
+    def mark_processed_many(self, expose_ids):
+        """Mark exposes as processed in the database, in a single transaction"""
+        logger.debug('mark_processed_many(%d IDs)', len(expose_ids))
+        cur = self.get_connection().cursor()
+        cur.executemany('INSERT INTO processed VALUES(?)',
+                        [(expose_id,) for expose_id in expose_ids])
+        self.get_connection().commit()
+        if self.seen is not None:
+            self.seen.add_many(expose_ids)
 
     def save_expose(self, expose):
         """Saves an expose to a database"""
@@ -76,6 +129,16 @@ class IdMaintainer:
                      expose['crawler'], json.dumps(expose)))
         self.get_connection().commit()
 
+    def save_exposes(self, exposes):
+        """Saves exposes to the database, in a single transaction"""
+        cur = self.get_connection().cursor()
+        cur.executemany('INSERT OR REPLACE INTO exposes(id, created, crawler, details) \
+                         VALUES (?, ?, ?, ?)',
+                        [(int(expose['id']), datetime.datetime.now(),
+                          expose['crawler'], json.dumps(expose))
+                         for expose in exposes])
+        self.get_connection().commit()
+
     def get_exposes_since(self, min_datetime):
         """Loads all exposes since the specified date"""
         def row_to_expose(row):
@@ -127,6 +190,22 @@ class IdMaintainer:
             res.append((row[0], json.loads(row[1])))
         return res
 
+    def get_watermark(self, search_url):
+        """Returns the IDs seen at the last crawl of a search URL, newest first"""
+        cur = self.get_connection().cursor()
+        cur.execute('SELECT ids FROM watermarks WHERE url = ?', (search_url,))
+        row = cur.fetchone()
+        if row is None:
+            return []
+        return json.loads(row[0])
+
+    def save_watermark(self, search_url, expose_ids):
+        """Saves the IDs seen at the latest crawl of a search URL, newest first"""
+        cur = self.get_connection().cursor()
+        cur.execute('INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)',
+                    (search_url, json.dumps(list(expose_ids)), datetime.datetime.now()))
+        self.get_connection().commit()
+
     def get_last_run_time(self):
         """Returns the time of the last hunt"""
         cur = self.get_connection().cursor()
@@ -144,6 +223,19 @@ class IdMaintainer:
         self.get_connection().commit()
         return result
 
+    def save_run_report(self, report):
+        """Saves the measurements of a hunt, as returned by RunReport.to_dict"""
+        cur = self.get_connection().cursor()
+        cur.execute('INSERT INTO run_reports VALUES (?, ?)',
+                    (datetime.datetime.now(), json.dumps(report)))
+        self.get_connection().commit()
+
+    def get_run_reports(self, count=10):
+        """Loads the reports of the most recent hunts, newest first"""
+        cur = self.get_connection().cursor()
+        cur.execute('SELECT report FROM run_reports ORDER BY timestamp DESC LIMIT ?', (count,))
+        return [json.loads(row[0]) for row in cur.fetchall()]
+
 
 # Backward compatibility adapter for repository pattern
 try:
@@ -156,8 +248,8 @@ try:
         New code should use SqliteExposeRepository directly.
         """
 
-        def __init__(self, db_name):
-            super().__init__(db_name)
+        def __init__(self, db_name, seen_index=OFF, error_rate=0.01):
+            super().__init__(db_name, seen_index, error_rate)
 
         # Delegate IdMaintainer methods to repository
         def get_connection(self):
@@ -44,6 +44,14 @@ filters:
         self.assertIsNotNone(time, "Expected time not to be none")
         self.assertEqual(time, self.maintainer.get_last_run_time(), "Expected last run time to be updated")
 
+    def test_watermark_empty_by_default(self):
+        self.assertEqual(self.maintainer.get_watermark(self.TEST_URL), [])
+
+    def test_watermark_read_after_write(self):
+        self.maintainer.save_watermark(self.TEST_URL, [3, 2, 1])
+        self.maintainer.save_watermark(self.TEST_URL, [5, 4, 3])
+        self.assertEqual(self.maintainer.get_watermark(self.TEST_URL), [5, 4, 3])
+
 def test_is_processed_works(mocker):
     config = StringConfig(string=IdMaintainerTest.DUMMY_CONFIG)
     config.set_searchers([DummyCrawler()])
@@ -58,11 +66,14 @@ def test_ids_are_added_to_maintainer(mocker):
     config = StringConfig(string=IdMaintainerTest.DUMMY_CONFIG)
     config.set_searchers([DummyCrawler()])
     id_watch = IdMaintainer(":memory:")
-    spy = mocker.spy(id_watch, "mark_processed")
+    spy = mocker.spy(id_watch, "mark_processed_many")
     hunter = Hunter(config, id_watch)
     exposes = hunter.hunt_flats()
     assert count(exposes) > 4
-    assert spy.call_count == 24
+    assert spy.call_count == 1
+    assert len(spy.call_args[0][0]) == 24
+    assert id_watch.processed_ids([expose['id'] for expose in exposes]) == \
+        {expose['id'] for expose in exposes}
 
 def test_exposes_are_saved_to_maintainer():
     config = StringConfig(string=IdMaintainerTest.CONFIG_WITH_FILTERS)
@@ -0,0 +1,121 @@
+"""In-memory index of the IDs of processed exposes. The index is loaded from the
+database on first use and updated on every write, so that checking whether a
+listing was seen before does not query the database. It assumes that a single
+process writes to the database, so it is off unless configured.
+
+In 'memory' mode the index holds every ID, which takes about 90 MB per million
+IDs. In 'bloom' mode it holds a Bloom filter instead, sized for twice the IDs
+loaded: about 2.4 MB per million IDs at an error rate of 1%. IDs that were never
+seen are answered from memory, and IDs that may have been seen are confirmed
+with the database"""
+import hashlib
+import math
+import threading
+from typing import Callable, Iterable, List, Optional, Set, Union
+
+from flathunter.core.exceptions import ConfigException
+
+MEMORY = 'memory'
+BLOOM = 'bloom'
+OFF = 'off'
+
+# Smallest number of IDs a Bloom filter is sized for
+MIN_BLOOM_CAPACITY = 100_000
+
+
+class BloomFilter:
+    """Set of strings with no false negatives and a bounded rate of false
+       positives, in a fixed number of bits"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        """Add a key to the filter"""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+
+class SeenIdIndex:
+    """Index of processed expose IDs, kept in memory in front of a database"""
+
+    def __init__(self, load: Callable[[], Iterable], mode: str = MEMORY,
+                 error_rate: float = 0.01):
+        if mode not in (MEMORY, BLOOM):
+            raise ConfigException(f"Unknown seen index mode '{mode}', expected "
+                                  f"'{MEMORY}', '{BLOOM}' or '{OFF}'")
+        self.load = load
+        self.mode = mode
+        self.error_rate = error_rate
+        self.count = 0
+        self._ids: Optional[Set[str]] = None
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the IDs have been read from the database"""
+        return self._ids is not None or self._bloom is not None
+
+    def _ensure_loaded(self) -> Union[Set[str], BloomFilter]:
+        """Load the IDs if needed and return the set or Bloom filter holding them"""
+        with self._lock:
+            if self._ids is not None:
+                return self._ids
+            if self._bloom is not None:
+                return self._bloom
+            ids = [str(expose_id) for expose_id in self.load()]
+            self.count = len(ids)
+            if self.mode == MEMORY:
+                self._ids = set(ids)
+                return self._ids
+            bloom = BloomFilter(max(MIN_BLOOM_CAPACITY, 2 * len(ids)), self.error_rate)
+            for expose_id in ids:
+                bloom.add(expose_id)
+            self._bloom = bloom
+            return bloom
+
+    def lookup(self, expose_ids: Iterable, confirm: Callable[[List], Set]) -> Set:
+        """Return the given IDs that have been processed. In 'bloom' mode, the
+           IDs that may have been processed are checked with 'confirm'"""
+        seen = self._ensure_loaded()
+        if isinstance(seen, set):
+            return {expose_id for expose_id in expose_ids if str(expose_id) in seen}
+        candidates = [expose_id for expose_id in expose_ids if str(expose_id) in seen]
+        return confirm(candidates) if candidates else set()
+
+    def add_many(self, expose_ids: Iterable):
+        """Record IDs that were written to the database"""
+        with self._lock:
+            if not self.loaded:
+                return
+            for expose_id in expose_ids:
+                self.count += 1
+                if self._ids is not None:
+                    self._ids.add(str(expose_id))
+                elif self._bloom is not None:
+                    self._bloom.add(str(expose_id))
+            if self._bloom is not None and self.count > self._bloom.capacity:
+                # Rebuilt with a larger filter on the next lookup
+                self._bloom = None
+
+
+def seen_index_for(load: Callable[[], Iterable], mode: Optional[str],
+                   error_rate: float = 0.01) -> Optional[SeenIdIndex]:
+    """Return an index of processed IDs, or None if the mode is 'off'"""
+    if mode in (None, OFF):
+        return None
+    return SeenIdIndex(load, mode, error_rate)
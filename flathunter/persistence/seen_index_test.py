@@ -0,0 +1,79 @@
+# pylint: disable=missing-docstring
+import unittest
+from unittest import mock
+
+import pytest
+
+from flathunter.core.exceptions import ConfigException
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.persistence.seen_index import BLOOM, MEMORY, OFF, BloomFilter, SeenIdIndex
+from flathunter.repositories.expose_repository import SqliteExposeRepository
+from flathunter.testing.config import StringConfig
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        for key in range(1000):
+            bloom.add(str(key))
+        self.assertTrue(all(str(key) in bloom for key in range(1000)))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for key in range(1000):
+            bloom.add(str(key))
+        false_positives = sum(str(key) in bloom for key in range(1000, 11000))
+        self.assertLess(false_positives, 300)
+
+
+class SeenIdIndexTest(unittest.TestCase):
+
+    def test_off_by_default(self):
+        self.assertIsNone(IdMaintainer(":memory:").seen)
+        self.assertIsNone(SqliteExposeRepository(":memory:").seen)
+        self.assertEqual(StringConfig(string="").seen_index_mode(), OFF)
+        self.assertEqual(StringConfig(string="seen_index:\n  mode: off\n").seen_index_mode(), OFF)
+
+    def test_seen_ids_are_answered_from_memory(self):
+        id_watch = IdMaintainer(":memory:", seen_index=MEMORY)
+        id_watch.mark_processed_many([1, 2])
+        self.assertEqual(id_watch.processed_ids([1, 3]), {1})
+        assert id_watch.seen is not None
+        with mock.patch.object(id_watch, 'get_connection') as connection:
+            self.assertTrue(id_watch.is_processed(2))
+            self.assertEqual(id_watch.processed_ids([2, 3]), {2})
+            id_watch.seen.add_many([3])
+            self.assertTrue(id_watch.is_processed(3))
+        connection.assert_not_called()
+
+    def test_index_is_loaded_from_database(self):
+        repository = SqliteExposeRepository(":memory:", seen_index=OFF)
+        repository.mark_processed_many([5, 6])
+        self.assertIsNone(repository.seen)
+        repository.seen = SeenIdIndex(repository._load_processed_ids)  # pylint: disable=protected-access
+        self.assertEqual(repository.processed_ids([5, "6", 7]), {5, "6"})
+        repository.mark_processed(7)
+        self.assertTrue(repository.is_processed("7"))
+
+    def test_bloom_matches_are_confirmed(self):
+        id_watch = IdMaintainer(":memory:", seen_index=BLOOM)
+        id_watch.mark_processed_many(list(range(100)))
+        confirm = mock.Mock(wraps=id_watch._query_processed_ids)  # pylint: disable=protected-access
+        assert id_watch.seen is not None
+        self.assertEqual(id_watch.seen.lookup([5, 500], confirm), {5})
+        confirmed = confirm.call_args[0][0]
+        self.assertIn(5, confirmed)
+        self.assertEqual(id_watch.seen.count, 100)
+
+    def test_bloom_is_rebuilt_when_full(self):
+        index = SeenIdIndex(lambda: [], BLOOM)
+        index.lookup([1], lambda ids: set())
+        bloom = index._bloom  # pylint: disable=protected-access
+        assert bloom is not None
+        index.add_many(range(bloom.capacity + 1))
+        self.assertFalse(index.loaded)
+
+    def test_unknown_mode(self):
+        with pytest.raises(ConfigException):
+            SeenIdIndex(lambda: [], "disk")
@@ -1,12 +1,13 @@
 """Crawler port interface"""
 import re
-from typing import Protocol, List, Dict, Optional
+from typing import Protocol, List, Dict, Optional, Set
 
 class CrawlerPort(Protocol):
     """Interface that all crawlers must implement"""
     URL_PATTERN: re.Pattern
 
-    def crawl(self, url: str, max_pages: Optional[int] = None) -> List[Dict]:
+    def crawl(self, url: str, max_pages: Optional[int] = None,
+              known_ids: Optional[Set] = None) -> List[Dict]:
         """Crawl a URL and return expose dicts"""
         ...
 
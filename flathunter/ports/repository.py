@@ -19,3 +19,11 @@ class RepositoryPort(Protocol):
     def get_recent_exposes(self, count: int) -> List[Dict]:
         """Get recently saved exposes"""
         ...
+
+    def get_watermark(self, search_url: str) -> List[int | str]:
+        """Get the IDs seen at the last crawl of a search URL, newest first"""
+        ...
+
+    def save_watermark(self, search_url: str, expose_ids: List[int | str]) -> None:
+        """Save the IDs seen at the latest crawl of a search URL"""
+        ...
@@ -0,0 +1,112 @@
+"""Matching of addresses against excluded area names and postcodes, in a single
+pass over the address however many areas are excluded. Area names are found
+with an Aho-Corasick automaton. Postcodes that are a single word, such as the
+outward codes 'SE1' or 'SW8', are looked up in a set of the words of the
+address, and full UK postcodes ('SE1 7PB') in a set of the postcodes found in
+it"""
+from collections import deque
+import re
+from typing import Iterable, List, Optional
+
+WORD_PATTERN = re.compile(r'\w+')
+FULL_POSTCODE_PATTERN = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?) *(\d[A-Z]{2})\b')
+
+
+class AhoCorasick:
+    """Automaton that tells whether a text contains any of a set of words"""
+
+    def __init__(self, words: Iterable[str]):
+        self.goto: List[dict] = [{}]
+        self.fail: List[int] = [0]
+        self.final: List[bool] = [False]
+        self.matches_everything = False
+        for word in words:
+            if not word:
+                self.matches_everything = True
+                continue
+            self._add(word)
+        self._link()
+
+    def _add(self, word: str):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.final.append(False)
+                self.goto[state][char] = next_state
+            state = next_state
+        self.final[state] = True
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.final[next_state] = self.final[next_state] \
+                    or self.final[self.fail[next_state]]
+
+    def search(self, text: str) -> bool:
+        """True if any of the words occurs in the text"""
+        if self.matches_everything:
+            return True
+        goto, fail, final = self.goto, self.fail, self.final
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if final[state]:
+                return True
+        return False
+
+
+def normalize_postcode(postcode: str) -> Optional[str]:
+    """The postcode as 'OUTWARD INWARD', or None if it is not a full UK postcode"""
+    match = FULL_POSTCODE_PATTERN.fullmatch(postcode.upper().strip())
+    if match is None:
+        return None
+    return f"{match[1]} {match[2]}"
+
+
+class AreaMatcher:
+    """Tells whether an address lies in one of the excluded areas. Names match
+       anywhere in the address, ignoring case. Postcodes match whole words"""
+
+    def __init__(self, names: Iterable[str], postcodes: Iterable[str]):
+        self.names = AhoCorasick(name.lower() for name in names)
+        self.words = set()
+        self.full_postcodes = set()
+        others = []
+        for postcode in (p.upper() for p in postcodes):
+            if WORD_PATTERN.fullmatch(postcode):
+                self.words.add(postcode)
+            elif normalize_postcode(postcode) is not None:
+                self.full_postcodes.add(normalize_postcode(postcode))
+            else:
+                others.append(postcode)
+        self.other_pattern = None
+        if others:
+            self.other_pattern = re.compile(
+                r'\b(?:' + '|'.join(map(re.escape, others)) + r')\b')
+
+    def matches(self, address: str) -> bool:
+        """True if the address contains an excluded name or postcode"""
+        if self.names.search(address.lower()):
+            return True
+        address_upper = address.upper()
+        if self.words and not self.words.isdisjoint(WORD_PATTERN.findall(address_upper)):
+            return True
+        if self.full_postcodes and any(
+                f"{outward} {inward}" in self.full_postcodes
+                for outward, inward in FULL_POSTCODE_PATTERN.findall(address_upper)):
+            return True
+        return self.other_pattern is not None and \
+            self.other_pattern.search(address_upper) is not None
@@ -0,0 +1,67 @@
+# pylint: disable=missing-docstring
+import random
+import re
+import unittest
+
+from flathunter.processing.area_matcher import AhoCorasick, AreaMatcher, normalize_postcode
+
+
+class AhoCorasickTest(unittest.TestCase):
+
+    def test_overlapping_words(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        self.assertTrue(automaton.search("ushers"))
+        self.assertTrue(automaton.search("this"))
+        self.assertFalse(automaton.search("hxs"))
+
+    def test_word_found_through_failure_link(self):
+        automaton = AhoCorasick(["abcd", "bc"])
+        self.assertTrue(automaton.search("xabcx"))
+        self.assertFalse(automaton.search("abd"))
+
+    def test_empty_word_matches_everything(self):
+        self.assertTrue(AhoCorasick([""]).search("anything"))
+        self.assertFalse(AhoCorasick([]).search("anything"))
+
+    def test_same_as_substring_search(self):
+        rng = random.Random(1)
+        words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(20)]
+        automaton = AhoCorasick(words)
+        for _ in range(500):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+            self.assertEqual(automaton.search(text), any(w in text for w in words), text)
+
+
+class AreaMatcherTest(unittest.TestCase):
+
+    def test_outward_codes_match_whole_words(self):
+        matcher = AreaMatcher([], ["SE1", "sw8"])
+        self.assertTrue(matcher.matches("1 London Road, SE1 7PB"))
+        self.assertTrue(matcher.matches("Flat 2, Vauxhall, sw8 1RG"))
+        self.assertFalse(matcher.matches("10 Peckham High Street, SE15 5AB"))
+
+    def test_full_postcodes(self):
+        matcher = AreaMatcher([], ["se1 7pb"])
+        self.assertTrue(matcher.matches("1 London Road, SE1 7PB"))
+        self.assertTrue(matcher.matches("1 London Road, SE17PB"))
+        self.assertFalse(matcher.matches("1 London Road, SE1 7PC"))
+        self.assertEqual(normalize_postcode("sw1a1aa"), "SW1A 1AA")
+        self.assertIsNone(normalize_postcode("SE1"))
+
+    def test_other_entries_match_as_before(self):
+        matcher = AreaMatcher([], ["SE1 7"])
+        self.assertTrue(matcher.matches("Waterloo, SE1 7 PB"))
+        self.assertFalse(matcher.matches("Waterloo, SE1 77"))
+
+    def test_same_as_checking_each_area(self):
+        rng = random.Random(2)
+        names = ["peckham", "elephant and castle", "bow", "ham"]
+        postcodes = ["SE1", "SE15", "E3", "10115"]
+        addresses = [f"{rng.randint(1, 99)} {rng.choice(['Peckham', 'Bow', 'Oxford', 'Fulham'])}"
+                     f" Road, {rng.choice(['SE1', 'SE15', 'SE16', 'E3', 'E30', '10115'])}"
+                     for _ in range(200)]
+        matcher = AreaMatcher(names, postcodes)
+        for address in addresses:
+            expected = any(n in address.lower() for n in names) or any(
+                re.search(r'\b' + re.escape(p) + r'\b', address.upper()) for p in postcodes)
+            self.assertEqual(matcher.matches(address), expected, address)
@@ -0,0 +1,323 @@
+"""Detection of the same flat listed more than once: on several portals, or by
+several agents. Listings are compared on a normalized form of their address,
+postcode, price and number of bedrooms (the title stands in for the address
+when there is none).
+
+Addresses are reduced to sets of words and pairs of neighbouring words, leaving
+out the locality at the end and counting words like 'road' only as part of a
+pair, and every set to a
+MinHash signature. The signatures of recent listings are kept in a
+locality-sensitive hashing index: each signature is cut into bands, and only
+listings that share a band with a new listing are compared with it, so that
+finding candidates does not slow down with the number of listings indexed.
+Candidates are duplicates if their estimated similarity reaches the threshold
+and their postcode, price and bedrooms agree"""
+import datetime
+import hashlib
+import re
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from flathunter.core.abstract_processor import Processor
+from flathunter.core.logging import logger
+from flathunter.processing.area_matcher import FULL_POSTCODE_PATTERN
+from flathunter.processing.filter import ExposeView
+from flathunter.processing.normalize import ABBREVIATIONS, WORD_PATTERN
+
+OUTWARD_CODE_PATTERN = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?)\b')
+# Words that one portal adds to an address and another leaves out
+IGNORED_WORDS = {'flat', 'apartment', 'apt', 'unit', 'the', 'uk', 'united', 'kingdom',
+                 'bed', 'bedroom', 'bedrooms', 'to', 'rent', 'let', 'for', 'in'}
+# Words shared by many unrelated addresses, which only count as part of a pair
+GENERIC_WORDS = {'road', 'street', 'avenue', 'lane', 'square', 'court', 'place', 'drive',
+                 'gardens', 'crescent', 'terrace', 'house', 'close', 'way', 'grove', 'park',
+                 'hill', 'mews', 'row', 'walk', 'london'}
+
+
+def address_words(text: str) -> List[str]:
+    """The words of an address or title, lower case, with abbreviations written
+       out, and without numbers and words that portals add or leave out"""
+    words: List[str] = WORD_PATTERN.findall(text.lower())
+    words = [ABBREVIATIONS.get(word, word) for word in words]
+    return [word for word in words if not word.isdigit() and word not in IGNORED_WORDS]
+
+
+@dataclass(frozen=True)
+class ListingFeatures:
+    """The normalized fields that listings are compared on"""
+    shingles: FrozenSet[str]
+    postcode: Optional[str] = None
+    outward_code: Optional[str] = None
+    price: Optional[float] = None
+    rooms: Optional[float] = None
+
+    @staticmethod
+    def of(expose: Dict) -> 'ListingFeatures':
+        """Normalize the fields of an expose"""
+        address = str(expose.get('address') or '').upper()
+        postcode = None
+        outward_code = None
+        full_postcodes = FULL_POSTCODE_PATTERN.findall(address)
+        if full_postcodes:
+            outward_code, inward_code = full_postcodes[-1]
+            postcode = f"{outward_code} {inward_code}"
+            address = FULL_POSTCODE_PATTERN.sub(' ', address)
+        else:
+            outward_codes = [code for code in OUTWARD_CODE_PATTERN.findall(address)
+                             if not code.isdigit()]
+            if outward_codes:
+                outward_code = outward_codes[-1]
+                address = OUTWARD_CODE_PATTERN.sub(' ', address)
+        segments = [words for words in map(address_words, address.split(',')) if words]
+        if len(segments) > 1:
+            # The locality, which portals name differently, or not at all
+            segments.pop()
+        if not segments:
+            segments = [address_words(str(expose.get('title') or ''))]
+        shingles = frozenset(
+            [word for words in segments for word in words if word not in GENERIC_WORDS]
+            + [f"{a} {b}" for words in segments for a, b in zip(words, words[1:])])
+        view = expose if isinstance(expose, ExposeView) else ExposeView(expose)
+        return ListingFeatures(shingles, postcode, outward_code,
+                               _field(lambda: view.price), _field(lambda: view.rooms))
+
+
+def _field(read: Callable[[], Optional[float]]) -> Optional[float]:
+    try:
+        return read()
+    except (KeyError, TypeError):
+        return None
+
+
+class MinHash:
+    """Signatures of sets, such that the share of positions on which two
+       signatures agree estimates the Jaccard similarity of the sets. Every
+       position is the smallest value of its own hash function over the set;
+       the hash functions are 32-bit slices of one SHAKE-128 digest"""
+
+    def __init__(self, num_perm: int = 32, seed: int = 1):
+        self.seed = seed.to_bytes(8, 'little')
+        self.values = struct.Struct(f'<{num_perm}I')
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        """The signature of a set of strings; empty for an empty set"""
+        hashes = [self.values.unpack(hashlib.shake_128(self.seed + shingle.encode('utf-8'))
+                                     .digest(self.values.size)) for shingle in shingles]
+        if not hashes:
+            return ()
+        return tuple(map(min, *hashes)) if len(hashes) > 1 else hashes[0]
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the sets behind two signatures"""
+        if not first or not second:
+            return 0.0
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+@dataclass
+class Listing:
+    """A listing in the index, with the URLs of its duplicates"""
+    key: Tuple[str, str]
+    features: ListingFeatures
+    signature: Tuple[int, ...]
+    added: float
+    urls: List[str] = field(default_factory=list)
+
+
+class DuplicateIndex:
+    """Recent listings, indexed for finding duplicates of new ones. The index is
+       loaded from the database on first use and then holds the listings added
+       to it, for `window` after they were listed. Dropped duplicates are saved
+       with the listing they duplicate, so that the link outlives the process"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, load: Callable[[], Iterable[Dict]], threshold: float = 0.5,
+                 price_tolerance: float = 0.05,
+                 window: datetime.timedelta = datetime.timedelta(days=30),
+                 bands: int = 16, rows: int = 2,
+                 save: Optional[Callable[[List[Dict]], None]] = None):
+        self.load = load
+        self.save = save
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        self.window = window.total_seconds()
+        self.rows = rows
+        self.minhash = MinHash(bands * rows)
+        self.listings: Dict[Tuple[str, str], Listing] = {}
+        self.bands = bands
+        # Keys of the listings by band number and the values of their band
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[str, str]]] = {}
+        self.order: deque = deque()
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(expose: Dict) -> Tuple[str, str]:
+        """The crawler and ID that identify an expose"""
+        return str(expose.get('crawler', '')), str(expose['id'])
+
+    def _buckets(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        if not signature:
+            return []
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def ensure_loaded(self):
+        """Index the recent listings stored in the database"""
+        with self._lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            exposes = list(self.load())
+        duplicates = []
+        for expose in reversed(exposes):
+            if expose.get('duplicate_of'):
+                duplicates.append(expose)
+                continue
+            created = expose.get('created_at')
+            if isinstance(created, str):
+                created = datetime.datetime.fromisoformat(created)
+            self.add(expose, created.timestamp() if created is not None else None)
+        with self._lock:
+            for expose in duplicates:
+                original = self.listings.get(self.key(expose['duplicate_of']))
+                if original is not None and expose.get('url') \
+                        and expose['url'] not in original.urls:
+                    original.urls.append(expose['url'])
+        logger.debug("Indexed %d recent listings for duplicate detection", len(self.listings))
+
+    def listing(self, expose: Dict, added: Optional[float] = None) -> Listing:
+        """The expose as a listing of the index, listed at the given timestamp
+           (now by default)"""
+        features = ListingFeatures.of(expose)
+        return Listing(self.key(expose), features, self.minhash.signature(features.shingles),
+                       time.time() if added is None else added,
+                       [expose['url']] if expose.get('url') else [])
+
+    def add(self, expose: Dict, added: Optional[float] = None) -> Listing:
+        """Index a listing"""
+        return self.insert(self.listing(expose, added))
+
+    def insert(self, listing: Listing) -> Listing:
+        """Index a listing, unless a listing with the same key is indexed already.
+           Returns the indexed listing"""
+        with self._lock:
+            oldest = time.time() - self.window
+            self._evict(oldest)
+            if listing.key in self.listings:
+                return self.listings[listing.key]
+            if listing.added < oldest:
+                return listing
+            self.listings[listing.key] = listing
+            self.order.append(listing)
+            for bucket in self._buckets(listing.signature):
+                self.buckets.setdefault(bucket, []).append(listing.key)
+        return listing
+
+    def _evict(self, oldest: float):
+        while self.order and self.order[0].added < oldest:
+            listing = self.order.popleft()
+            del self.listings[listing.key]
+            for bucket in self._buckets(listing.signature):
+                keys = self.buckets[bucket]
+                keys.remove(listing.key)
+                if not keys:
+                    del self.buckets[bucket]
+
+    def candidates(self, listing: Listing) -> List[Listing]:
+        """Other indexed listings that share a band with the listing"""
+        with self._lock:
+            keys = set()
+            for bucket in self._buckets(listing.signature):
+                keys.update(self.buckets.get(bucket, ()))
+            keys.discard(listing.key)
+            return [self.listings[key] for key in keys]
+
+    def find(self, expose: Dict) -> Optional[Listing]:
+        """The indexed listing that the expose duplicates, if any"""
+        return self.original_of(self.listing(expose))
+
+    def original_of(self, listing: Listing) -> Optional[Listing]:
+        """The most similar indexed listing that the listing duplicates, if any"""
+        best, best_similarity = None, self.threshold
+        for candidate in self.candidates(listing):
+            similarity = MinHash.similarity(listing.signature, candidate.signature)
+            if similarity >= best_similarity and \
+                    self.same_flat(listing.features, candidate.features):
+                best, best_similarity = candidate, similarity
+        return best
+
+    def same_flat(self, first: ListingFeatures, second: ListingFeatures) -> bool:
+        """True if listings with similar addresses agree on postcode, price and
+           bedrooms. At least the price or the bedrooms of both must be known"""
+        if first.postcode and second.postcode and first.postcode != second.postcode:
+            return False
+        if first.outward_code and second.outward_code \
+                and first.outward_code != second.outward_code:
+            return False
+        known = False
+        if first.rooms is not None and second.rooms is not None:
+            if first.rooms != second.rooms:
+                return False
+            known = True
+        if first.price and second.price:
+            if abs(first.price - second.price) > \
+                    self.price_tolerance * max(first.price, second.price):
+                return False
+            known = True
+        return known
+
+
+def duplicate_index_for(config, id_watch) -> Optional[DuplicateIndex]:
+    """The duplicate index set up in the config, over the listings stored by
+       `id_watch`, or None if duplicate detection is disabled"""
+    if not config.dedup_enabled():
+        return None
+    window = datetime.timedelta(days=config.dedup_window_days())
+
+    def load():
+        if not hasattr(id_watch, 'get_exposes_since'):
+            return []
+        return id_watch.get_exposes_since(datetime.datetime.now() - window)
+
+    return DuplicateIndex(load, config.dedup_threshold(), config.dedup_price_tolerance(),
+                          window, save=getattr(id_watch, 'save_exposes', None))
+
+
+class DuplicateDetector(Processor):
+    """Processor that drops exposes duplicating a recent listing. The first
+       listing of a flat is passed on, with the URLs of its duplicates in
+       `urls` as they are found. Dropped exposes are saved again with the
+       listing they duplicate in `duplicate_of`"""
+
+    def __init__(self, config, index: DuplicateIndex):
+        self.config = config
+        self.index = index
+        # Loaded now, before the exposes of this hunt are saved to the database
+        self.index.ensure_loaded()
+
+    def process_batch(self, exposes):
+        """Drop the duplicates in a batch of exposes"""
+        unique = []
+        dropped = []
+        for expose in exposes:
+            listing = self.index.listing(expose)
+            original = self.index.original_of(listing)
+            if original is None:
+                expose['urls'] = self.index.insert(listing).urls
+                unique.append(expose)
+                continue
+            if expose.get('url') and expose['url'] not in original.urls:
+                original.urls.append(expose['url'])
+            expose['duplicate_of'] = {'crawler': original.key[0], 'id': original.key[1]}
+            dropped.append(expose)
+            logger.info("Expose %s from %s duplicates %s from %s", expose['id'],
+                        expose.get('crawler'), original.key[1], original.key[0])
+        if dropped and self.index.save is not None:
+            self.index.save(dropped)
+        return unique
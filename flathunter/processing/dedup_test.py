@@ -0,0 +1,157 @@
+# pylint: disable=missing-docstring
+import datetime
+import random
+import unittest
+
+from flathunter.app.hunter import Hunter
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.dedup import DuplicateDetector, DuplicateIndex, ListingFeatures, \
+    MinHash, duplicate_index_for
+from flathunter.testing.dummy_crawler import DummyCrawler
+from flathunter.testing.config import StringConfig
+
+CONFIG = """
+urls:
+  - https://www.example.com/liste/berlin/wohnungen/mieten?roomi=2&prima=1500&wflmi=70&sort=createdate%2Bdesc
+"""
+
+
+def rightmove(**fields):
+    expose = {'id': 101, 'crawler': 'Rightmove',
+              'url': 'https://www.rightmove.co.uk/properties/101',
+              'title': '2 bedroom flat to rent', 'price': '£1500 pcm', 'rooms': '2',
+              'address': 'Elm Road, London, SE1'}
+    expose.update(fields)
+    return expose
+
+
+def zoopla(**fields):
+    expose = {'id': 202, 'crawler': 'Zoopla',
+              'url': 'https://www.zoopla.co.uk/to-rent/details/202',
+              'title': '2 bed flat to rent', 'price': '£1520 pcm', 'rooms': '2',
+              'address': 'Flat 3, 12 Elm Rd, London SE1 7PB'}
+    expose.update(fields)
+    return expose
+
+
+def empty_index(**kwargs):
+    index = DuplicateIndex(lambda: [], **kwargs)
+    index.ensure_loaded()
+    return index
+
+
+def original_key(index, expose):
+    original = index.find(expose)
+    return original.key if original is not None else None
+
+
+class ListingFeaturesTest(unittest.TestCase):
+
+    def test_normalized_fields(self):
+        features = ListingFeatures.of(zoopla())
+        self.assertEqual(features.postcode, "SE1 7PB")
+        self.assertEqual(features.outward_code, "SE1")
+        self.assertEqual(features.price, 1520)
+        self.assertEqual(features.rooms, 2)
+        self.assertEqual(features.shingles, ListingFeatures.of(rightmove()).shingles)
+
+    def test_title_without_address(self):
+        features = ListingFeatures.of({'id': 1, 'title': 'Studio on Elm Road', 'address': ''})
+        self.assertIn('elm road', features.shingles)
+        self.assertIsNone(features.price)
+
+
+class MinHashTest(unittest.TestCase):
+
+    def test_similarity_estimates_jaccard(self):
+        minhash = MinHash(128)
+        first = {f"w{i}" for i in range(40)}
+        second = {f"w{i}" for i in range(20, 60)}
+        estimate = MinHash.similarity(minhash.signature(first), minhash.signature(second))
+        self.assertAlmostEqual(estimate, 1 / 3, delta=0.12)
+        self.assertEqual(minhash.signature([]), ())
+
+
+class DuplicateIndexTest(unittest.TestCase):
+
+    def test_same_flat_on_two_portals(self):
+        index = empty_index()
+        index.add(rightmove())
+        self.assertEqual(original_key(index, zoopla()), ('Rightmove', '101'))
+        self.assertIsNone(index.find(rightmove()))
+
+    def test_different_flats_on_the_same_road(self):
+        index = empty_index()
+        index.add(rightmove())
+        self.assertIsNone(index.find(zoopla(price='£2100 pcm')))
+        self.assertIsNone(index.find(zoopla(rooms='3')))
+        self.assertIsNone(index.find(zoopla(address='12 Elm Road, London SE15 5AB')))
+        self.assertIsNone(index.find(zoopla(address='12 Oak Road, London SE1 7PB')))
+        self.assertIsNone(index.find(zoopla(price='', rooms='')))
+
+    def test_old_listings_are_evicted(self):
+        index = empty_index(window=datetime.timedelta(days=1))
+        old = datetime.datetime.now() - datetime.timedelta(days=2)
+        index.add(rightmove(), old.timestamp())
+        self.assertIsNone(index.find(zoopla()))
+        self.assertEqual(index.listings, {})
+
+    def test_candidates_among_many_listings(self):
+        rng = random.Random(3)
+        index = empty_index()
+        for number in range(2000):
+            street = "".join(rng.choice("abcdefghij") for _ in range(8))
+            index.add({'id': number, 'crawler': 'Zoopla', 'price': f"£{rng.randint(900, 3000)}",
+                       'rooms': '1', 'address': f"{street} Road, London, E{number % 20 + 1}"})
+        index.add(rightmove())
+        self.assertLess(len(index.candidates(index.listing(zoopla()))), 20)
+        self.assertEqual(original_key(index, zoopla()), ('Rightmove', '101'))
+
+    def test_loads_recent_listings_from_database(self):
+        config = StringConfig(string="dedup:\n  enabled: true\n")
+        id_watch = IdMaintainer(":memory:")
+        id_watch.save_expose(rightmove())
+        index = duplicate_index_for(config, id_watch)
+        assert index is not None
+        index.ensure_loaded()
+        self.assertEqual(original_key(index, zoopla()), ('Rightmove', '101'))
+        self.assertIsNone(duplicate_index_for(StringConfig(string=""), id_watch))
+
+
+class DuplicateDetectorTest(unittest.TestCase):
+
+    def test_duplicates_are_collapsed(self):
+        detector = DuplicateDetector(StringConfig(string=""), empty_index())
+        other_agent = rightmove(id=103, url='https://www.rightmove.co.uk/properties/103')
+        unique = list(detector.process_exposes([rightmove(), zoopla(), other_agent]))
+        self.assertEqual([expose['id'] for expose in unique], [101])
+        self.assertEqual(unique[0]['urls'], ['https://www.rightmove.co.uk/properties/101',
+                                             'https://www.zoopla.co.uk/to-rent/details/202',
+                                             'https://www.rightmove.co.uk/properties/103'])
+
+    def test_link_to_the_original_is_saved(self):
+        config = StringConfig(string="dedup:\n  enabled: true\n")
+        id_watch = IdMaintainer(":memory:")
+        id_watch.save_expose(rightmove())
+        index = duplicate_index_for(config, id_watch)
+        assert index is not None
+        detector = DuplicateDetector(config, index)
+        self.assertEqual(list(detector.process_exposes([zoopla()])), [])
+        stored = {expose['id']: expose for expose in id_watch.get_recent_exposes(5)}
+        self.assertEqual(stored[202]['duplicate_of'], {'crawler': 'Rightmove', 'id': '101'})
+        reloaded = duplicate_index_for(config, id_watch)
+        assert reloaded is not None
+        reloaded.ensure_loaded()
+        self.assertEqual(list(reloaded.listings), [('Rightmove', '101')])
+        self.assertEqual(reloaded.listings[('Rightmove', '101')].urls,
+                         ['https://www.rightmove.co.uk/properties/101',
+                          'https://www.zoopla.co.uk/to-rent/details/202'])
+
+    def test_hunter_drops_duplicates(self):
+        config = StringConfig(string=CONFIG + "dedup:\n  enabled: true\n")
+        config.set_searchers([DummyCrawler()])
+        hunter = Hunter(config, IdMaintainer(":memory:"))
+        exposes = hunter.hunt_flats()
+        assert hunter.duplicates is not None
+        self.assertTrue(hunter.duplicates.loaded)
+        self.assertEqual(len(hunter.duplicates.listings), len(exposes))
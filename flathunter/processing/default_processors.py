@@ -1,7 +1,5 @@
 """Built-in expose processor implementations. Used by the processor pipelines
    in flathunter and in the webservice"""
-import re
-
 from flathunter.core.logging import logger
 from flathunter.core.abstract_processor import Processor
 
@@ -12,12 +10,15 @@ class Filter(Processor):
         self.config = config
         self.filter = filter_set
 
-    def process_exposes(self, exposes):
-        return self.filter.filter(exposes)
+    def process_batch(self, exposes):
+        """Return the exposes of the batch that pass the filter"""
+        return self.filter.filter_batch(exposes)
 
 class AddressResolver(Processor):
     """Processor to extract apartment addresses from expose links"""
 
+    concurrency = 4
+
     def __init__(self, config):
         self.config = config
 
@@ -25,24 +26,25 @@ class AddressResolver(Processor):
         """Fetches the expose from the expose URL and extracts the address"""
         if expose['address'].startswith('http'):
             url = expose['address']
-            for searcher in self.config.searchers():
-                if re.search(searcher.URL_PATTERN, url):
-                    expose['address'] = searcher.load_address(url)
-                    logger.debug("Loaded address %s for url %s", expose['address'], url)
-                    break
+            searcher = self.config.crawler_for_url(url)
+            if searcher is not None:
+                expose['address'] = searcher.load_address(url)
+                logger.debug("Loaded address %s for url %s", expose['address'], url)
         return expose
 
 class CrawlExposeDetails(Processor):
     """Processor to extract additional apartment details by parsing page at expose URL"""
 
+    concurrency = 4
+
     def __init__(self, config):
         self.config = config
 
     def process_expose(self, expose):
         """Fetches the page at exposes['url'] and extracts additional details from it"""
-        for searcher in self.config.searchers():
-            if re.search(searcher.URL_PATTERN, expose['url']):
-                expose = searcher.get_expose_details(expose)
+        searcher = self.config.crawler_for_url(expose['url'])
+        if searcher is not None:
+            expose = searcher.get_expose_details(expose)
         return expose
 
 class LambdaProcessor(Processor):
@@ -0,0 +1,153 @@
+"""Cache of the travel durations looked up with the Google Maps Distance Matrix
+API. Durations are kept by origin, destination, travel mode and arrival time,
+with the addresses normalized (case, punctuation, abbreviations, postcode
+spacing and flat numbers) so that listings in the same building share an
+entry.
+
+Entries are stored in an SQLite database and expire after a time to live; the
+most recently used entries are also kept in memory. The cache counts where
+lookups were answered from, so that its hit rate can be reported with the
+run report of every hunt"""
+import datetime
+import sqlite3 as lite
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from flathunter.core.logging import logger
+from flathunter.processing.normalize import normalize_address
+
+Key = Tuple[str, str, str, str]
+
+
+def cache_key(origin: str, destination: str, mode: str, arrival: str) -> Key:
+    """The key of the duration from an origin to a destination"""
+    return normalize_address(origin), normalize_address(destination), mode, arrival
+
+
+class DurationCache:
+    """Travel durations stored in SQLite, with the most recently used ones in memory"""
+
+    def __init__(self, db_name: str, ttl: datetime.timedelta = datetime.timedelta(days=30),
+                 size: int = 10000):
+        self.db_name = db_name
+        self.ttl = ttl.total_seconds()
+        self.size = size
+        self.threadlocal = threading.local()
+        self.memory: OrderedDict[Key, Tuple[str, float]] = OrderedDict()
+        self.counts = {'memory': 0, 'database': 0, 'misses': 0}
+        self.memory_only = False
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        """Connects to the SQLite database. Connections are thread-local"""
+        connection = getattr(self.threadlocal, 'connection', None)
+        if connection is None:
+            connection = lite.connect(self.db_name)
+            connection.execute('CREATE TABLE IF NOT EXISTS durations (origin TEXT, \
+                                destination TEXT, mode TEXT, arrival TEXT, duration TEXT, \
+                                created REAL, PRIMARY KEY (origin, destination, mode, arrival))')
+            connection.execute('DELETE FROM durations WHERE created < ?',
+                               (time.time() - self.ttl,))
+            connection.commit()
+            self.threadlocal.connection = connection
+        return connection
+
+    def _database_failed(self, error: lite.Error):
+        # Durations are still looked up with the API, so an unusable database
+        # (such as one in a read-only directory) only costs the cache across runs
+        if not self.memory_only:
+            logger.warning("Cannot use the duration cache in %s, keeping durations in memory "
+                           "only: %s", self.db_name, error)
+        self.memory_only = True
+
+    def _remember(self, key: Key, duration: str, created: float):
+        # Called with the lock held
+        self.memory[key] = (duration, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def get(self, key: Key) -> Optional[str]:
+        """The cached duration, or None if it is not cached or has expired"""
+        oldest = time.time() - self.ttl
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry[1] >= oldest:
+                self.memory.move_to_end(key)
+                self.counts['memory'] += 1
+                return entry[0]
+        row = None
+        if not self.memory_only:
+            try:
+                row = self.get_connection().execute(
+                    'SELECT duration, created FROM durations WHERE origin = ? AND destination = ? \
+                     AND mode = ? AND arrival = ? AND created >= ?', key + (oldest,)).fetchone()
+            except lite.Error as error:
+                self._database_failed(error)
+        with self._lock:
+            if row is None:
+                self.counts['misses'] += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self.counts['database'] += 1
+            return row[0]
+
+    def put_many(self, durations: Iterable[Tuple[Key, str]]):
+        """Store durations"""
+        created = time.time()
+        rows = [key + (duration, created) for key, duration in durations]
+        if not rows:
+            return
+        with self._lock:
+            for row in rows:
+                self._remember(row[:4], row[4], created)
+        if self.memory_only:
+            return
+        try:
+            connection = self.get_connection()
+            connection.executemany('INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?, ?, ?)',
+                                   rows)
+            connection.commit()
+        except lite.Error as error:
+            self._database_failed(error)
+
+    def take_counts(self) -> Dict[str, int]:
+        """The number of lookups answered from memory, from the database and
+           not at all since the last call"""
+        with self._lock:
+            counts = dict(self.counts)
+            self.counts = dict.fromkeys(self.counts, 0)
+        return counts
+
+
+def hit_rate(counts: Dict[str, int]) -> Optional[float]:
+    """Share of the lookups answered from the cache, or None without lookups"""
+    lookups = sum(counts.values())
+    if not lookups:
+        return None
+    return (counts['memory'] + counts['database']) / lookups
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: Optional[DurationCache] = None
+
+
+def configure_duration_cache(config) -> Optional[DurationCache]:
+    """(Re)create the process-wide duration cache from the config"""
+    global _CACHE  # pylint: disable=global-statement
+    with _CACHE_LOCK:
+        _CACHE = DurationCache(config.duration_cache_database(),
+                               datetime.timedelta(days=config.duration_cache_ttl_days()),
+                               config.duration_cache_size()) \
+            if config.duration_cache_enabled() else None
+        if _CACHE is not None:
+            logger.debug("Caching travel durations in %s", _CACHE.db_name)
+        return _CACHE
+
+
+def get_duration_cache() -> Optional[DurationCache]:
+    """Return the process-wide duration cache, or None if caching is disabled"""
+    with _CACHE_LOCK:
+        return _CACHE
@@ -0,0 +1,150 @@
+# pylint: disable=missing-docstring
+import datetime
+import os
+import re
+import tempfile
+import time
+import unittest
+
+import requests_mock
+
+from flathunter.app.hunter import Hunter
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.duration_cache import DurationCache, cache_key, \
+    configure_duration_cache, get_duration_cache, hit_rate
+from flathunter.processing.gmaps_duration_processor import GMapsDurationProcessor
+from flathunter.processing import gmaps_duration_processor_test
+from flathunter.testing.config import StringConfig
+from flathunter.testing.dummy_crawler import DummyCrawler
+
+MATRIX = re.compile('maps.googleapis.com/maps/api/distancematrix/json')
+
+
+def matrix_response(request, _context):
+    match = re.search(r'origins=([^&]*)', request.url)
+    assert match is not None
+    origins = match[1].split('%7C')
+    return {"status": "OK",
+            "rows": [{"elements": [{"distance": {"text": f"{i} km", "value": i},
+                                    "duration": {"text": f"{i} mins", "value": i}}]}
+                     for i in range(len(origins))]}
+
+
+class DurationCacheTest(unittest.TestCase):
+
+    def test_durations_are_stored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_name = os.path.join(directory, 'durations.db')
+            key = cache_key("12 Elm Rd", "Buckingham Palace", "transit", "Mon 09:00")
+            cache = DurationCache(db_name)
+            self.assertIsNone(cache.get(key))
+            cache.put_many([(key, "20 mins (5 km)")])
+            self.assertEqual(cache.get(key), "20 mins (5 km)")
+            reopened = DurationCache(db_name)
+            self.assertEqual(reopened.get(key), "20 mins (5 km)")
+            self.assertEqual(reopened.get(key), "20 mins (5 km)")
+            self.assertEqual(cache.take_counts(), {'memory': 1, 'database': 0, 'misses': 1})
+            self.assertEqual(reopened.take_counts(), {'memory': 1, 'database': 1, 'misses': 0})
+            self.assertEqual(reopened.take_counts(), {'memory': 0, 'database': 0, 'misses': 0})
+
+    def test_expired_durations_are_not_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DurationCache(os.path.join(directory, 'durations.db'),
+                                  ttl=datetime.timedelta(seconds=0.05))
+            key = cache_key("12 Elm Rd", "Buckingham Palace", "transit", "Mon 09:00")
+            cache.put_many([(key, "20 mins (5 km)")])
+            time.sleep(0.1)
+            self.assertIsNone(cache.get(key))
+
+    def test_least_recently_used_durations_leave_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DurationCache(os.path.join(directory, 'durations.db'), size=2)
+            keys = [cache_key(f"{i} Elm Rd", "Palace", "transit", "Mon 09:00") for i in range(3)]
+            cache.put_many([(keys[0], "1 min"), (keys[1], "2 mins")])
+            cache.get(keys[0])
+            cache.put_many([(keys[2], "3 mins")])
+            self.assertEqual(list(cache.memory), [keys[0], keys[2]])
+            self.assertEqual(cache.get(keys[1]), "2 mins")
+            self.assertEqual(cache.take_counts(), {'memory': 1, 'database': 1, 'misses': 0})
+
+    def test_unusable_database_falls_back_to_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DurationCache(os.path.join(directory, 'missing', 'durations.db'))
+            key = cache_key("12 Elm Rd", "Buckingham Palace", "transit", "Mon 09:00")
+            with self.assertLogs(level='WARNING'):
+                self.assertIsNone(cache.get(key))
+            self.assertTrue(cache.memory_only)
+            cache.put_many([(key, "20 mins (5 km)")])
+            self.assertEqual(cache.get(key), "20 mins (5 km)")
+            self.assertEqual(cache.take_counts(), {'memory': 1, 'database': 0, 'misses': 1})
+
+    def test_configure(self):
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                cache = configure_duration_cache(StringConfig(
+                    string=f"duration_cache:\n  database: {directory}/durations.db\n"))
+                self.assertIs(get_duration_cache(), cache)
+                assert cache is not None
+                self.assertEqual(cache.db_name, f"{directory}/durations.db")
+        finally:
+            configure_duration_cache(StringConfig(string="duration_cache:\n  enabled: false\n"))
+        self.assertIsNone(get_duration_cache())
+        self.assertIsNone(hit_rate({'memory': 0, 'database': 0, 'misses': 0}))
+
+
+class CachedDurationsTest(unittest.TestCase):
+
+    @requests_mock.Mocker()
+    def test_cached_origins_cost_no_requests(self, mocker):
+        mocker.get(MATRIX, json=matrix_response)
+        with tempfile.TemporaryDirectory() as directory:
+            processor = GMapsDurationProcessor(StringConfig(
+                string=gmaps_duration_processor_test.GMapsDurationProcessorTest.DUMMY_CONFIG))
+            processor.cache = DurationCache(os.path.join(directory, 'durations.db'))
+            first = [{'address': "Flat 1, 12 Elm Rd, SE1 7PB"},
+                     {'address': "Flat 2, 12 Elm Road, SE17PB"},
+                     {'address': "14 Elm Road, SE1 7PB"}]
+            processor.process_batch(first)
+            # one request per destination and mode, with two distinct origins
+            self.assertEqual(mocker.call_count, 3)
+            self.assertIn("origins=Flat+1%2C+12+Elm+Rd%2C+SE1+7PB%7C14+Elm",
+                          mocker.request_history[0].url)
+            self.assertEqual(first[1]['durations'], first[0]['durations'])
+            self.assertEqual(processor.cache.take_counts(),
+                             {'memory': 0, 'database': 0, 'misses': 6})
+
+            reposted = [{'address': "12 Elm Road, SE1 7PB"}, {'address': "14 Elm Rd, SE1 7PB"}]
+            processor.process_batch(reposted)
+            self.assertEqual(mocker.call_count, 3)
+            self.assertEqual(reposted[0]['durations'], first[0]['durations'])
+            self.assertEqual(reposted[1]['durations'], first[2]['durations'])
+            self.assertEqual(hit_rate(processor.cache.take_counts()), 1)
+
+    @requests_mock.Mocker()
+    def test_failed_lookups_are_not_cached(self, mocker):
+        mocker.get(MATRIX, json={"status": "REQUEST_DENIED"})
+        with tempfile.TemporaryDirectory() as directory:
+            processor = GMapsDurationProcessor(StringConfig(
+                string=gmaps_duration_processor_test.GMapsDurationProcessorTest.DUMMY_CONFIG))
+            processor.cache = DurationCache(os.path.join(directory, 'durations.db'))
+            processor.process_expose({'address': "12 Elm Road, SE1 7PB"})
+            processor.process_expose({'address': "12 Elm Road, SE1 7PB"})
+            self.assertEqual(mocker.call_count, 6)
+
+    @requests_mock.Mocker()
+    def test_hit_rate_is_reported(self, mocker):
+        mocker.get(MATRIX, json=matrix_response)
+        config = StringConfig(string=gmaps_duration_processor_test.GMapsDurationProcessorTest
+                              .DUMMY_CONFIG)
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                configure_duration_cache(StringConfig(
+                    string=f"duration_cache:\n  database: {directory}/durations.db\n"))
+                Hunter(config, id_watch).hunt_flats()
+        finally:
+            configure_duration_cache(StringConfig(string="duration_cache:\n  enabled: false\n"))
+        counts = id_watch.get_run_reports()[0]['caches']['durations']
+        self.assertGreater(counts['misses'], 0)
+        self.assertEqual(counts['memory'] + counts['database'], 0)
@@ -1,49 +1,115 @@
 """Module with implementations of standard expose filters"""
-from functools import reduce
+from functools import cached_property
 import re
+import time
 from abc import ABC, ABCMeta
-from typing import List, Any
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Any, Optional
+
+from flathunter.processing import normalize
+from flathunter.processing.area_matcher import AreaMatcher
+from flathunter.utils.stream import take_ready
 
 
 class AbstractFilter(ABC):
     """Abstract base class for filters"""
 
+    # Filters backed by storage are applied after all in-memory filters, so that
+    # they only see exposes that passed everything else
+    persistent = False
+
     def is_interesting(self, _expose) -> bool:
         """Return True if an expose should be included in the output, False otherwise"""
         return True
 
+    def filter_batch(self, exposes: List) -> List:
+        """Return the exposes of a batch that should be included in the output.
+           Filters that can check many exposes at once should override this"""
+        return [expose for expose in exposes if self.is_interesting(expose)]
+
 
 class ExposeHelper:
-    """Helper functions for extracting data from expose text"""
+    """Helper functions for extracting data from expose text. The numbers added
+    by the normalizer are used where present; the values of an ExposeView are
+    parsed once and read from its cache"""
+
+    @staticmethod
+    def parse_price(text: str) -> Optional[float]:
+        """Extracts the monthly price from a price text"""
+        return normalize.parse_price(text)
+
+    @staticmethod
+    def parse_number(text: str) -> Optional[float]:
+        """Extracts a size or number of rooms from a text"""
+        return normalize.parse_number(text)
 
     @staticmethod
     def get_price(expose):
         """Extracts the price from a price text"""
-        price_match = re.search(r'\d+([\.,]\d+)?', expose['price'])
-        if price_match is None:
-            return None
-        return float(price_match[0].replace(".", "").replace(",", "."))
+        if isinstance(expose, ExposeView):
+            return expose.price
+        return ExposeView(expose).price
 
     @staticmethod
     def get_size(expose):
         """Extracts the size from a size text"""
-        size_match = re.search(r'\d+([\.,]\d+)?', expose['size'])
-        if size_match is None:
-            return None
-        return float(size_match[0].replace(",", "."))
+        if isinstance(expose, ExposeView):
+            return expose.size
+        return ExposeView(expose).size
 
     @staticmethod
     def get_rooms(expose):
         """Extracts the number of rooms from a room text"""
-        rooms_match = re.search(r'\d+([\.,]\d+)?', expose['rooms'])
-        if rooms_match is None:
-            return None
-        return float(rooms_match[0].replace(",", "."))
+        if isinstance(expose, ExposeView):
+            return expose.rooms
+        return ExposeView(expose).rooms
+
+
+class ExposeView(Mapping):
+    """Read-only view of an expose that parses its numeric fields on first use
+    and keeps them, so that every filter in a chain shares one parse. Reads of
+    other keys go to the underlying expose"""
+
+    def __init__(self, expose: Dict):
+        self.expose = expose
+
+    def __getitem__(self, key):
+        return self.expose[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.expose)
+
+    def __len__(self) -> int:
+        return len(self.expose)
+
+    @cached_property
+    def price(self) -> Optional[float]:
+        """The price per month"""
+        if normalize.PRICE_FIELD in self.expose:
+            return self.expose[normalize.PRICE_FIELD]
+        return ExposeHelper.parse_price(self.expose['price'])
+
+    @cached_property
+    def size(self) -> Optional[float]:
+        """The size in square metres"""
+        if normalize.SIZE_FIELD in self.expose:
+            return self.expose[normalize.SIZE_FIELD]
+        return normalize.parse_size(self.expose['size'])
+
+    @cached_property
+    def rooms(self) -> Optional[float]:
+        """The number of rooms"""
+        if normalize.ROOMS_FIELD in self.expose:
+            return self.expose[normalize.ROOMS_FIELD]
+        return normalize.parse_rooms(self.expose['rooms'])
 
 
 class AlreadySeenFilter(AbstractFilter):
     """Filter exposes that have already been processed"""
 
+    persistent = True
+
     def __init__(self, id_watch):
         self.id_watch = id_watch
 
@@ -54,6 +120,21 @@ class AlreadySeenFilter(AbstractFilter):
             return True
         return False
 
+    def filter_batch(self, exposes):
+        """Keep the exposes that were not processed before, looking up all IDs
+           in one query and marking the new ones as processed in one write"""
+        if not hasattr(self.id_watch, 'processed_ids'):
+            return super().filter_batch(exposes)
+        seen = self.id_watch.processed_ids([expose['id'] for expose in exposes])
+        fresh = []
+        for expose in exposes:
+            if expose['id'] not in seen:
+                seen.add(expose['id'])
+                fresh.append(expose)
+        if fresh:
+            self.id_watch.mark_processed_many([expose['id'] for expose in fresh])
+        return fresh
+
 
 class MaxPriceFilter(AbstractFilter):
     """Exclude exposes above a given price"""
@@ -144,12 +225,12 @@ class TitleFilter(AbstractFilter):
 
     def __init__(self, filtered_titles):
         self.filtered_titles = filtered_titles
+        combined_excludes = "(" + ")|(".join(filtered_titles) + ")"
+        self.pattern = re.compile(combined_excludes, re.IGNORECASE)
 
     def is_interesting(self, expose):
         """True unless title matches the filtered titles"""
-        combined_excludes = "(" + ")|(".join(self.filtered_titles) + ")"
-        found_objects = re.search(
-            combined_excludes, expose['title'], re.IGNORECASE)
+        found_objects = self.pattern.search(expose['title'])
         # send all non matching regex patterns
         if not found_objects:
             return True
@@ -178,21 +259,12 @@ class ExcludeAreasFilter(AbstractFilter):
     def __init__(self, exclude_names: List[str], exclude_postcodes: List[str]):
         self.exclude_names = [n.lower() for n in exclude_names]
         self.exclude_postcodes = [p.upper() for p in exclude_postcodes]
+        self.matcher = AreaMatcher(self.exclude_names, self.exclude_postcodes)
 
     def is_interesting(self, expose) -> bool:
         """Return False (exclude) if address contains a forbidden name or postcode"""
         address = expose.get("address", "") or ""
-        address_lower = address.lower()
-        address_upper = address.upper()
-
-        if any(name in address_lower for name in self.exclude_names):
-            return False
-
-        for postcode in self.exclude_postcodes:
-            if re.search(r'\b' + re.escape(postcode) + r'\b', address_upper):
-                return False
-
-        return True
+        return not self.matcher.matches(address)
 
 
 class FilterBuilder:
@@ -231,26 +303,118 @@ class FilterBuilder:
         return self
 
     def build(self):
-        """Return the compiled filter"""
+        """Return the compiled filter. Patterns are compiled as the filters are
+        created, and the filter parses the numbers of each expose only once"""
         return Filter(self.filters)
 
 
+@dataclass
+class FilterStats:
+    """Number of exposes checked and rejected by a filter, and the time spent"""
+    calls: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rank(self) -> float:
+        """Expected time spent per rejected expose. Filters with the lowest rank
+           are applied first"""
+        if self.calls == 0:
+            return 0.0
+        reject_rate = (self.rejected + 1) / (self.calls + 2)
+        return self.seconds / self.calls / reject_rate
+
+
 class Filter:
     """Abstract filter object"""
 
+    # Number of exposes after which the filters are put in order again
+    REORDER_INTERVAL = 100
+    # Most exposes checked at once by the persistent filters
+    BATCH_SIZE = 100
+
     filters: List[AbstractFilter]
 
     def __init__(self, filters: List[AbstractFilter]):
         self.filters = filters
+        self.stats: Dict[AbstractFilter, FilterStats] = {f: FilterStats() for f in filters}
+        self.order = [f for f in filters if not f.persistent] + \
+                     [f for f in filters if f.persistent]
+        self.checked = 0
+
+    def _check(self, expose_filter: AbstractFilter, view: ExposeView) -> bool:
+        stats = self.stats[expose_filter]
+        start = time.perf_counter()
+        interesting = expose_filter.is_interesting(view)
+        stats.seconds += time.perf_counter() - start
+        stats.calls += 1
+        if not interesting:
+            stats.rejected += 1
+        return interesting
+
+    def _check_batch(self, expose_filter: AbstractFilter, exposes: List) -> List:
+        stats = self.stats[expose_filter]
+        start = time.perf_counter()
+        interesting = expose_filter.filter_batch(exposes)
+        stats.seconds += time.perf_counter() - start
+        stats.calls += len(exposes)
+        stats.rejected += len(exposes) - len(interesting)
+        return interesting
+
+    def _count_checked(self, count: int):
+        before = self.checked
+        self.checked += count
+        if self.checked // self.REORDER_INTERVAL != before // self.REORDER_INTERVAL:
+            self.reorder()
 
     def is_interesting_expose(self, expose):
-        """Apply all filters to this expose"""
-        return reduce((lambda x, y: x and y),
-                      map((lambda x: x.is_interesting(expose)), self.filters), True)
+        """Apply the filters to this expose, until one of them rejects it"""
+        view = expose if isinstance(expose, ExposeView) else ExposeView(expose)
+        interesting = all(self._check(f, view) for f in self.order)
+        self._count_checked(1)
+        return interesting
+
+    def reorder(self):
+        """Put the in-memory filters in order of their rank, with the persistent
+           filters last in the order they were added"""
+        in_memory = sorted((f for f in self.filters if not f.persistent),
+                           key=lambda f: self.stats[f].rank)
+        self.order = in_memory + [f for f in self.filters if f.persistent]
+
+    def summary(self) -> List[str]:
+        """One line of statistics per filter, in the order they are applied"""
+        lines = []
+        for expose_filter in self.order:
+            stats = self.stats[expose_filter]
+            lines.append(f"{type(expose_filter).__name__}: {stats.calls} checked, "
+                         f"{stats.rejected} rejected, {stats.seconds * 1000:.2f} ms")
+        return lines
 
     def filter(self, exposes):
-        """Apply all filters to every expose in the list"""
-        return filter(self.is_interesting_expose, exposes)
+        """Apply all filters to every expose in the sequence. The exposes that
+           pass the in-memory filters are handed to the persistent filters in
+           batches of up to BATCH_SIZE, or of those that are there already when
+           the next expose has to be waited for"""
+        iterator = iter(exposes)
+        batch = take_ready(iterator, self.BATCH_SIZE)
+        while batch:
+            yield from self.filter_batch(batch)
+            batch = take_ready(iterator, self.BATCH_SIZE)
+
+    def filter_batch(self, exposes: List) -> List:
+        """Apply all filters to a batch of exposes, and return those that pass"""
+        order = self.order
+        in_memory = [f for f in order if not f.persistent]
+        interesting = []
+        for expose in exposes:
+            view = expose if isinstance(expose, ExposeView) else ExposeView(expose)
+            if all(self._check(f, view) for f in in_memory):
+                interesting.append(expose)
+        for expose_filter in order:
+            if expose_filter.persistent and interesting:
+                interesting = self._check_batch(expose_filter, interesting)
+        self._count_checked(len(exposes))
+        return interesting
 
     @staticmethod
     def builder():
@@ -0,0 +1,145 @@
+# pylint: disable=missing-docstring
+import unittest
+from unittest import mock
+
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.filter import AbstractFilter, AlreadySeenFilter, ExposeHelper, \
+    ExposeView, Filter, MaxPriceFilter, TitleFilter
+from flathunter.testing.config import StringConfig
+from flathunter.utils.stream import ReadyIterator
+
+CONFIG = """
+filters:
+  excluded_titles:
+    - "wg"
+    - "tausch"
+  min_price: 800
+  max_price: 2500
+  min_size: 30
+  max_size: 120
+  min_rooms: 2
+  max_rooms: 4
+  max_price_per_square: 40
+exclude_areas:
+  names: ["Peckham"]
+  postcodes: ["SE15", "E14"]
+"""
+
+
+def _expose(price="£1,500 pcm", size="50 sq. m", rooms="2 bedrooms",
+            title="Lovely flat", address="2 Camden Road, NW1 9LS"):
+    return {"id": 1, "price": price, "size": size, "rooms": rooms,
+            "title": title, "address": address}
+
+
+EXPOSES = [
+    _expose(),
+    _expose(price="£700 pcm"),
+    _expose(price="2.600 €"),
+    _expose(price="POA"),
+    _expose(size="20,5 m²"),
+    _expose(size="unknown", rooms="Studio"),
+    _expose(rooms="5 bedrooms"),
+    _expose(price="£2,400 pcm", size="31 sq. m"),
+    _expose(title="Room in a WG"),
+    _expose(address="Flat 3, Canary Wharf, E14 5AB"),
+    _expose(address="10 Peckham High Street"),
+    _expose(address="1 High Street, SE155AB"),
+]
+
+
+class CountingFilter(AbstractFilter):
+
+    def __init__(self, interesting=True):
+        self.interesting = interesting
+        self.calls = 0
+
+    def is_interesting(self, _expose):
+        self.calls += 1
+        return self.interesting
+
+
+class FilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filter = Filter.builder().read_config(StringConfig(string=CONFIG)).build()
+
+    def test_compiled_filter_matches_filters_on_raw_exposes(self):
+        for expose in EXPOSES:
+            expected = all([f.is_interesting(expose) for f in self.filter.filters])
+            self.assertEqual(self.filter.is_interesting_expose(expose), expected, expose)
+        self.assertEqual(len(list(self.filter.filter(EXPOSES))), 3)
+
+    def test_numbers_are_parsed_once_per_expose(self):
+        with mock.patch.object(ExposeHelper, 'parse_price',
+                               wraps=ExposeHelper.parse_price) as parse_price:
+            self.filter.is_interesting_expose(_expose())
+        self.assertEqual(parse_price.call_count, 1)
+
+    def test_view_reads_through_to_expose(self):
+        view = ExposeView(_expose(price="1.234 €", size="45,5 m²"))
+        self.assertEqual(view.price, 1234)
+        self.assertEqual(view.size, 45.5)
+        self.assertEqual(view.rooms, 2)
+        self.assertEqual(view["title"], "Lovely flat")
+        self.assertIsNone(view.get("missing"))
+
+    def test_title_pattern_is_compiled_once(self):
+        title_filter = TitleFilter(["wg", "tausch"])
+        self.assertFalse(title_filter.is_interesting({"title": "Wohnungstausch"}))
+        self.assertTrue(title_filter.is_interesting({"title": "Altbau"}))
+
+    def test_stops_at_first_rejection(self):
+        id_watch = IdMaintainer(":memory:")
+        expose_filter = Filter([AlreadySeenFilter(id_watch), MaxPriceFilter(1000)])
+        self.assertFalse(expose_filter.is_interesting_expose(_expose(price="£1500 pcm")))
+        self.assertFalse(id_watch.is_processed(1))
+        self.assertTrue(expose_filter.is_interesting_expose(_expose(price="£900 pcm")))
+        self.assertTrue(id_watch.is_processed(1))
+
+    def test_persistent_filters_are_applied_last(self):
+        already_seen = AlreadySeenFilter(IdMaintainer(":memory:"))
+        cheap = CountingFilter()
+        expose_filter = Filter([already_seen, cheap])
+        self.assertEqual(expose_filter.order, [cheap, already_seen])
+        expose_filter.stats[already_seen].calls = 10
+        expose_filter.reorder()
+        self.assertEqual(expose_filter.order, [cheap, already_seen])
+
+    def test_filters_are_reordered_by_cost_per_rejection(self):
+        slow = CountingFilter()
+        selective = CountingFilter(interesting=False)
+        expose_filter = Filter([slow, selective])
+        expose_filter.stats[slow].seconds = 1.0
+        for _ in range(Filter.REORDER_INTERVAL):
+            expose_filter.is_interesting_expose(_expose())
+        self.assertEqual(expose_filter.order, [selective, slow])
+        expose_filter.is_interesting_expose(_expose())
+        self.assertEqual(slow.calls, Filter.REORDER_INTERVAL)
+        self.assertEqual(selective.calls, Filter.REORDER_INTERVAL + 1)
+        self.assertEqual(expose_filter.stats[selective].rejected, Filter.REORDER_INTERVAL + 1)
+        self.assertEqual(len(expose_filter.summary()), 2)
+
+    def test_already_seen_exposes_are_filtered_in_batches(self):
+        id_watch = IdMaintainer(":memory:")
+        id_watch.mark_processed(2)
+        expose_filter = Filter([MaxPriceFilter(1000), AlreadySeenFilter(id_watch)])
+        exposes = [dict(_expose(price="£900 pcm"), id=expose_id) for expose_id in [1, 2, 3, 1]]
+        exposes.append(dict(_expose(price="£1200 pcm"), id=4))
+        with mock.patch.object(id_watch, 'is_processed') as is_processed:
+            kept = list(expose_filter.filter(exposes))
+        is_processed.assert_not_called()
+        self.assertEqual([expose['id'] for expose in kept], [1, 3])
+        self.assertEqual(id_watch.processed_ids([1, 2, 3, 4]), {1, 2, 3})
+
+    def test_batches_are_handed_on_when_the_next_expose_is_not_there(self):
+        expose_filter = Filter([MaxPriceFilter(1000)])
+        batches = []
+        filter_batch = expose_filter.filter_batch
+        expose_filter.filter_batch = lambda exposes: batches.append(len(exposes)) or \
+            filter_batch(exposes)
+        exposes = [dict(_expose(price="£900 pcm"), id=expose_id) for expose_id in range(5)]
+        # the others arrive while the first expose is being filtered
+        kept = list(expose_filter.filter(ReadyIterator(exposes, lambda: len(batches) > 0)))
+        self.assertEqual(batches, [1, 4])
+        self.assertEqual(len(kept), 5)
@@ -1,11 +1,15 @@
 """Calculate Google-Maps distances between specific locations and the target flat"""
 import datetime
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import quote_plus
 import requests
 
 from flathunter.core.logging import logger
 from flathunter.core.abstract_processor import Processor
+from flathunter.processing.duration_cache import Key, cache_key, get_duration_cache
+from flathunter.utils.list import chunk_list
 
 class GMapsDurationProcessor(Processor):
     """Implementation of Processor class to calculate travel durations"""
@@ -14,16 +18,48 @@ class GMapsDurationProcessor(Processor):
     GM_MODE_BICYCLE = 'bicycling'
     GM_MODE_DRIVING = 'driving'
 
+    concurrency = 4
+    # Most origins the Distance Matrix API takes in one request
+    MAX_ORIGINS = 25
+
     def __init__(self, config):
         self.config = config
+        self.cache = get_duration_cache()
 
     def process_expose(self, expose):
         """Calculate the durations for an expose"""
         expose['durations'] = self.get_formatted_durations(expose['address']).strip()
         return expose
 
-    def get_formatted_durations(self, address):
+    def process_batch(self, exposes):
+        """Calculate the durations for a batch of exposes, with one request per
+           destination and mode for up to MAX_ORIGINS addresses not cached yet.
+           Up to `concurrency` requests are made at once"""
+        addresses = list(dict.fromkeys(expose['address'] for expose in exposes))
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency),
+                                thread_name_prefix='gmaps') as executor:
+            distances = self.get_cached_distances_to(addresses, self._destinations(),
+                                                     executor.map)
+        for expose in exposes:
+            expose['durations'] = self.get_formatted_durations(
+                expose['address'],
+                lambda address, dest, mode: distances[(address, dest, mode)]).strip()
+        return exposes
+
+    def _destinations(self):
+        """The (destination, mode) pairs that durations are shown for"""
+        pairs = []
+        for duration in self.config.get('durations', []):
+            if 'destination' in duration and 'name' in duration:
+                for mode in duration.get('modes', []):
+                    if 'gm_id' in mode and 'title' in mode \
+                                       and 'key' in self.config.get('google_maps_api', {}):
+                        pairs.append((duration.get('destination'), mode['gm_id']))
+        return list(dict.fromkeys(pairs))
+
+    def get_formatted_durations(self, address, get_distance=None):
         """Return a formatted list of GoogleMaps durations"""
+        get_distance = get_distance or self.get_gmaps_distance
         out = ""
         for duration in self.config.get('durations', []):
             if 'destination' in duration and 'name' in duration:
@@ -32,7 +68,7 @@ class GMapsDurationProcessor(Processor):
                 for mode in duration.get('modes', []):
                     if 'gm_id' in mode and 'title' in mode \
                                        and 'key' in self.config.get('google_maps_api', {}):
-                        duration = self.get_gmaps_distance(address, dest, mode['gm_id'])
+                        duration = get_distance(address, dest, mode['gm_id'])
                         title = mode['title']
                         out += f"> {name} ({title}): {duration}\n"
 
@@ -40,15 +76,61 @@ class GMapsDurationProcessor(Processor):
 
     def get_gmaps_distance(self, address, dest, mode):
         """Get the distance"""
-        # get timestamp for next monday at 9:00:00 o'clock
+        return self.get_cached_distances([address], dest, mode)[address]
+
+    def get_cached_distances(self, addresses, dest, mode):
+        """Get the distances from several addresses to a destination by address,
+           requesting those not in the duration cache"""
+        distances = self.get_cached_distances_to(addresses, [(dest, mode)])
+        return {address: distances[(address, dest, mode)] for address in addresses}
+
+    def get_cached_distances_to(self, addresses, destinations,
+                                map_requests: Callable[..., Iterable] = map):
+        """Get the distances from several addresses to several (destination, mode)
+           pairs by (address, destination, mode), requesting those not in the
+           duration cache. The requests are made with `map_requests`"""
+        # Durations are the same for every week, so only the weekday and time count
+        arrival = self._arrival().strftime('%a %H:%M')
+        keys: Dict[Tuple[str, str, str], Key] = {}
+        cached: Dict[Key, Optional[str]] = {}
+        pending: List[Tuple[List[str], str, str]] = []
+        for dest, mode in destinations:
+            # Addresses that differ only in their form are requested once
+            missing: Dict[Key, str] = {}
+            for address in addresses:
+                key = keys[(address, dest, mode)] = cache_key(address, dest, mode, arrival)
+                if key not in cached:
+                    cached[key] = self.cache.get(key) if self.cache is not None else None
+                if cached[key] is None:
+                    missing.setdefault(key, address)
+            for chunk in chunk_list(list(missing.values()), self.MAX_ORIGINS):
+                pending.append((chunk, dest, mode))
+        found = []
+        results = map_requests(lambda request: self.get_gmaps_distances(*request), pending)
+        for (chunk, dest, mode), distances in zip(pending, results):
+            for address, distance in zip(chunk, distances):
+                key = keys[(address, dest, mode)]
+                cached[key] = distance
+                if distance is not None:
+                    found.append((key, distance))
+        if self.cache is not None:
+            self.cache.put_many(found)
+        return {request: cached[key] for request, key in keys.items()}
+
+    @staticmethod
+    def _arrival():
+        """Next monday at 9:00:00 o'clock"""
         now = datetime.datetime.today().replace(hour=9, minute=0, second=0)
-        next_monday = now + datetime.timedelta(days=7 - now.weekday())
-        arrival_time = str(int(time.mktime(next_monday.timetuple())))
+        return now + datetime.timedelta(days=7 - now.weekday())
+
+    def get_gmaps_distances(self, addresses, dest, mode):
+        """Get the distances from several addresses to a destination, in one request"""
+        arrival_time = str(int(time.mktime(self._arrival().timetuple())))
 
         # decode from unicode and url encode addresses
-        address = quote_plus(address.strip().encode('utf8'))
+        origins = '%7C'.join(quote_plus(address.strip().encode('utf8')) for address in addresses)
         dest = quote_plus(dest.strip().encode('utf8'))
-        logger.debug("Got address: %s", address)
+        logger.debug("Got addresses: %s", origins)
 
         # get google maps config stuff
         base_url = self.config.get('google_maps_api', {}).get('url')
@@ -62,27 +144,32 @@ class GMapsDurationProcessor(Processor):
             base_url = base_url.replace('&key={key}', '')
 
         # retrieve the result
-        url = base_url.format(dest=dest, mode=mode, origin=address,
+        url = base_url.format(dest=dest, mode=mode, origin=origins,
                               key=gm_key, arrival=arrival_time)
         result = requests.get(url, timeout=30).json()
         if result['status'] != 'OK':
-            logger.error("Failed retrieving distance to address %s: %s", address, result)
-            return None
+            logger.error("Failed retrieving distance to addresses %s: %s", origins, result)
+            return [None] * len(addresses)
+
+        # get the fastest route for every address, in the order of the rows
+        rows = result.get('rows', [])
+        return [self._fastest(address, rows[index], result) if index < len(rows) else None
+                for index, address in enumerate(addresses)]
 
-        # get the fastest route
+    @staticmethod
+    def _fastest(address, row, result):
         distances = {}
-        for row in result['rows']:
-            for element in row['elements']:
-                if 'status' in element and element['status'] != 'OK':
-                    logger.warning("For address %s we got the status message: %s",
-                                         address, element['status'])
-                    logger.debug("We got this result: %s", repr(result))
-                    continue
-                logger.debug("Got distance and duration: %s / %s (%i seconds)",
-                                   element['distance']['text'],
-                                   element['duration']['text'],
-                                   element['duration']['value'])
-                duration_text = element['duration']['text']
-                distance_text = element['distance']['text']
-                distances[element['duration']['value']] = f"{duration_text} ({distance_text})"
+        for element in row['elements']:
+            if 'status' in element and element['status'] != 'OK':
+                logger.warning("For address %s we got the status message: %s",
+                                     address, element['status'])
+                logger.debug("We got this result: %s", repr(result))
+                continue
+            logger.debug("Got distance and duration: %s / %s (%i seconds)",
+                               element['distance']['text'],
+                               element['duration']['text'],
+                               element['duration']['value'])
+            duration_text = element['duration']['text']
+            distance_text = element['distance']['text']
+            distances[element['duration']['value']] = f"{duration_text} ({distance_text})"
         return distances[min(distances.keys())] if distances else None
@@ -1,9 +1,11 @@
 # pylint: disable=missing-docstring
 import re
+import threading
 import unittest
 import requests_mock
 from flathunter.app.hunter import Hunter
 from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.gmaps_duration_processor import GMapsDurationProcessor
 from flathunter.testing.dummy_crawler import DummyCrawler
 from flathunter.testing.util import count
 from flathunter.testing.config import StringConfig
@@ -48,4 +50,41 @@ durations:
             for expose in without_durations:
                 print("Got expose: ", expose)
 
-        self.assertTrue(len(without_durations) == 0, "Expected durations to be calculated")
\ No newline at end of file
+        self.assertTrue(len(without_durations) == 0, "Expected durations to be calculated")
+
+    @requests_mock.Mocker()
+    def test_one_request_per_destination_and_mode_for_a_batch(self, m):
+        config = StringConfig(string=self.DUMMY_CONFIG)
+        processor = GMapsDurationProcessor(config)
+        matcher = re.compile('maps.googleapis.com/maps/api/distancematrix/json')
+        rows = [{"elements": [{"distance": {"text": f"{i} km", "value": i},
+                               "duration": {"text": f"{i} mins", "value": i}}]}
+                for i in range(30)]
+        m.get(matcher, json={"status": "OK", "rows": rows})
+        exposes = [{'address': f"{i} High Street"} for i in range(30)]
+        exposes.append({'address': "0 High Street"})
+        processor.process_batch(exposes)
+        # 3 destination/mode pairs, 30 addresses in chunks of 25
+        self.assertEqual(m.call_count, 6)
+        self.assertTrue(any("origins=0+High+Street%7C1+High+Street%7C" in request.url
+                            for request in m.request_history))
+        self.assertIn("> The Queen (By Bus): 1 mins (1 km)", exposes[1]['durations'])
+        self.assertIn("> The Queen (By Bus): 0 mins (0 km)", exposes[25]['durations'])
+        self.assertEqual(exposes[30]['durations'], exposes[0]['durations'])
+
+    def test_requests_of_a_batch_are_made_concurrently(self):
+        config = StringConfig(string=self.DUMMY_CONFIG)
+        processor = GMapsDurationProcessor(config)
+        # Each of the 3 requests waits for the others, so they fail unless made at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def get_gmaps_distances(addresses, dest, mode):
+            barrier.wait()
+            return [f"{mode} to {dest}"] * len(addresses)
+
+        processor.get_gmaps_distances = get_gmaps_distances
+        exposes = processor.process_batch([{'address': "1 High Street"},
+                                           {'address': "2 High Street"}])
+        self.assertIn("> The Queen (By Bus): transit to Buckingham Palace UK",
+                      exposes[0]['durations'])
+        self.assertIn("> Москва (Car): driving to главная площадь", exposes[1]['durations'])
@@ -0,0 +1,320 @@
+"""Detection of listings re-posted under a new ID with the same photo. The
+thumbnail of every listing (`expose['image']`) is reduced to a 64-bit difference
+hash, which changes little when a photo is resized or re-compressed, and looked
+up in a BK-tree of the hashes of recent listings: a listing whose hash is within
+`max_distance` bits of another listing's is a re-post of it.
+
+Hashes are stored in an SQLite database by thumbnail URL, so that a thumbnail is
+downloaded and hashed once, and the tree is rebuilt from the database when the
+process starts. Thumbnails of a batch are downloaded concurrently. Decoding the
+images needs Pillow (`pip install Pillow`); without it the stage passes all
+listings on"""
+import datetime
+import io
+import sqlite3 as lite
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+import requests
+
+from flathunter.core.abstract_processor import Processor
+from flathunter.core.logging import logger
+from flathunter.crawling.http_session import get_session_pool
+
+try:
+    from PIL import Image  # type: ignore
+except ImportError:
+    Image = None  # type: ignore
+
+# Width and height of the grey-scale image a difference hash is computed from
+HASH_WIDTH = 9
+HASH_HEIGHT = 8
+
+DROP = 'drop'
+LINK = 'link'
+
+T = TypeVar('T')
+
+
+def difference_hash(pixels: Sequence[int], width: int = HASH_WIDTH) -> int:
+    """64-bit hash of a grey-scale image of 9x8 pixels, given row by row: one
+       bit per pair of neighbouring pixels, set if the left one is brighter"""
+    value = 0
+    for row in range(0, len(pixels), width):
+        for column in range(row, row + width - 1):
+            value = (value << 1) | (pixels[column] > pixels[column + 1])
+    return value
+
+
+def image_hash(data: bytes) -> Optional[int]:
+    """The difference hash of an encoded image, or None if it can't be decoded"""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Lets the JPEG decoder skip most of the work for a small result
+            image.draft('L', (4 * HASH_WIDTH, 4 * HASH_HEIGHT))
+            pixels = image.convert('L').resize((HASH_WIDTH, HASH_HEIGHT), Image.BILINEAR)
+            return difference_hash(pixels.tobytes())
+    except (OSError, ValueError) as error:
+        logger.debug("Could not decode image: %s", error)
+        return None
+
+
+def hamming(first: int, second: int) -> int:
+    """Number of bits in which two hashes differ"""
+    return (first ^ second).bit_count()
+
+
+class BKTree(Generic[T]):
+    """Hashes indexed by Hamming distance. A lookup only descends into the
+       subtrees whose distance to their parent is within reach of the query"""
+
+    def __init__(self):
+        # Every node is [hash, item, {distance: child node}]
+        self.root: Optional[list] = None
+        self.size = 0
+
+    def add(self, value: int, item: T):
+        """Index an item by its hash"""
+        self.size += 1
+        node = [value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        parent = self.root
+        while True:
+            distance = hamming(value, parent[0])
+            child = parent[2].get(distance)
+            if child is None:
+                parent[2][distance] = node
+                return
+            parent = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, T]]:
+        """Items with a hash within max_distance of the value, and their distance,
+           closest first"""
+        if self.root is None:
+            return []
+        found: List[Tuple[int, T]] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.append((distance, node[1]))
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda match: match[0])
+        return found
+
+
+class ImageHashIndex:
+    """Thumbnail hashes of recent listings, stored in SQLite and indexed in a
+       BK-tree on first use. Hashes older than the window leave the index, and
+       their rows are deleted on the next flush"""
+
+    def __init__(self, db_name: str, max_distance: int = 6,
+                 window: datetime.timedelta = datetime.timedelta(days=90)):
+        self.db_name = db_name
+        self.max_distance = max_distance
+        self.window = window
+        self.threadlocal = threading.local()
+        self.tree: BKTree[Tuple[str, str, str]] = BKTree()
+        # (hash, (crawler, id), last seen) by thumbnail URL, least recently seen first
+        self.entries: OrderedDict[str, Tuple[int, Tuple[str, str], datetime.datetime]] = \
+            OrderedDict()
+        # Number of nodes of the tree whose thumbnail left the index
+        self.stale = 0
+        self.expired = False
+        self.pending: List[Tuple] = []
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        """Connects to the SQLite database. Connections are thread-local"""
+        connection = getattr(self.threadlocal, 'connection', None)
+        if connection is None:
+            connection = lite.connect(self.db_name)
+            connection.execute('CREATE TABLE IF NOT EXISTS image_hashes (url TEXT PRIMARY KEY, \
+                                hash INTEGER, crawler TEXT, id TEXT, created TIMESTAMP)')
+            connection.commit()
+            self.threadlocal.connection = connection
+        return connection
+
+    def ensure_loaded(self):
+        """Index the hashes of the listings of the last `window`"""
+        with self._lock:
+            if self.loaded:
+                return
+            cur = self.get_connection().cursor()
+            cur.execute('SELECT url, hash, crawler, id, created FROM image_hashes \
+                         WHERE created >= ? ORDER BY created',
+                        (datetime.datetime.now() - self.window,))
+            for url, value, crawler, expose_id, created in cur.fetchall():
+                # Stored as signed 64-bit integers
+                value &= (1 << 64) - 1
+                key = (str(crawler), str(expose_id))
+                self.entries[url] = (value, key, datetime.datetime.fromisoformat(created))
+                self.tree.add(value, key + (url,))
+            self.loaded = True
+            self.expired = True
+        logger.debug("Indexed %d thumbnail hashes", self.tree.size)
+
+    def _evict(self):
+        # Called with the lock held
+        oldest = datetime.datetime.now() - self.window
+        while self.entries:
+            url, (_, _, seen) = next(iter(self.entries.items()))
+            if seen >= oldest:
+                break
+            del self.entries[url]
+            self.stale += 1
+            self.expired = True
+        # The tree can't drop single nodes, so it is rebuilt once half of it is stale
+        if self.stale and self.stale * 2 >= self.tree.size:
+            self.tree = BKTree()
+            for url, (value, key, _) in self.entries.items():
+                self.tree.add(value, key + (url,))
+            self.stale = 0
+
+    def cached_hash(self, url: str) -> Optional[int]:
+        """The hash of a thumbnail hashed before"""
+        with self._lock:
+            entry = self.entries.get(url)
+            return entry[0] if entry is not None else None
+
+    def find(self, value: int, key: Tuple[str, str]) -> Optional[Tuple[str, str, str]]:
+        """The closest other listing with a similar thumbnail, as (crawler, id,
+           thumbnail URL)"""
+        with self._lock:
+            self._evict()
+            matches = [item for _, item in self.tree.search(value, self.max_distance)
+                       if item[2] in self.entries]
+        for item in matches:
+            if item[:2] != key:
+                return item
+        return None
+
+    def add(self, url: str, value: int, key: Tuple[str, str]):
+        """Index the hash of a thumbnail, to be stored on the next flush. A
+           thumbnail indexed before stays in the index for another window"""
+        now = datetime.datetime.now()
+        with self._lock:
+            self._evict()
+            entry = self.entries.get(url)
+            if entry is None:
+                self.tree.add(value, (key[0], key[1], url))
+            else:
+                value, key, _ = entry
+                self.entries.move_to_end(url)
+            self.entries[url] = (value, key, now)
+            # Stored as signed 64-bit integers
+            signed = value - (1 << 64) if value >= 1 << 63 else value
+            self.pending.append((url, signed, key[0], key[1], now))
+
+    def flush(self):
+        """Store the hashes indexed since the last flush, and delete those
+           older than the window"""
+        with self._lock:
+            rows, self.pending = self.pending, []
+            expired, self.expired = self.expired, False
+        if not rows and not expired:
+            return
+        connection = self.get_connection()
+        # A thumbnail seen again keeps the listing it was first seen with
+        connection.executemany('INSERT INTO image_hashes VALUES (?, ?, ?, ?, ?) \
+                                ON CONFLICT (url) DO UPDATE SET created = excluded.created',
+                               rows)
+        if expired:
+            connection.execute('DELETE FROM image_hashes WHERE created < ?',
+                               (datetime.datetime.now() - self.window,))
+        connection.commit()
+
+
+def image_index_for(config) -> Optional[ImageHashIndex]:
+    """The thumbnail hash index set up in the config, or None if detection of
+       re-posted photos is disabled"""
+    if not config.image_dedup_enabled():
+        return None
+    return ImageHashIndex(config.image_dedup_database(), config.image_dedup_max_distance(),
+                          datetime.timedelta(days=config.image_dedup_window_days()))
+
+
+class ImageDuplicateDetector(Processor):
+    """Processor that finds listings whose thumbnail is a near copy of a recent
+       listing's. With action 'drop' they are dropped; with 'link' they are
+       passed on with the matching listing in `duplicate_of`"""
+
+    def __init__(self, config, index: ImageHashIndex):
+        self.config = config
+        self.index = index
+        self.action = config.image_dedup_action()
+        self.workers = config.image_dedup_workers()
+        self.timeout = config.image_dedup_timeout()
+        if Image is None:
+            logger.warning("Pillow is not installed: photos are not checked for re-posts")
+        else:
+            self.index.ensure_loaded()
+
+    def download(self, url: str) -> Optional[bytes]:
+        """The thumbnail at the URL, or None if it could not be downloaded"""
+        try:
+            response = get_session_pool().get(url, timeout=self.timeout)
+        except requests.exceptions.RequestException as error:
+            logger.debug("Could not download thumbnail %s: %s", url, error)
+            return None
+        if response.status_code != 200:
+            logger.debug("Could not download thumbnail %s: status %d", url,
+                         response.status_code)
+            return None
+        return response.content
+
+    def hashes(self, urls: List[str]) -> Dict[str, int]:
+        """Hashes of the thumbnails, downloading those not hashed before"""
+        result = {}
+        missing = []
+        for url in urls:
+            value = self.index.cached_hash(url)
+            if value is None:
+                missing.append(url)
+            else:
+                result[url] = value
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as executor:
+                for url, data in zip(missing, executor.map(self.download, missing)):
+                    value = image_hash(data) if data is not None else None
+                    if value is not None:
+                        result[url] = value
+        return result
+
+    def process_batch(self, exposes):
+        """Check the thumbnails of a batch of exposes for re-posted photos"""
+        if Image is None:
+            return exposes
+        urls = list(dict.fromkeys(expose['image'] for expose in exposes if expose.get('image')))
+        hashes = self.hashes(urls)
+        passed = []
+        for expose in exposes:
+            value = hashes.get(expose.get('image'))
+            # Blank and single-coloured images all hash to 0
+            if not value:
+                passed.append(expose)
+                continue
+            key = (str(expose.get('crawler', '')), str(expose['id']))
+            original = self.index.find(value, key)
+            self.index.add(expose['image'], value, key)
+            if original is None:
+                passed.append(expose)
+                continue
+            logger.info("Expose %s from %s re-posts the photo of %s from %s", expose['id'],
+                        expose.get('crawler'), original[1], original[0])
+            if self.action == LINK:
+                expose['duplicate_of'] = {'crawler': original[0], 'id': original[1],
+                                          'image': original[2]}
+                passed.append(expose)
+        self.index.flush()
+        return passed
@@ -0,0 +1,145 @@
+# pylint: disable=missing-docstring
+import datetime
+import io
+import os
+import random
+import tempfile
+import time
+import unittest
+
+import pytest
+import requests_mock
+
+from flathunter.processing import image_dedup
+from flathunter.processing.image_dedup import BKTree, ImageDuplicateDetector, ImageHashIndex, \
+    difference_hash, hamming, image_index_for
+from flathunter.testing.config import StringConfig
+
+
+def photo(seed, size=(320, 240), quality=90):
+    pil = pytest.importorskip("PIL.Image")
+    rng = random.Random(seed)
+    image = pil.new('L', (16, 12))
+    image.putdata([rng.randrange(256) for _ in range(16 * 12)])
+    buffer = io.BytesIO()
+    image.resize(size, pil.BILINEAR).convert('RGB').save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def expose(expose_id, image, crawler='Rightmove'):
+    return {'id': expose_id, 'crawler': crawler, 'image': image, 'title': f"Flat {expose_id}"}
+
+
+class DifferenceHashTest(unittest.TestCase):
+
+    def test_gradients(self):
+        falling = [255 - 20 * column for _ in range(8) for column in range(9)]
+        rising = [20 * column for _ in range(8) for column in range(9)]
+        self.assertEqual(difference_hash(falling), (1 << 64) - 1)
+        self.assertEqual(difference_hash(rising), 0)
+        self.assertEqual(hamming(difference_hash(falling), difference_hash(rising)), 64)
+
+
+class BKTreeTest(unittest.TestCase):
+
+    def test_same_as_comparing_with_every_hash(self):
+        rng = random.Random(4)
+        values = [rng.getrandbits(64) for _ in range(500)]
+        # near copies of some of the hashes
+        values += [value ^ (1 << rng.randrange(64)) for value in values[:50]]
+        tree = BKTree()
+        for index, value in enumerate(values):
+            tree.add(value, index)
+        for query in values[:100] + [rng.getrandbits(64) for _ in range(20)]:
+            expected = sorted(index for index, value in enumerate(values)
+                              if hamming(query, value) <= 6)
+            self.assertEqual(sorted(index for _, index in tree.search(query, 6)), expected)
+        self.assertEqual(BKTree().search(0, 6), [])
+
+
+class ImageHashIndexTest(unittest.TestCase):
+
+    def test_hashes_are_stored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_name = os.path.join(directory, 'image_hashes.db')
+            index = ImageHashIndex(db_name)
+            index.ensure_loaded()
+            index.add('https://img.example.com/1.jpg', (1 << 64) - 2, ('Zoopla', '1'))
+            index.flush()
+            reloaded = ImageHashIndex(db_name)
+            reloaded.ensure_loaded()
+            self.assertEqual(reloaded.cached_hash('https://img.example.com/1.jpg'), (1 << 64) - 2)
+            self.assertEqual(reloaded.find((1 << 64) - 1, ('Zoopla', '2')),
+                             ('Zoopla', '1', 'https://img.example.com/1.jpg'))
+            self.assertIsNone(reloaded.find((1 << 64) - 1, ('Zoopla', '1')))
+
+    def test_old_hashes_leave_the_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_name = os.path.join(directory, 'image_hashes.db')
+            index = ImageHashIndex(db_name, window=datetime.timedelta(seconds=0.4))
+            index.ensure_loaded()
+            index.add('https://img.example.com/1.jpg', 12345, ('Zoopla', '1'))
+            index.add('https://img.example.com/2.jpg', (1 << 40) - 1, ('Zoopla', '2'))
+            index.flush()
+            time.sleep(0.2)
+            # seen again, so it stays for another window
+            index.add('https://img.example.com/2.jpg', (1 << 40) - 1, ('Zoopla', '3'))
+            index.flush()
+            time.sleep(0.3)
+            self.assertIsNone(index.find(12345, ('Zoopla', '4')))
+            self.assertIsNone(index.cached_hash('https://img.example.com/1.jpg'))
+            self.assertEqual(index.find((1 << 40) - 1, ('Zoopla', '4')),
+                             ('Zoopla', '2', 'https://img.example.com/2.jpg'))
+            self.assertEqual(index.tree.size, 1)
+            index.flush()
+            rows = index.get_connection().execute('SELECT url, id FROM image_hashes').fetchall()
+            self.assertEqual(rows, [('https://img.example.com/2.jpg', '2')])
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(image_index_for(StringConfig(string="")))
+
+
+class ImageDuplicateDetectorTest(unittest.TestCase):
+
+    def detector(self, directory, action='drop'):
+        config = StringConfig(string=f"image_dedup:\n  enabled: true\n  action: {action}\n"
+                                     f"  database: {directory}/image_hashes.db\n")
+        index = image_index_for(config)
+        assert index is not None
+        return ImageDuplicateDetector(config, index)
+
+    @requests_mock.Mocker()
+    def test_reposted_photo_is_dropped(self, mocker):
+        mocker.get('https://img.example.com/a.jpg', content=photo(1))
+        mocker.get('https://img.example.com/a-small.jpg', content=photo(1, (160, 120), 60))
+        mocker.get('https://img.example.com/b.jpg', content=photo(2))
+        with tempfile.TemporaryDirectory() as directory:
+            detector = self.detector(directory)
+            first = list(detector.process_exposes([expose(1, 'https://img.example.com/a.jpg'),
+                                                   expose(2, 'https://img.example.com/b.jpg')]))
+            self.assertEqual([e['id'] for e in first], [1, 2])
+            reposted = [expose(3, 'https://img.example.com/a-small.jpg', 'Zoopla'),
+                        expose(4, 'https://img.example.com/a.jpg')]
+            self.assertEqual(list(detector.process_exposes(reposted)), [])
+            # every thumbnail was downloaded once
+            self.assertEqual(mocker.call_count, 3)
+
+    @requests_mock.Mocker()
+    def test_reposted_photo_is_linked(self, mocker):
+        mocker.get('https://img.example.com/a.jpg', content=photo(1))
+        mocker.get('https://img.example.com/c.jpg', content=photo(1, quality=50))
+        with tempfile.TemporaryDirectory() as directory:
+            detector = self.detector(directory, 'link')
+            exposes = list(detector.process_exposes([expose(1, 'https://img.example.com/a.jpg'),
+                                                     expose(5, 'https://img.example.com/c.jpg')]))
+            self.assertNotIn('duplicate_of', exposes[0])
+            self.assertEqual(exposes[1]['duplicate_of'],
+                             {'crawler': 'Rightmove', 'id': '1',
+                              'image': 'https://img.example.com/a.jpg'})
+
+    def test_without_pillow_all_exposes_pass(self):
+        if image_dedup.Image is not None:
+            pytest.skip("Pillow is installed")
+        with tempfile.TemporaryDirectory() as directory:
+            exposes = [expose(1, 'https://img.example.com/a.jpg')]
+            self.assertEqual(list(self.detector(directory).process_exposes(exposes)), exposes)
@@ -0,0 +1,154 @@
+"""Parsing of the price, size and rooms texts of exposes into numbers. Every
+crawler declares how its portal writes numbers: 'uk' for 1,250.50 and 'eu'
+for 1.250,50; for crawlers that don't, the format is guessed from the text.
+
+Prices are converted to a monthly price, sizes to square metres, and a studio
+counts as 0 rooms. The `Normalizer` stage runs right after crawling and stores
+the numbers in the expose, where filters, storage and statistics read them.
+
+Addresses are normalized for comparison by the duplicate detection and the
+travel duration cache: words in lower case (letters of any script), street
+abbreviations written out and postcodes written with a space"""
+import re
+from typing import Dict, List, Optional, Union
+
+from flathunter.core.abstract_processor import Processor
+from flathunter.processing.area_matcher import FULL_POSTCODE_PATTERN
+
+UK = 'uk'
+EU = 'eu'
+
+# Typed fields added to exposes by the normalizer
+PRICE_FIELD = 'price_pcm'
+SIZE_FIELD = 'size_sqm'
+ROOMS_FIELD = 'rooms_count'
+
+SQUARE_METRES_PER_SQUARE_FOOT = 0.09290304
+WEEKS_PER_MONTH = 52 / 12
+
+NUMBER_PATTERN = re.compile(r'\d[\d.,]*')
+WEEKLY_PATTERN = re.compile(
+    r'^\W*(p\.?w\.?|pppw|per\s+week|a\s+week|weekly|/\s*w(ee)?k)\b', re.I)
+YEARLY_PATTERN = re.compile(
+    r'^\W*(p\.?a\.?|per\s+annum|per\s+year|a\s+year|yearly|annually|/\s*y(ea)?r)\b', re.I)
+# The UK crawlers write sizes as '<n> ft' and '<n> m', without the 'sq'
+SQUARE_FEET_PATTERN = re.compile(
+    r'^\W*(sq\.?\s*f(ee)?t|sqft|ft²|ft2|square\s+f(ee|oo)t|f(ee|oo)?t\b)', re.I)
+STUDIO_PATTERN = re.compile(r'\bstudio\b', re.I)
+
+# Letters and digits of any script, such as the words of 'Königstraße 5'
+WORD_PATTERN = re.compile(r'[^\W_]+')
+# Common abbreviations in street names, written out
+ABBREVIATIONS = {'rd': 'road', 'st': 'street', 'ave': 'avenue', 'ln': 'lane', 'sq': 'square',
+                 'ct': 'court', 'pl': 'place', 'dr': 'drive', 'gdns': 'gardens',
+                 'cres': 'crescent', 'terr': 'terrace', 'hse': 'house'}
+# Words that start the number of a flat within a building
+UNIT_WORDS = {'flat', 'apartment', 'apt', 'unit', 'room'}
+
+Text = Union[str, int, float, None]
+
+
+def _decimal_mark(digits: str, locale: Optional[str]) -> str:
+    if locale == UK:
+        return '.'
+    if locale == EU:
+        return ','
+    last = max(digits.rfind('.'), digits.rfind(','))
+    if last < 0:
+        return '.'
+    mark = digits[last]
+    other = ',' if mark == '.' else '.'
+    # A single separator followed by three digits groups thousands
+    if other not in digits and (digits.count(mark) > 1 or len(digits) - last - 1 == 3):
+        return other
+    return mark
+
+
+def _number(text: str, locale: Optional[str]):
+    match = NUMBER_PATTERN.search(text)
+    if match is None:
+        return None, ''
+    digits = match[0].rstrip('.,')
+    decimal = _decimal_mark(digits, locale)
+    thousands = ',' if decimal == '.' else '.'
+    value = float(digits.replace(thousands, '').replace(decimal, '.'))
+    # The unit is what follows the number, up to the next number
+    unit = re.split(r'\d', text[match.end():], maxsplit=1)[0]
+    return value, unit
+
+
+def parse_number(text: Text, locale: Optional[str] = None) -> Optional[float]:
+    """The first number in a text, written in the given format"""
+    if text is None or isinstance(text, (int, float)):
+        return None if text is None else float(text)
+    return _number(text, locale)[0]
+
+
+def parse_price(text: Text, locale: Optional[str] = None) -> Optional[float]:
+    """The monthly price of a price text, such as '£1,250 pcm' or '£300 pw'"""
+    if text is None or isinstance(text, (int, float)):
+        return None if text is None else float(text)
+    value, unit = _number(text, locale)
+    if value is None:
+        return None
+    if WEEKLY_PATTERN.search(unit):
+        return round(value * WEEKS_PER_MONTH, 2)
+    if YEARLY_PATTERN.search(unit):
+        return round(value / 12, 2)
+    return value
+
+
+def parse_size(text: Text, locale: Optional[str] = None) -> Optional[float]:
+    """The size in square metres of a size text, such as '45,5 m²' or '750 ft'"""
+    if text is None or isinstance(text, (int, float)):
+        return None if text is None else float(text)
+    value, unit = _number(text, locale)
+    if value is None:
+        return None
+    if SQUARE_FEET_PATTERN.search(unit):
+        return round(value * SQUARE_METRES_PER_SQUARE_FOOT, 1)
+    return value
+
+
+def parse_rooms(text: Text, locale: Optional[str] = None) -> Optional[float]:
+    """The number of rooms of a rooms text, 0 for a studio"""
+    if text is None or isinstance(text, (int, float)):
+        return None if text is None else float(text)
+    value = _number(text, locale)[0]
+    if value is None and STUDIO_PATTERN.search(text):
+        return 0.0
+    return value
+
+
+def normalize_address(address: str) -> str:
+    """An address in lower case, with abbreviations written out, postcodes
+       written with a space and without the number of the flat"""
+    address = FULL_POSTCODE_PATTERN.sub(r'\1 \2', address.upper().strip())
+    segments = []
+    for segment in address.lower().split(','):
+        words: List[str] = WORD_PATTERN.findall(segment)
+        words = [ABBREVIATIONS.get(word, word) for word in words]
+        if words and words[0] in UNIT_WORDS:
+            words = words[2:]
+        if words:
+            segments.append(' '.join(words))
+    return ', '.join(segments) or address.lower()
+
+
+class Normalizer(Processor):
+    """Processor that adds the price per month, size in square metres and number
+       of rooms to exposes, parsed with the number format of their crawler"""
+
+    def __init__(self, config):
+        self.config = config
+        self.locales: Dict[str, Optional[str]] = {
+            searcher.get_name(): getattr(searcher, 'NUMBER_LOCALE', None)
+            for searcher in config.searchers()}
+
+    def process_expose(self, expose):
+        """Parse the numbers of an expose"""
+        locale = self.locales.get(expose.get('crawler'))
+        expose[PRICE_FIELD] = parse_price(expose.get('price'), locale)
+        expose[SIZE_FIELD] = parse_size(expose.get('size'), locale)
+        expose[ROOMS_FIELD] = parse_rooms(expose.get('rooms'), locale)
+        return expose
@@ -0,0 +1,130 @@
+# pylint: disable=missing-docstring
+import os
+import unittest
+
+from bs4 import BeautifulSoup
+
+from flathunter.app.hunter import Hunter
+from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.filter import ExposeView
+from flathunter.processing.normalize import EU, UK, Normalizer, normalize_address, \
+    parse_number, parse_price, parse_rooms, parse_size
+from flathunter.testing.config import StringConfig
+from flathunter.testing.dummy_crawler import DummyCrawler
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                        "testing", "fixtures")
+
+CONFIG = """
+urls:
+  - https://www.example.com/liste/berlin/wohnungen/mieten?roomi=2&prima=1500&wflmi=70&sort=createdate%2Bdesc
+"""
+
+
+class NormalizeAddressTest(unittest.TestCase):
+
+    def test_forms_of_the_same_address(self):
+        self.assertEqual(normalize_address("Flat 3, 12 Elm Rd, London SE17PB"),
+                         "12 elm road, london se1 7pb")
+        self.assertEqual(normalize_address("flat 5 12 Elm Road,  London  SE1 7PB"),
+                         "12 elm road, london se1 7pb")
+        self.assertNotEqual(normalize_address("14 Elm Road, London SE1 7PB"),
+                            normalize_address("12 Elm Road, London SE1 7PB"))
+        self.assertEqual(normalize_address(" ,"), ",")
+
+    def test_letters_of_any_script_are_kept(self):
+        self.assertEqual(normalize_address("Königstraße 5, 10115 Berlin"),
+                         "königstrasse 5, 10115 berlin")
+        self.assertNotEqual(normalize_address("Via Città 3, Milano"),
+                            normalize_address("Via Citt 3, Milano"))
+
+
+class ParseNumberTest(unittest.TestCase):
+
+    def test_locales(self):
+        self.assertEqual(parse_number("1,250.50", UK), 1250.5)
+        self.assertEqual(parse_number("1.250,50", EU), 1250.5)
+        self.assertEqual(parse_number("1.250", EU), 1250)
+        self.assertEqual(parse_number("1,250", UK), 1250)
+
+    def test_guessed_format(self):
+        self.assertEqual(parse_number("£1,500"), 1500)
+        self.assertEqual(parse_number("1.500 €"), 1500)
+        self.assertEqual(parse_number("45,5 m²"), 45.5)
+        self.assertEqual(parse_number("1.234.567"), 1234567)
+        self.assertEqual(parse_number("2.5 baths"), 2.5)
+        self.assertEqual(parse_number("1.234,5"), 1234.5)
+        self.assertIsNone(parse_number("POA"))
+        self.assertIsNone(parse_number(None))
+        self.assertEqual(parse_number(3), 3)
+
+
+class ParsePriceTest(unittest.TestCase):
+
+    def test_monthly_prices(self):
+        self.assertEqual(parse_price("£1,500 pcm", UK), 1500)
+        self.assertEqual(parse_price("£1,500 per month", UK), 1500)
+        self.assertEqual(parse_price("850 € Kaltmiete", EU), 850)
+
+    def test_weekly_and_yearly_prices(self):
+        self.assertEqual(parse_price("£300 pw", UK), 1300)
+        self.assertEqual(parse_price("£300 p.w.", UK), 1300)
+        self.assertEqual(parse_price("£180 pppw", UK), 780)
+        self.assertEqual(parse_price("£450 per week", UK), 1950)
+        self.assertEqual(parse_price("£18,000 pa", UK), 1500)
+        # only the unit right after the price counts
+        self.assertEqual(parse_price("£1,300 pcm (£300 pw)", UK), 1300)
+
+
+class ParseSizeAndRoomsTest(unittest.TestCase):
+
+    def test_sizes(self):
+        self.assertEqual(parse_size("45,5 m²", EU), 45.5)
+        self.assertEqual(parse_size("50 sq. m", UK), 50)
+        self.assertEqual(parse_size("1,158 ft", UK), 107.6)
+        self.assertEqual(parse_size("79 m", UK), 79)
+
+    def test_sizes_of_crawled_listings(self):
+        config = StringConfig(string=CONFIG)
+        config.set_searchers([Rightmove(config)])
+        with open(os.path.join(FIXTURES, "rightmove-search.html"), encoding="utf-8") as fixture:
+            exposes = config.searchers()[0].extract_data(BeautifulSoup(fixture.read(), "lxml"))
+        normalizer = Normalizer(config)
+        sizes = {expose['size']: normalizer.process_expose(expose)['size_sqm']
+                 for expose in exposes if expose['size']}
+        self.assertEqual(sizes['1,158 ft'], 107.6)
+        self.assertEqual(sizes['536 ft'], 49.8)
+        self.assertTrue(all(size.endswith(' ft') for size in sizes))
+
+    def test_rooms(self):
+        self.assertEqual(parse_rooms("2 bedrooms"), 2)
+        self.assertEqual(parse_rooms("Studio"), 0)
+        self.assertEqual(parse_rooms("2,5 Zimmer", EU), 2.5)
+        self.assertIsNone(parse_rooms(""))
+
+
+class NormalizerTest(unittest.TestCase):
+
+    def test_adds_typed_fields(self):
+        config = StringConfig(string=CONFIG)
+        normalizer = Normalizer(config)
+        normalizer.locales['Rightmove'] = UK
+        expose = normalizer.process_expose({'id': 1, 'crawler': 'Rightmove',
+                                            'price': '£400 pw', 'size': '646 ft',
+                                            'rooms': 'Studio'})
+        self.assertEqual((expose['price_pcm'], expose['size_sqm'], expose['rooms_count']),
+                         (1733.33, 60, 0))
+        view = ExposeView(dict(expose, price='unparseable'))
+        self.assertEqual((view.price, view.size, view.rooms), (1733.33, 60, 0))
+
+    def test_hunter_stores_typed_fields(self):
+        config = StringConfig(string=CONFIG)
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        Hunter(config, id_watch).hunt_flats()
+        stored = id_watch.get_recent_exposes(5)
+        self.assertTrue(stored)
+        for expose in stored:
+            self.assertEqual(expose['price_pcm'], parse_price(expose['price']))
+            self.assertEqual(expose['rooms_count'], parse_rooms(expose['rooms']))
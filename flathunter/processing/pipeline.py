@@ -0,0 +1,207 @@
+"""Pipelined execution of a processor chain. Every processor runs as a stage on
+its own thread, and stages are connected by bounded queues, so that a slow
+stage holds back the stages before it once its queue is full, but does not stop
+the stages after it from working on the exposes it has already passed on.
+
+Processors that work on one expose at a time can declare a `concurrency`: the
+stage then runs `process_expose` on that many worker threads. Exposes leave the
+stage in the order they came in, unless `keep_order` is off, in which case they
+leave as soon as they are done. Processors that work on batches, or that
+override `process_exposes`, see the stream of exposes on a single thread.
+
+Given a run report, every stage records its measurements in it"""
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Generator, Iterable, Iterator, Optional, Sequence, Set
+
+from flathunter.core.abstract_processor import Processor
+from flathunter.core.logging import logger
+from flathunter.processing.run_report import RunReport, StageStats
+from flathunter.utils.stream import ReadyIterator
+
+_DONE = object()
+
+
+class _Failure:
+    """Wraps an exception raised in a stage, to be raised to the caller"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _Stopped(Exception):
+    """The pipeline was stopped while a stage was waiting on a queue"""
+
+
+class Pipeline:
+    """Runs the processors of a chain as concurrent stages"""
+
+    # Seconds between checks whether the pipeline was stopped
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, queue_size: int = 100, keep_order: bool = True,
+                 concurrency: Optional[Dict[str, int]] = None):
+        self.queue_size = max(1, queue_size)
+        self.keep_order = keep_order
+        self.concurrency = concurrency or {}
+
+    def workers_for(self, processor: Processor) -> int:
+        """Number of exposes the processor works on at once"""
+        name = type(processor).__name__
+        return max(1, int(self.concurrency.get(name, getattr(processor, 'concurrency', 1))))
+
+    def process(self, processors: Sequence[Processor], exposes: Iterable,
+                report: Optional[RunReport] = None) -> Generator:
+        """Run the exposes through the processors and yield the results. Closing
+           the generator stops the pipeline"""
+        if report is None:
+            report = RunReport()
+        stop = threading.Event()
+        inbox: queue.Queue = queue.Queue(self.queue_size)
+        threads = [threading.Thread(target=self._feed, args=(exposes, inbox, stop),
+                                    name="pipeline-source", daemon=True)]
+        for processor in processors:
+            outbox: queue.Queue = queue.Queue(self.queue_size)
+            threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(processor, report.stage(type(processor).__name__), inbox, outbox, stop),
+                name=f"pipeline-{type(processor).__name__}", daemon=True))
+            inbox = outbox
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _put(self, target: queue.Queue, item, stop: threading.Event):
+        while True:
+            if stop.is_set():
+                raise _Stopped()
+            try:
+                target.put(item, timeout=self.POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _items(self, source: queue.Queue, stop: threading.Event) -> Iterator:
+        def items():
+            while True:
+                try:
+                    item = source.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    if stop.is_set():
+                        raise _Stopped() from None
+                    continue
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+
+        return ReadyIterator(items(), lambda: not source.empty())
+
+    def _finish(self, outbox: queue.Queue, stop: threading.Event,
+                error: Optional[BaseException] = None):
+        try:
+            if error is not None:
+                self._put(outbox, _Failure(error), stop)
+            self._put(outbox, _DONE, stop)
+        except _Stopped:
+            pass
+
+    def _feed(self, exposes: Iterable, outbox: queue.Queue, stop: threading.Event):
+        try:
+            for expose in exposes:
+                self._put(outbox, expose, stop)
+        except _Stopped:
+            return
+        except BaseException as error:  # pylint: disable=broad-except
+            self._finish(outbox, stop, error)
+            return
+        self._finish(outbox, stop)
+
+    def _run_stage(self, processor: Processor, stats: StageStats, inbox: queue.Queue,
+                   outbox: queue.Queue, stop: threading.Event):
+        try:
+            if processor.supports_batches() or \
+                    type(processor).process_exposes is not Processor.process_exposes:
+                for expose in stats.meter(processor.process_exposes, self._items(inbox, stop)):
+                    self._put(outbox, expose, stop)
+            else:
+                self._run_workers(processor, stats, inbox, outbox, stop)
+        except _Stopped:
+            return
+        except BaseException as error:  # pylint: disable=broad-except
+            logger.debug("Stage %s failed: %s", type(processor).__name__, error)
+            self._finish(outbox, stop, error)
+            return
+        self._finish(outbox, stop)
+
+    def _run_workers(self, processor: Processor, stats: StageStats, inbox: queue.Queue,
+                     outbox: queue.Queue, stop: threading.Event):
+        workers = self.workers_for(processor)
+        if workers == 1:
+            for expose in self._items(inbox, stop):
+                self._put(outbox, stats.call(processor.process_expose, expose), stop)
+            return
+        # Bounds the number of exposes in the stage that were not passed on yet
+        in_flight = threading.Semaphore(2 * workers)
+        submitted: queue.Queue = queue.Queue()
+        collector = threading.Thread(target=self._collect,
+                                     args=(submitted, in_flight, outbox, stop),
+                                     name=f"pipeline-{type(processor).__name__}-out",
+                                     daemon=True)
+        collector.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix=type(processor).__name__) as executor:
+                for expose in self._items(inbox, stop):
+                    while not in_flight.acquire(timeout=self.POLL_INTERVAL):
+                        if stop.is_set():
+                            raise _Stopped()
+                    submitted.put(executor.submit(stats.call, processor.process_expose, expose))
+        finally:
+            submitted.put(_DONE)
+            collector.join()
+
+    def _collect(self, submitted: queue.Queue, in_flight: threading.Semaphore,
+                 outbox: queue.Queue, stop: threading.Event):
+        try:
+            if self.keep_order:
+                future = submitted.get()
+                while future is not _DONE:
+                    self._put(outbox, future.result(), stop)
+                    in_flight.release()
+                    future = submitted.get()
+                return
+            pending: Set[Future] = set()
+            submitting = True
+            while submitting or pending:
+                while submitting:
+                    try:
+                        item = submitted.get(block=not pending)
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        submitting = False
+                    else:
+                        pending.add(item)
+                done, _ = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    self._put(outbox, future.result(), stop)
+                    in_flight.release()
+        except _Stopped:
+            return
+        except BaseException as error:  # pylint: disable=broad-except
+            self._finish(outbox, stop, error)
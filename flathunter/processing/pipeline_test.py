@@ -0,0 +1,131 @@
+# pylint: disable=missing-docstring
+import threading
+import time
+import unittest
+
+import pytest
+
+from flathunter.app.hunter import Hunter
+from flathunter.core.abstract_processor import Processor
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.default_processors import LambdaProcessor
+from flathunter.processing.filter import Filter, MaxPriceFilter
+from flathunter.processing.pipeline import Pipeline
+from flathunter.processing.processor import ProcessorChain
+from flathunter.testing.dummy_crawler import DummyCrawler
+from flathunter.testing.config import StringConfig
+
+CONFIG = """
+urls:
+  - https://www.example.com/liste/berlin/wohnungen/mieten?roomi=2&prima=1500&wflmi=70&sort=createdate%2Bdesc
+"""
+
+
+class SlowProcessor(Processor):
+
+    def __init__(self, delay, concurrency=1, key='slow'):
+        self.delay = delay
+        self.concurrency = concurrency
+        self.key = key
+
+    def process_expose(self, expose):
+        time.sleep(self.delay * (1 + expose['id'] % 3) / 2)
+        expose[self.key] = True
+        return expose
+
+
+class FailingProcessor(Processor):
+
+    def process_expose(self, expose):
+        if expose['id'] == 3:
+            raise ValueError("no address")
+        return expose
+
+
+def exposes(count=12):
+    return [{'id': index, 'price': f"{index * 100} €"} for index in range(count)]
+
+
+class PipelineTest(unittest.TestCase):
+
+    def processors(self):
+        config = StringConfig(string="")
+        return [LambdaProcessor(config, lambda e: dict(e, seen=True)),
+                SlowProcessor(0.01, concurrency=4),
+                LambdaProcessor(config, lambda e: e)]
+
+    def test_same_results_as_sequential_chain(self):
+        config = StringConfig(string="")
+        filter_set = Filter([MaxPriceFilter(800)])
+        chain = ProcessorChain.builder(config) \
+            .map(lambda e: dict(e, seen=True)) \
+            .apply_filter(filter_set) \
+            .build()
+        chain.processors.append(SlowProcessor(0.01, concurrency=4))
+        expected = list(chain.process(exposes()))
+        chain.pipeline = Pipeline(queue_size=2)
+        self.assertEqual(list(chain.process(exposes())), expected)
+        self.assertEqual(len(expected), 9)
+
+    def test_stages_overlap(self):
+        stages = [SlowProcessor(0.02, concurrency=4, key='address'),
+                  SlowProcessor(0.02, concurrency=4, key='durations'),
+                  SlowProcessor(0.02, key='sent')]
+        start = time.perf_counter()
+        results = list(Pipeline().process(stages, exposes()))
+        elapsed = time.perf_counter() - start
+        self.assertEqual([e['id'] for e in results], list(range(12)))
+        self.assertTrue(all(e['address'] and e['durations'] and e['sent'] for e in results))
+        # One at a time, the three stages take about 0.72s
+        self.assertLess(elapsed, 0.5)
+
+    def test_unordered_results(self):
+        pipeline = Pipeline(keep_order=False, concurrency={'SlowProcessor': 6})
+        results = list(pipeline.process(self.processors(), exposes()))
+        self.assertEqual(sorted(e['id'] for e in results), list(range(12)))
+
+    def test_batches_do_not_wait_for_a_slow_source(self):
+        handed_on = threading.Event()
+
+        class Batches(Processor):
+            def process_batch(self, exposes):
+                handed_on.set()
+                return exposes
+
+        def source():
+            yield from exposes(3)
+            # the rest of the crawl waits for the first batch
+            handed_on.wait(timeout=2)
+            yield from exposes(6)[3:]
+
+        started = time.perf_counter()
+        results = list(Pipeline().process([Batches()], source()))
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual([e['id'] for e in results], list(range(6)))
+
+    def test_errors_are_raised_to_caller(self):
+        for pipeline in (Pipeline(), Pipeline(keep_order=False)):
+            stages = [SlowProcessor(0.001, concurrency=2), FailingProcessor()]
+            with pytest.raises(ValueError):
+                list(pipeline.process(stages, exposes()))
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('pipeline')])
+
+    def test_stops_when_caller_stops_reading(self):
+        results = Pipeline(queue_size=1).process(self.processors(), exposes(1000))
+        self.assertEqual(next(results)['id'], 0)
+        results.close()
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('pipeline')])
+
+    def test_workers_from_config(self):
+        pipeline = Pipeline(concurrency={'SlowProcessor': 8})
+        self.assertEqual(pipeline.workers_for(SlowProcessor(0)), 8)
+        self.assertEqual(pipeline.workers_for(FailingProcessor()), 1)
+
+    def test_hunter_runs_pipeline(self):
+        config = StringConfig(string=CONFIG + "pipeline:\n  enabled: true\n  queue_size: 4\n")
+        config.set_searchers([DummyCrawler(addresses_as_links=True)])
+        hunter = Hunter(config, IdMaintainer(":memory:"))
+        results = hunter.hunt_flats()
+        self.assertTrue(len(results) > 4)
+        for expose in results:
+            self.assertFalse(expose['address'].startswith('http'))
@@ -1,6 +1,6 @@
 """Utility classes for building chains for processors"""
 from functools import reduce
-from typing import List
+from typing import List, Optional
 
 from flathunter.processing.default_processors import AddressResolver
 from flathunter.processing.default_processors import Filter
@@ -8,9 +8,14 @@ from flathunter.processing.default_processors import LambdaProcessor
 from flathunter.processing.default_processors import CrawlExposeDetails
 from flathunter.notifiers import SenderMattermost, SenderTelegram, SenderApprise, SenderSlack, SenderFile
 from flathunter.processing.gmaps_duration_processor import GMapsDurationProcessor
+from flathunter.processing.dedup import DuplicateDetector
+from flathunter.processing.image_dedup import ImageDuplicateDetector
+from flathunter.processing.normalize import Normalizer
 from flathunter.persistence.idmaintainer import SaveAllExposesProcessor
 from flathunter.core.abstract_processor import Processor
 from flathunter.llm.property_scorer import PropertyScorerProcessor
+from flathunter.processing.pipeline import Pipeline
+from flathunter.processing.run_report import RunReport
 
 class ProcessorChainBuilder:
     """Builder pattern for building chains of processors"""
@@ -19,6 +24,7 @@ class ProcessorChainBuilder:
     def __init__(self, config):
         self.processors = []
         self.config = config
+        self.report = None
 
     def send_messages(self, receivers=None):
         """Add processor that sends messages for exposes using factory pattern"""
@@ -48,11 +54,28 @@ class ProcessorChainBuilder:
                 self.processors.append(SenderFile(self.config))
         return self
 
+    def normalize(self):
+        """Add processor that parses the price, size and rooms of exposes into numbers"""
+        self.processors.append(Normalizer(self.config))
+        return self
+
     def resolve_addresses(self):
         """Add processor that resolves addresses from expose pages"""
         self.processors.append(AddressResolver(self.config))
         return self
 
+    def deduplicate(self, index):
+        """Add processor that drops duplicates of recent listings, if enabled"""
+        if index is not None:
+            self.processors.append(DuplicateDetector(self.config, index))
+        return self
+
+    def deduplicate_images(self, index):
+        """Add processor that finds re-posts of the photos of recent listings, if enabled"""
+        if index is not None:
+            self.processors.append(ImageDuplicateDetector(self.config, index))
+        return self
+
     def calculate_durations(self):
         """Add processor to calculate durations, if enabled"""
         durations_enabled = "google_maps_api" in self.config \
@@ -88,19 +111,45 @@ class ProcessorChainBuilder:
             self.processors.append(PropertyScorerProcessor(self.config))
         return self
 
+    def instrument(self, report: Optional[RunReport]):
+        """Record the measurements of every processor in the run report"""
+        self.report = report
+        return self
+
     def build(self):
         """Build the processor chain"""
-        return ProcessorChain(self.processors)
+        batch_size = self.config.processing_batch_size()
+        if batch_size is not None:
+            for processor in self.processors:
+                processor.batch_size = batch_size
+        pipeline = None
+        if self.config.pipeline_enabled():
+            pipeline = Pipeline(self.config.pipeline_queue_size(),
+                                self.config.pipeline_keep_order(),
+                                self.config.pipeline_concurrency())
+        return ProcessorChain(self.processors, pipeline, self.report)
 
 class ProcessorChain:
     """Class to hold a chain of processors"""
     processors: List[Processor]
 
-    def __init__(self, processors):
+    def __init__(self, processors, pipeline: Optional[Pipeline] = None,
+                 report: Optional[RunReport] = None):
         self.processors = processors
+        self.pipeline = pipeline
+        self.report = report
 
     def process(self, exposes):
-        """Process the sequences of exposes with the processor chain"""
+        """Process the sequences of exposes with the processor chain. With a
+           pipeline, the processors run concurrently as its stages. With a run
+           report, every processor is measured as a stage of the report"""
+        if self.pipeline is not None:
+            return self.pipeline.process(self.processors, exposes, self.report)
+        if self.report is not None:
+            for processor in self.processors:
+                stats = self.report.stage(type(processor).__name__)
+                exposes = stats.meter(processor.process_exposes, exposes)
+            return exposes
         return reduce((lambda exposes, processor: processor.process_exposes(exposes)),
                       self.processors, exposes)
 
@@ -1,11 +1,15 @@
 # pylint: disable=missing-docstring
 import unittest
+from unittest import mock
 from flathunter.app.hunter import Hunter
+from flathunter.core.abstract_processor import Processor
 from flathunter.persistence.idmaintainer import IdMaintainer
 from flathunter.processing.processor import ProcessorChain
+from flathunter.processing.run_report import RunReport
 from flathunter.testing.dummy_crawler import DummyCrawler
 from flathunter.testing.util import count
 from flathunter.testing.config import StringConfig
+from flathunter.utils.stream import ReadyIterator
 
 class ProcessorTest(unittest.TestCase):
 
@@ -41,3 +45,56 @@ google_maps_api:
         exposes = chain.process(exposes)
         for expose in exposes:
             self.assertFalse(expose['address'].startswith('http'), "Expected addresses to be processed")
+
+
+class BatchRecorder(Processor):
+
+    def __init__(self):
+        self.batches = []
+
+    def process_batch(self, exposes):
+        self.batches.append(len(exposes))
+        return [expose for expose in exposes if expose['id'] % 2 == 0]
+
+
+class ProcessBatchTest(unittest.TestCase):
+
+    def test_batches_have_configured_size(self):
+        config = StringConfig(string="processing:\n  batch_size: 4\n")
+        recorder = BatchRecorder()
+        builder = ProcessorChain.builder(config).map(lambda e: e)
+        builder.processors.append(recorder)
+        chain = builder.build()
+        exposes = list(chain.process({'id': i} for i in range(10)))
+        self.assertEqual(recorder.batches, [4, 4, 2])
+        self.assertEqual([e['id'] for e in exposes], [0, 2, 4, 6, 8])
+
+    def test_batches_are_handed_on_when_the_next_expose_is_not_there(self):
+        for report in [None, RunReport()]:
+            recorder = BatchRecorder()
+            builder = ProcessorChain.builder(StringConfig(string="")).map(lambda e: e)
+            builder.processors.append(recorder)
+            chain = builder.instrument(report).build()
+            # the others arrive while the first expose is being processed
+            source = ReadyIterator(({'id': i} for i in range(6)), lambda: len(recorder.batches) > 0)
+            exposes = list(chain.process(source))
+            self.assertEqual(recorder.batches, [1, 5])
+            self.assertEqual([e['id'] for e in exposes], [0, 2, 4])
+
+    def test_per_expose_processors_are_unchanged(self):
+        processor = Processor()
+        self.assertFalse(processor.supports_batches())
+        self.assertTrue(BatchRecorder().supports_batches())
+        self.assertEqual(processor.process_batch([{'id': 1}]), [{'id': 1}])
+
+    def test_exposes_are_saved_in_one_transaction(self):
+        config = StringConfig(string="")
+        id_watch = IdMaintainer(":memory:")
+        with mock.patch.object(id_watch, 'save_expose') as save_expose, \
+                mock.patch.object(id_watch, 'save_exposes',
+                                  wraps=id_watch.save_exposes) as save_exposes:
+            exposes = list(ProcessorChain.builder(config).save_all_exposes(id_watch).build()
+                           .process(DummyCrawler().get_results("https://www.example.com")))
+        save_expose.assert_not_called()
+        self.assertEqual(save_exposes.call_count, 1)
+        self.assertEqual(len(id_watch.get_recent_exposes(100)), len(exposes))
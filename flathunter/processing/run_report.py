@@ -0,0 +1,150 @@
+"""Measurements of a hunt: for every stage (the crawl and each processor of the
+chain), the number of exposes that went in and came out, the number of errors
+raised, and the wall and CPU time spent in it.
+
+The time of a stage does not include the time spent producing its input: when a
+processor pulls the next expose from the stage before it, that time is counted
+for the stage before. CPU time is that of the threads running the stage, so
+work done on other threads on its behalf (such as the browser of a crawler) is
+not included. With a pipeline, the wall time of a stage with several workers is
+the sum of the time each worker spent on it"""
+import datetime
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flathunter.utils.stream import ReadyIterator, is_ready
+
+
+def _clocks() -> Tuple[float, float]:
+    return time.perf_counter(), time.thread_time()
+
+
+@dataclass
+class StageStats:
+    """Exposes in and out, errors and time spent in one stage of a hunt"""
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _add(self, start: Tuple[float, float], sign: int = 1, items_in: int = 0,
+             items_out: int = 0, errors: int = 0):
+        wall, cpu = _clocks()
+        with self._lock:
+            self.wall_seconds += sign * (wall - start[0])
+            self.cpu_seconds += sign * (cpu - start[1])
+            self.items_in += items_in
+            self.items_out += items_out
+            self.errors += errors
+
+    def record_error(self):
+        """Count an error that the stage handled itself"""
+        with self._lock:
+            self.errors += 1
+
+    def call(self, func: Callable, expose):
+        """Apply a function that processes a single expose, and measure it"""
+        start = _clocks()
+        try:
+            result = func(expose)
+        except BaseException:
+            self._add(start, items_in=1, errors=1)
+            raise
+        self._add(start, items_in=1, items_out=1)
+        return result
+
+    def meter(self, process: Callable[[Iterable], Iterable], exposes: Iterable = ()) -> Iterator:
+        """Run `process` over the exposes and yield its results, measuring the
+           time spent in it. Errors raised by the input are passed on, but not
+           counted for this stage"""
+        upstream_errors: List[BaseException] = []
+        source = iter(exposes)
+        outputs: List[Iterator] = []
+
+        def inputs():
+            while True:
+                start = _clocks()
+                try:
+                    item = next(source)
+                except StopIteration:
+                    self._add(start, sign=-1)
+                    return
+                except BaseException as error:
+                    self._add(start, sign=-1)
+                    upstream_errors.append(error)
+                    raise
+                self._add(start, sign=-1, items_in=1)
+                yield item
+
+        def results():
+            while True:
+                start = _clocks()
+                try:
+                    if not outputs:
+                        outputs.append(iter(process(ReadyIterator(inputs(),
+                                                                  lambda: is_ready(source)))))
+                    item = next(outputs[0])
+                except StopIteration:
+                    self._add(start)
+                    return
+                except BaseException as error:
+                    failed_upstream = any(error is other for other in upstream_errors)
+                    self._add(start, errors=0 if failed_upstream else 1)
+                    raise
+                self._add(start, items_out=1)
+                yield item
+
+        return ReadyIterator(results(), lambda: bool(outputs) and is_ready(outputs[0]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The measurements, as stored with the report"""
+        return {'name': self.name, 'items_in': self.items_in, 'items_out': self.items_out,
+                'errors': self.errors, 'wall_seconds': round(self.wall_seconds, 6),
+                'cpu_seconds': round(self.cpu_seconds, 6)}
+
+
+class RunReport:
+    """Measurements of the stages of one hunt"""
+
+    def __init__(self):
+        self.started = datetime.datetime.now()
+        self.stages: List[StageStats] = []
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self.wall_seconds: Optional[float] = None
+        self.cpu_seconds: Optional[float] = None
+        self._start = (time.perf_counter(), time.process_time())
+
+    def stage(self, name: str) -> StageStats:
+        """Add a stage to the report"""
+        stats = StageStats(name)
+        self.stages.append(stats)
+        return stats
+
+    def record_cache(self, name: str, counts: Dict[str, int]):
+        """Add the number of lookups of a cache answered from memory, from
+           its database and not at all"""
+        self.caches[name] = dict(counts)
+
+    def finish(self):
+        """Record the total time of the hunt"""
+        self.wall_seconds = time.perf_counter() - self._start[0]
+        self.cpu_seconds = time.process_time() - self._start[1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The report, as stored alongside the executions"""
+        return {'started': self.started.isoformat(),
+                'wall_seconds': round(self.wall_seconds or 0.0, 6),
+                'cpu_seconds': round(self.cpu_seconds or 0.0, 6),
+                'stages': [stats.to_dict() for stats in self.stages],
+                'caches': self.caches}
+
+    def summary(self) -> List[str]:
+        """One line per stage, for the log"""
+        return [f"{stats.name}: {stats.items_in} in, {stats.items_out} out, "
+                f"{stats.errors} errors, {stats.wall_seconds:.3f}s wall, "
+                f"{stats.cpu_seconds:.3f}s CPU" for stats in self.stages]
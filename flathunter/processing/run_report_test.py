@@ -0,0 +1,105 @@
+# pylint: disable=missing-docstring
+import time
+import unittest
+
+import pytest
+
+from flathunter.app.hunter import Hunter
+from flathunter.core.abstract_processor import Processor
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.processing.default_processors import Filter as FilterProcessor
+from flathunter.processing.filter import Filter, MaxPriceFilter
+from flathunter.processing.pipeline import Pipeline
+from flathunter.processing.processor import ProcessorChain
+from flathunter.processing.run_report import RunReport
+from flathunter.testing.dummy_crawler import DummyCrawler
+from flathunter.testing.config import StringConfig
+
+CONFIG = """
+urls:
+  - https://www.example.com/liste/berlin/wohnungen/mieten?roomi=2&prima=1500&wflmi=70&sort=createdate%2Bdesc
+"""
+
+
+class SleepingProcessor(Processor):
+
+    def process_expose(self, expose):
+        time.sleep(0.005)
+        return expose
+
+
+class FailingProcessor(Processor):
+
+    def process_expose(self, expose):
+        if expose['id'] == 3:
+            raise ValueError("no address")
+        return expose
+
+
+def exposes(count=10):
+    return [{'id': index, 'price': f"{index * 100} €"} for index in range(count)]
+
+
+def chain(processors, report, pipeline=None):
+    config = StringConfig(string="")
+    builder = ProcessorChain.builder(config).instrument(report)
+    builder.processors.extend(processors)
+    processor_chain = builder.build()
+    processor_chain.pipeline = pipeline
+    return processor_chain
+
+
+class RunReportTest(unittest.TestCase):
+
+    def test_time_of_input_is_not_counted(self):
+        report = RunReport()
+        config = StringConfig(string="")
+        processors = [SleepingProcessor(), FilterProcessor(config, Filter([MaxPriceFilter(500)]))]
+        results = list(chain(processors, report).process(exposes()))
+        self.assertEqual(len(results), 6)
+        sleeping, filtering = report.stages
+        self.assertEqual(sleeping.to_dict()['name'], "SleepingProcessor")
+        self.assertEqual((sleeping.items_in, sleeping.items_out), (10, 10))
+        self.assertEqual(filtering.to_dict()['name'], "Filter")
+        self.assertEqual((filtering.items_in, filtering.items_out), (10, 6))
+        self.assertGreaterEqual(sleeping.wall_seconds, 0.05)
+        self.assertLess(filtering.wall_seconds, 0.02)
+        self.assertLess(sleeping.cpu_seconds, sleeping.wall_seconds)
+
+    def test_errors_are_counted_where_raised(self):
+        for pipeline in (None, Pipeline(queue_size=2)):
+            report = RunReport()
+            with pytest.raises(ValueError):
+                list(chain([FailingProcessor(), SleepingProcessor()], report, pipeline)
+                     .process(exposes()))
+            self.assertEqual([stats.errors for stats in report.stages], [1, 0])
+
+    def test_pipeline_stages_are_measured(self):
+        report = RunReport()
+        processor = SleepingProcessor()
+        processor.concurrency = 4
+        results = list(chain([processor, Processor()], report, Pipeline())
+                       .process(exposes()))
+        self.assertEqual(len(results), 10)
+        self.assertEqual([(s.items_in, s.items_out) for s in report.stages], [(10, 10), (10, 10)])
+        self.assertGreaterEqual(report.stages[0].wall_seconds, 0.05)
+
+    def test_hunt_stores_report(self):
+        config = StringConfig(string=CONFIG)
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        exposes_found = Hunter(config, id_watch).hunt_flats()
+        reports = id_watch.get_run_reports()
+        self.assertEqual(len(reports), 1)
+        stages = reports[0]['stages']
+        self.assertEqual(stages[0]['name'], 'crawl')
+        self.assertEqual(stages[0]['items_out'], stages[1]['items_in'])
+        self.assertEqual(stages[-1]['items_out'], len(exposes_found))
+        self.assertGreater(reports[0]['wall_seconds'], 0)
+
+    def test_report_can_be_disabled(self):
+        config = StringConfig(string=CONFIG + "run_report:\n  enabled: false\n")
+        config.set_searchers([DummyCrawler()])
+        id_watch = IdMaintainer(":memory:")
+        Hunter(config, id_watch).hunt_flats()
+        self.assertEqual(id_watch.get_run_reports(), [])
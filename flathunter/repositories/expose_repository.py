@@ -2,26 +2,35 @@
 import threading
 import sqlite3 as lite
 import json
-from typing import Optional, List, Dict
+from typing import Iterable, Optional, List, Dict, Set
 from datetime import datetime
 from flathunter.core.logging import logger
+from flathunter.persistence.seen_index import OFF, seen_index_for
+
+# Number of IDs per query, below SQLite's limit on the number of parameters
+ID_BATCH_SIZE = 500
 
 class SqliteExposeRepository:
     """SQLite implementation of repository pattern"""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, seen_index: str = OFF, error_rate: float = 0.01):
         self.db_path = db_path
         self.threadlocal = threading.local()
         self._initialize_db()
+        self.seen = seen_index_for(self._load_processed_ids, seen_index, error_rate)
 
     def _initialize_db(self):
         """Create tables if not exist"""
         conn = self._get_connection()
         cur = conn.cursor()
         cur.execute('CREATE TABLE IF NOT EXISTS processed (ID INTEGER)')
+        cur.execute('CREATE INDEX IF NOT EXISTS processed_id ON processed (ID)')
         cur.execute('CREATE TABLE IF NOT EXISTS exposes (id INTEGER, created TIMESTAMP, '
                    'crawler STRING, details BLOB, PRIMARY KEY (id, crawler))')
         cur.execute('CREATE TABLE IF NOT EXISTS executions (timestamp timestamp)')
+        cur.execute('CREATE TABLE IF NOT EXISTS run_reports (timestamp timestamp, report BLOB)')
+        cur.execute('CREATE TABLE IF NOT EXISTS watermarks (url STRING PRIMARY KEY, ids BLOB, '
+                    'updated TIMESTAMP)')
         conn.commit()
 
     def _get_connection(self):
@@ -34,6 +43,8 @@ class SqliteExposeRepository:
 
     def is_processed(self, expose_id: int | str) -> bool:
         """Check if expose has been processed"""
+        if self.seen is not None:
+            return bool(self.seen.lookup([expose_id], self._query_processed_ids))
         conn = self._get_connection()
         cur = conn.cursor()
         cur.execute("SELECT * FROM processed WHERE ID=?", (str(expose_id),))
@@ -47,6 +58,44 @@ class SqliteExposeRepository:
         cur = conn.cursor()
         cur.execute("INSERT INTO processed VALUES (?)", (str(expose_id),))
         conn.commit()
+        if self.seen is not None:
+            self.seen.add_many([expose_id])
+
+    def processed_ids(self, expose_ids: Iterable[int | str]) -> Set[int | str]:
+        """Return the given IDs that have been processed"""
+        if self.seen is not None:
+            return self.seen.lookup(expose_ids, self._query_processed_ids)
+        return self._query_processed_ids(expose_ids)
+
+    def _query_processed_ids(self, expose_ids: Iterable[int | str]) -> Set[int | str]:
+        """Look up processed IDs in the database, in one query per batch"""
+        expose_ids = list(expose_ids)
+        found = set()
+        cur = self._get_connection().cursor()
+        for start in range(0, len(expose_ids), ID_BATCH_SIZE):
+            chunk = [str(expose_id) for expose_id in expose_ids[start:start + ID_BATCH_SIZE]]
+            placeholders = ",".join("?" * len(chunk))
+            cur.execute(f"SELECT ID FROM processed WHERE ID IN ({placeholders})", chunk)
+            found.update(str(row[0]) for row in cur.fetchall())
+        return {expose_id for expose_id in expose_ids if str(expose_id) in found}
+
+    def mark_processed_many(self, expose_ids: Iterable[int | str]) -> None:
+        """Mark exposes as processed, in a single transaction"""
+        expose_ids = list(dict.fromkeys(map(str, expose_ids)))
+        processed = self.processed_ids(expose_ids)
+        conn = self._get_connection()
+        conn.cursor().executemany("INSERT INTO processed VALUES (?)",
+                                  [(expose_id,) for expose_id in expose_ids
+                                   if expose_id not in processed])
+        conn.commit()
+        if self.seen is not None:
+            self.seen.add_many(expose_id for expose_id in expose_ids
+                               if expose_id not in processed)
+
+    def _load_processed_ids(self) -> List[int | str]:
+        cur = self._get_connection().cursor()
+        cur.execute("SELECT ID FROM processed")
+        return [row[0] for row in cur.fetchall()]
 
     def save_expose(self, expose: Dict) -> None:
         """Save expose to database"""
@@ -62,6 +111,20 @@ class SqliteExposeRepository:
         except lite.Error as e:
             logger.error("Database error saving expose: %s", e)
 
+    def save_exposes(self, exposes: List[Dict]) -> None:
+        """Save exposes to database, in a single transaction"""
+        conn = self._get_connection()
+        try:
+            conn.cursor().executemany(
+                "INSERT OR REPLACE INTO exposes (id, created, crawler, details) "
+                "VALUES (?, ?, ?, ?)",
+                [(expose['id'], datetime.now(), expose.get('crawler', ''), json.dumps(expose))
+                 for expose in exposes]
+            )
+            conn.commit()
+        except lite.Error as e:
+            logger.error("Database error saving exposes: %s", e)
+
     def get_recent_exposes(self, count: int = 20) -> List[Dict]:
         """Get recently saved exposes"""
         conn = self._get_connection()
@@ -80,6 +143,38 @@ class SqliteExposeRepository:
         cur.execute("INSERT INTO executions VALUES (?)", (datetime.now(),))
         conn.commit()
 
+    def save_run_report(self, report: Dict) -> None:
+        """Record the measurements of a hunt"""
+        conn = self._get_connection()
+        cur = conn.cursor()
+        cur.execute("INSERT INTO run_reports VALUES (?, ?)", (datetime.now(), json.dumps(report)))
+        conn.commit()
+
+    def get_run_reports(self, count: int = 10) -> List[Dict]:
+        """Get the reports of the most recent hunts, newest first"""
+        conn = self._get_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT report FROM run_reports ORDER BY timestamp DESC LIMIT ?", (count,))
+        return [json.loads(row[0]) for row in cur.fetchall()]
+
+    def get_watermark(self, search_url: str) -> List[int | str]:
+        """Get the IDs seen at the last crawl of a search URL, newest first"""
+        conn = self._get_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT ids FROM watermarks WHERE url = ?", (search_url,))
+        row = cur.fetchone()
+        if row is None:
+            return []
+        return json.loads(row[0])
+
+    def save_watermark(self, search_url: str, expose_ids: List[int | str]) -> None:
+        """Save the IDs seen at the latest crawl of a search URL, newest first"""
+        conn = self._get_connection()
+        cur = conn.cursor()
+        cur.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                    (search_url, json.dumps(list(expose_ids)), datetime.now()))
+        conn.commit()
+
     def get_last_execution_time(self) -> Optional[datetime]:
         """Get the timestamp of the last execution"""
         conn = self._get_connection()
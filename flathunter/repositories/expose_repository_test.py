@@ -0,0 +1,25 @@
+# pylint: disable=missing-docstring
+import unittest
+
+from flathunter.repositories.expose_repository import SqliteExposeRepository
+
+
+class SqliteExposeRepositoryTest(unittest.TestCase):
+
+    TEST_URL = "https://www.example.com/search/flats-in-berlin"
+
+    def setUp(self):
+        self.repository = SqliteExposeRepository(":memory:")
+
+    def test_string_ids_are_looked_up(self):
+        self.repository.mark_processed_many(["17", 18, "18"])
+        self.assertEqual(self.repository.processed_ids(["17", 18, "19"]), {"17", 18})
+        self.assertTrue(self.repository.is_processed(18))
+
+    def test_watermark_empty_by_default(self):
+        self.assertEqual(self.repository.get_watermark(self.TEST_URL), [])
+
+    def test_watermark_read_after_write(self):
+        self.repository.save_watermark(self.TEST_URL, [3, 2, 1])
+        self.repository.save_watermark(self.TEST_URL, ["5", 4, 3])
+        self.assertEqual(self.repository.get_watermark(self.TEST_URL), ["5", 4, 3])
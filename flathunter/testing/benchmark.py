@@ -0,0 +1,122 @@
+"""Offline benchmarks of the crawlers on pages recorded in a fixture store. For
+every crawler, `extract_data` is timed on each recorded search page, and the
+full `Hunter.hunt_flats` pipeline is timed with all fetches replayed from the
+store. Results are given in pages and listings per second"""
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from flathunter.app.hunter import Hunter
+from flathunter.core.config import YamlConfig
+from flathunter.crawling.fixture_store import FixtureStore, REPLAY, \
+    configure_fixture_store
+from flathunter.persistence.idmaintainer import IdMaintainer
+
+Result = Dict[str, float]
+
+
+def _rates(pages: int, listings: int, seconds: float) -> Result:
+    seconds = max(seconds, 1e-9)
+    return {
+        'pages': pages,
+        'listings': listings,
+        'seconds': seconds,
+        'pages_per_second': pages / seconds,
+        'listings_per_second': listings / seconds,
+    }
+
+
+def _best_time(run: Callable[[], Any], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _parse(crawler, fixture: Dict) -> List[Dict]:
+    body = FixtureStore.content(fixture)
+    if 'json' in fixture['content_type']:
+        return crawler.extract_data(json.loads(body))
+    return crawler.extract_data(crawler.make_soup(body))
+
+
+def benchmark_extract(config: YamlConfig, store: FixtureStore,
+                      repeat: int = 3) -> Dict[str, Result]:
+    """Time `extract_data` of every crawler on its recorded search pages. Pages
+       without listings (such as expose details) are left out"""
+    pages: Dict[str, List[Dict]] = {}
+    crawlers = {}
+    for fixture in store.fixtures():
+        crawler = config.crawler_for_url(fixture['url'])
+        if crawler is None or fixture['status_code'] != 200:
+            continue
+        try:
+            if not _parse(crawler, fixture):
+                continue
+        except Exception:  # pylint: disable=broad-except
+            continue
+        crawlers[crawler.get_name()] = crawler
+        pages.setdefault(crawler.get_name(), []).append(fixture)
+
+    results = {}
+    for name, fixtures in sorted(pages.items()):
+        crawler = crawlers[name]
+        listings = sum(len(_parse(crawler, fixture)) for fixture in fixtures)
+        seconds = _best_time(
+            lambda crawler=crawler, fixtures=fixtures: [_parse(crawler, f) for f in fixtures],
+            repeat)
+        results[name] = _rates(len(fixtures), listings, seconds)
+    return results
+
+
+def benchmark_hunt(config: YamlConfig, store: FixtureStore,
+                   repeat: int = 1) -> Dict[str, Result]:
+    """Time `Hunter.hunt_flats` for the target URLs of every crawler, replaying
+       all fetches from the store. Notifications, travel durations and scoring
+       are switched off, and every run starts with an empty database"""
+    groups: Dict[str, List[str]] = {}
+    for url in config.target_urls():
+        crawler = config.crawler_for_url(url)
+        if crawler is not None:
+            groups.setdefault(crawler.get_name(), []).append(url)
+
+    results = {}
+    try:
+        for name, urls in sorted(groups.items()):
+            settings = {key: value for key, value in config.config.items() if key != 'searches'}
+            settings.update({'urls': urls, 'notifiers': [],
+                             'fixtures': {'mode': REPLAY, 'directory': store.directory},
+                             'google_maps_api': {'enable': False}, 'llm': {'enabled': False}})
+            hunt_config = YamlConfig(settings)
+            hunt_config.init_searchers(only_configured=True)
+            replay = configure_fixture_store(hunt_config)
+            exposes: List[Dict] = []
+
+            def hunt(hunt_config=hunt_config, exposes=exposes):
+                exposes[:] = Hunter(hunt_config, IdMaintainer(':memory:')).hunt_flats()
+
+            seconds = _best_time(hunt, repeat)
+            pages = replay.replayed // max(1, repeat) if replay is not None else 0
+            results[name] = _rates(pages, len(exposes), seconds)
+    finally:
+        configure_fixture_store(config)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Result]],
+            baseline: Optional[Dict[str, Dict[str, Result]]]) -> List[str]:
+    """Report lines for the results, with the change against the baseline"""
+    lines = []
+    for suite, crawlers in results.items():
+        for name, result in crawlers.items():
+            line = (f"{suite:8} {name:16} {result['pages']:5d} pages "
+                    f"{result['pages_per_second']:10.1f} pages/s "
+                    f"{result['listings_per_second']:10.1f} listings/s")
+            base = (baseline or {}).get(suite, {}).get(name)
+            if base is not None and base['listings_per_second'] > 0:
+                change = result['listings_per_second'] / base['listings_per_second']
+                line += f"  ({change:.2f}x baseline)"
+            lines.append(line)
+    return lines
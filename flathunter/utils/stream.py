@@ -0,0 +1,41 @@
+"""Utility types for streams of exposes that arrive over time. Iterators fed from
+a queue (the crawl engine, the stages of a pipeline) can tell whether their next
+item is there already, so that batches are handed on as soon as taking another
+item would mean waiting for it, instead of once they are full"""
+
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+class ReadyIterator(Iterator[T]):
+    """An iterator that can tell whether its next item can be taken without waiting"""
+
+    def __init__(self, items: Iterable[T], ready: Callable[[], bool]):
+        self.items = iter(items)
+        self._ready = ready
+
+    def __next__(self) -> T:
+        return next(self.items)
+
+    def ready(self) -> bool:
+        """True if taking the next item (or learning there is none) does not wait"""
+        return self._ready()
+
+
+def is_ready(items: Iterator) -> bool:
+    """True if the next item of the iterator can be taken without waiting. Iterators
+       that cannot tell are taken to be ready"""
+    ready = getattr(items, 'ready', None)
+    return ready() if ready is not None else True
+
+
+def take_ready(items: Iterator[T], size: int) -> List[T]:
+    """Take up to `size` items from the iterator: the first one even if it has to
+       be waited for, the others only while they are there already"""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size or not is_ready(items):
+            break
+    return batch
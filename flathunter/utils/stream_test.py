@@ -0,0 +1,23 @@
+# pylint: disable=missing-docstring
+import unittest
+
+from flathunter.utils.stream import ReadyIterator, is_ready, take_ready
+
+
+class TakeReadyTest(unittest.TestCase):
+
+    def test_takes_up_to_size_items(self):
+        items = iter(range(5))
+        self.assertTrue(is_ready(items))
+        self.assertEqual(take_ready(items, 2), [0, 1])
+        self.assertEqual(take_ready(items, 4), [2, 3, 4])
+        self.assertEqual(take_ready(items, 4), [])
+
+    def test_stops_at_items_that_are_not_there_yet(self):
+        arrived = [1]
+        items = ReadyIterator(range(6), lambda: arrived[0] > 0)
+        self.assertEqual(take_ready(items, 4), [0, 1, 2, 3])
+        arrived[0] = 0
+        self.assertFalse(is_ready(items))
+        self.assertEqual(take_ready(items, 4), [4])
+        self.assertEqual(take_ready(items, 4), [5])
@@ -3,8 +3,8 @@ import datetime
 import json
 from flask import render_template
 
+from flathunter.processing.filter import ExposeView
 from flathunter.web import app
-from flathunter.web.util import sanitize_float
 
 @app.route('/stats')
 def stats_view():
@@ -12,8 +12,8 @@ def stats_view():
     hunter = app.config["HUNTER"]
     exposes = json.dumps(
         list(
-            map(lambda e: {'price': sanitize_float(e['price']),
-                           'size': sanitize_float(e['size']),
+            map(lambda e: {'price': e.price, 'size': e.size,
                            'created_at': str(e['created_at'])},
-                hunter.get_exposes_since(datetime.datetime.now() - datetime.timedelta(days=28)))))
+                map(ExposeView, hunter.get_exposes_since(
+                    datetime.datetime.now() - datetime.timedelta(days=28))))))
     return render_template("statistics.html", title="Statistics", exposes=exposes)
@@ -6,6 +6,7 @@ from flathunter.persistence.idmaintainer import IdMaintainer
 from flathunter.persistence.googlecloud_idmaintainer import GoogleCloudIdMaintainer
 from flathunter.app.web_hunter import WebHunter
 from flathunter.core.config import Config
+from flathunter.app.runtime import configure_runtime
 from flathunter.core.logging import configure_logging
 
 from flathunter.web import app
@@ -20,7 +21,9 @@ else:
 
 if __name__ == '__main__':
     # Use the SQLite DB file if we are running locally
-    id_watch = IdMaintainer(f'{config.database_location()}/processed_ids.db')
+    id_watch = IdMaintainer(f'{config.database_location()}/processed_ids.db',
+                            seen_index=config.seen_index_mode(),
+                            error_rate=config.seen_index_error_rate())
 else:
     # Load the driver manager from local cache (if chrome_driver_install.py has been run
     os.environ['WDM_LOCAL'] = '1'
@@ -29,8 +32,8 @@ else:
 
 configure_logging(config)
 
-# initialize search plugins for config
-config.init_searchers()
+# set up the crawlers and the state they share
+configure_runtime(config)
 
 hunter = WebHunter(config, id_watch)
 
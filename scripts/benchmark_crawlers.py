@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Benchmark the crawlers offline on pages recorded in a fixture store: the
+parsing of every recorded search page, and the full hunt pipeline with all
+fetches replayed. Record the fixtures first by crawling with
+
+    fixtures:
+      mode: record
+      directory: /tmp/flathunter_fixtures
+
+in the config, then run
+
+    PYTHONPATH=. python scripts/benchmark_crawlers.py -c config.yaml -d /tmp/flathunter_fixtures
+
+The results are kept as a baseline in the fixture folder with --save-baseline,
+and later runs are compared against it"""
+import argparse
+import json
+import os
+
+from flathunter.core.config import Config
+from flathunter.crawling.fixture_store import FixtureStore, REPLAY
+from flathunter.testing.benchmark import benchmark_extract, benchmark_hunt, compare
+
+BASELINE_FILE = "baseline.json"
+
+
+def main():
+    """Run the benchmarks and report them against the baseline"""
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n", maxsplit=1)[0])
+    parser.add_argument("-c", "--config", default=None,
+                        help="config file whose target URLs were recorded")
+    parser.add_argument("-d", "--directory", default=None,
+                        help="fixture folder (default: fixtures.directory from the config)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="runs per benchmark, the fastest is reported")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="keep the results as the new baseline")
+    args = parser.parse_args()
+
+    config = Config(args.config) if args.config is not None else Config()
+    config.init_searchers()
+    store = FixtureStore(args.directory or config.fixtures_directory(), REPLAY)
+    if not store.sites():
+        print(f"No fixtures recorded in {store.directory}")
+        return
+
+    results = {
+        "extract": benchmark_extract(config, store, repeat=args.repeat),
+        "hunt": benchmark_hunt(config, store, repeat=args.repeat),
+    }
+
+    baseline_path = os.path.join(store.directory, BASELINE_FILE)
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = json.load(file)
+    for line in compare(results, baseline):
+        print(line)
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark finding duplicates of new listings among recent listings: the
+locality-sensitive hashing index of DuplicateIndex against comparing a new
+listing with every indexed one. Usage:
+
+    PYTHONPATH=. python scripts/benchmark_dedup.py [listings] [lookups]"""
+import random
+import string
+import sys
+import time
+
+from flathunter.processing.dedup import DuplicateIndex, MinHash
+
+STREET_TYPES = ["Road", "Street", "Lane", "Avenue", "Close", "Gardens"]
+AREAS = ["London", "Southwark", "Hackney", "Camden", "Islington", "Lambeth"]
+
+
+def listing(rng, number):
+    """A made-up listing"""
+    street = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+    outward = rng.choice(["E", "N", "SE", "SW", "W"]) + str(rng.randint(1, 20))
+    return {'id': number, 'crawler': rng.choice(['Rightmove', 'Zoopla']),
+            'url': f"https://www.example.com/{number}",
+            'price': f"£{rng.randint(800, 4000)} pcm", 'rooms': str(rng.randint(0, 4)),
+            'address': f"{rng.randint(1, 200)} {street.title()} {rng.choice(STREET_TYPES)}, "
+                       f"{rng.choice(AREAS)}, {outward}"}
+
+
+def relisted(rng, expose, number):
+    """The same flat, as another portal lists it"""
+    words = expose['address'].split(", ")
+    return dict(expose, id=number, crawler='Other', url=f"https://www.example.com/{number}",
+                address=f"Flat {rng.randint(1, 9)}, {words[0]}, London {words[-1]}")
+
+
+def scan(index, new):
+    """The duplicate found by comparing with every indexed listing"""
+    for candidate in index.listings.values():
+        if MinHash.similarity(new.signature, candidate.signature) >= index.threshold \
+                and index.same_flat(new.features, candidate.features):
+            return candidate
+    return None
+
+
+def main():
+    """Time both ways of finding duplicates"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    stored = [listing(rng, number) for number in range(count)]
+    index = DuplicateIndex(lambda: [])
+    index.ensure_loaded()
+    start = time.perf_counter()
+    for expose in stored:
+        index.add(expose)
+    build_time = time.perf_counter() - start
+
+    new = [relisted(rng, rng.choice(stored), count + number) if number % 2 else
+           listing(rng, count + number) for number in range(lookups)]
+    listings = [index.listing(expose) for expose in new]
+    start = time.perf_counter()
+    found = [index.original_of(new_listing) for new_listing in listings]
+    index_time = time.perf_counter() - start
+    candidates = sum(len(index.candidates(new_listing)) for new_listing in listings)
+    start = time.perf_counter()
+    for new_listing in listings[:20]:
+        scan(index, new_listing)
+    scan_time = (time.perf_counter() - start) / min(20, lookups) * lookups
+
+    print(f"{count} listings indexed in {build_time:.1f}s "
+          f"({build_time * 1e6 / count:.0f} us/listing)")
+    print(f"{sum(f is not None for f in found)} of {lookups // 2} relisted flats found, "
+          f"{candidates / lookups:.1f} candidates per lookup")
+    print(f"  index: {index_time * 1e3 / lookups:8.3f} ms/lookup")
+    print(f"  scan:  {scan_time * 1e3 / lookups:8.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark matching addresses against excluded areas: the area matcher used by
+ExcludeAreasFilter against checking every excluded name and postcode in turn.
+Usage:
+
+    PYTHONPATH=. python scripts/benchmark_exclude_areas.py [exclusions] [addresses]"""
+import random
+import re
+import string
+import sys
+import time
+
+from flathunter.processing.area_matcher import AreaMatcher
+
+STREETS = ["High Street", "Station Road", "Church Lane", "Park Avenue", "Mill Road"]
+
+
+def name(rng):
+    """A made-up area name"""
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+
+
+def outward_code(rng):
+    """A made-up outward code, such as 'SE15'"""
+    return rng.choice(["E", "N", "NW", "SE", "SW", "W", "WC", "EC"]) + str(rng.randint(1, 28))
+
+
+def address(rng, names):
+    """An address that sometimes lies in an excluded area"""
+    area = rng.choice(names) if rng.random() < 0.1 else name(rng)
+    return (f"{rng.randint(1, 200)} {rng.choice(STREETS)}, {area.title()}, "
+            f"London, {outward_code(rng)} {rng.randint(1, 9)}AB")
+
+
+def naive(names, postcodes, text):
+    """Every name and postcode checked in turn, as ExcludeAreasFilter used to"""
+    lower = text.lower()
+    upper = text.upper()
+    if any(n in lower for n in names):
+        return True
+    return any(re.search(r'\b' + re.escape(p) + r'\b', upper) for p in postcodes)
+
+
+def main():
+    """Time both ways of matching and check they agree"""
+    exclusions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    rng = random.Random(0)
+    names = [name(rng) for _ in range(exclusions - exclusions // 10)]
+    postcodes = list({outward_code(rng) for _ in range(exclusions // 10)})
+    addresses = [address(rng, names) for _ in range(count)]
+
+    start = time.perf_counter()
+    matcher = AreaMatcher(names, postcodes)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    matched = [matcher.matches(text) for text in addresses]
+    matcher_time = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [naive(names, postcodes, text) for text in addresses]
+    naive_time = time.perf_counter() - start
+
+    if matched != expected:
+        raise AssertionError("Matchers disagree")
+    print(f"{len(names)} names, {len(postcodes)} postcodes, {count} addresses, "
+          f"{sum(matched)} excluded")
+    print(f"  one by one:   {naive_time * 1e6 / count:8.2f} us/address")
+    print(f"  area matcher: {matcher_time * 1e6 / count:8.2f} us/address"
+          f" (built in {build_time * 1000:.1f} ms)")
+    print(f"  speedup:      {naive_time / matcher_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
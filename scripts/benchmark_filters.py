@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Benchmark the filter chain on synthetic exposes: every filter applied to the
+raw expose, parsing the numbers again each time, against the compiled filter
+that parses the numbers of each expose once. Usage:
+
+    PYTHONPATH=. python scripts/benchmark_filters.py [number of exposes]"""
+import random
+import sys
+import timeit
+
+from flathunter.processing.filter import Filter
+from flathunter.testing.config import StringConfig
+
+REPEAT = 5
+CONFIG = """
+filters:
+  excluded_titles:
+    - "wg"
+    - "tausch"
+    - "studio"
+    - "house share"
+  min_price: 800
+  max_price: 2500
+  min_size: 30
+  max_size: 120
+  min_rooms: 1
+  max_rooms: 4
+  max_price_per_square: 40
+exclude_areas:
+  names: ["Peckham", "Elephant and Castle"]
+  postcodes: ["SE15", "SE1", "E14"]
+"""
+AREAS = ["10 Peckham High Street, SE15 5AB", "2 Camden Road, NW1 9LS",
+         "Flat 3, Canary Wharf, E14 5AB", "8 Hackney Road, E2 7NX"]
+
+
+def make_exposes(count):
+    """Exposes with price, size and rooms texts as the crawlers produce them"""
+    rng = random.Random(0)
+    return [{
+        'id': index,
+        'title': rng.choice(["Spacious flat", "WG room", "Studio near park", "2 bed flat"]),
+        'price': f"£{rng.randint(500, 3500):,} pcm",
+        'size': f"{rng.randint(20, 140)} sq. m",
+        'rooms': f"{rng.randint(1, 5)} bedrooms",
+        'address': rng.choice(AREAS),
+    } for index in range(count)]
+
+
+def main():
+    """Time both filter modes and check they agree"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    exposes = make_exposes(count)
+    compiled = Filter.builder().read_config(StringConfig(string=CONFIG)).build()
+
+    def raw():
+        return [all([f.is_interesting(expose) for f in compiled.filters])
+                for expose in exposes]
+
+    def view():
+        return [compiled.is_interesting_expose(expose) for expose in exposes]
+
+    if raw() != view():
+        raise AssertionError("Filter modes disagree")
+    raw_time = min(timeit.repeat(raw, repeat=REPEAT, number=1))
+    view_time = min(timeit.repeat(view, repeat=REPEAT, number=1))
+    print(f"{count} exposes, {len(compiled.filters)} filters, {sum(view())} kept")
+    print(f"  raw exposes:     {raw_time * 1e6 / count:8.2f} us/expose")
+    print(f"  compiled filter: {view_time * 1e6 / count:8.2f} us/expose")
+    print(f"  speedup:         {raw_time / view_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Benchmark parsing of Rightmove search pages: full page parse against
+the restricted parse of the page model and property cards only. Usage:
+
+    PYTHONPATH=. python scripts/benchmark_rightmove.py [page.html ...]
+
+Without arguments, the Rightmove fixtures in flathunter/testing/fixtures are used.
+They are not saved pages but made-up listings in the markup of Rightmove: a page
+with the page model, and the same page without it, which is read from the
+property cards. Pass saved search pages for figures on real markup"""
+import glob
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from flathunter.crawler.uk.rightmove import Rightmove
+from flathunter.testing.config import StringConfig
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                        "flathunter", "testing", "fixtures", "rightmove-*.html")
+REPEAT = 5
+NUMBER = 10
+
+
+def benchmark(crawler, path):
+    """Time both parsing modes on one page and check they agree"""
+    with open(path, encoding="utf-8") as file:
+        html = file.read()
+
+    def full():
+        return crawler.extract_data(BeautifulSoup(html, 'lxml'))
+
+    def restricted():
+        return crawler.extract_data(crawler.make_soup(html))
+
+    if full() != restricted():
+        raise AssertionError(f"Parsing modes disagree on {path}")
+    full_time = min(timeit.repeat(full, repeat=REPEAT, number=NUMBER)) / NUMBER
+    restricted_time = min(timeit.repeat(restricted, repeat=REPEAT, number=NUMBER)) / NUMBER
+    print(f"{os.path.basename(path)}: {len(full())} listings, {len(html) // 1024} KiB")
+    print(f"  full parse:       {full_time * 1000:8.2f} ms/page")
+    print(f"  restricted parse: {restricted_time * 1000:8.2f} ms/page")
+    print(f"  speedup:          {full_time / restricted_time:8.2f}x")
+
+
+def main():
+    """Benchmark all given pages"""
+    paths = sys.argv[1:] or sorted(glob.glob(FIXTURES))
+    if not paths:
+        print("No pages to benchmark")
+        return
+    crawler = Rightmove(StringConfig(string=""))
+    for path in paths:
+        benchmark(crawler, path)
+
+
+if __name__ == "__main__":
+    main()
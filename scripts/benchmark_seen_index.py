@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Benchmark the index of processed IDs: memory used per million IDs and time
+per lookup in 'memory' and 'bloom' mode, against looking the IDs up in the
+SQLite database. Usage:
+
+    PYTHONPATH=. python scripts/benchmark_seen_index.py [number of IDs]"""
+import random
+import sys
+import time
+import tracemalloc
+
+from flathunter.persistence.idmaintainer import IdMaintainer
+from flathunter.persistence.seen_index import BLOOM, MEMORY, OFF
+
+LOOKUPS = 20000
+
+
+def build(mode, expose_ids):
+    """An ID maintainer in the given mode, with its index loaded"""
+    id_watch = IdMaintainer(":memory:", seen_index=mode)
+    id_watch.mark_processed_many(expose_ids)
+    tracemalloc.start()
+    id_watch.processed_ids([0])
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return id_watch, memory
+
+
+def main():
+    """Report memory and lookup time of every mode"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    expose_ids = rng.sample(range(10 ** 9), count)
+    seen = rng.sample(expose_ids, LOOKUPS // 2)
+    queries = seen + [rng.randrange(10 ** 9, 2 * 10 ** 9) for _ in range(LOOKUPS // 2)]
+    rng.shuffle(queries)
+
+    print(f"{count} processed IDs, {LOOKUPS} lookups (half of them seen)")
+    for mode in (OFF, MEMORY, BLOOM):
+        id_watch, memory = build(mode, expose_ids)
+        start = time.perf_counter()
+        for expose_id in queries:
+            id_watch.is_processed(expose_id)
+        lookup = (time.perf_counter() - start) / LOOKUPS
+        per_million = memory * 1_000_000 / count / 2 ** 20
+        print(f"  {mode:7} {per_million:8.1f} MB per million IDs"
+              f" {lookup * 1e6:8.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
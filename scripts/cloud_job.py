@@ -5,6 +5,7 @@ from flathunter.app.argument_parser import parse
 from flathunter.persistence.googlecloud_idmaintainer import GoogleCloudIdMaintainer
 from flathunter.app.web_hunter import WebHunter
 from flathunter.core.config import Config
+from flathunter.app.runtime import configure_runtime
 from flathunter.core.logging import configure_logging
 
 # load config
@@ -22,8 +23,8 @@ id_watch = GoogleCloudIdMaintainer(config)
 
 configure_logging(config)
 
-# initialize search plugins for config
-config.init_searchers()
+# set up the crawlers and the state they share
+configure_runtime(config)
 
 hunter = WebHunter(config, id_watch)
 